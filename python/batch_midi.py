@@ -0,0 +1,278 @@
+import argparse
+import glob
+import hashlib
+import json
+import os
+import time
+from dataclasses import asdict, dataclass
+from multiprocessing import Pool
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from constants import SONGS_PATH, TICKS_PER_QUARTER
+from convert_midi import generate_c_code, midi_to_notes, write_song_binary
+from tqdm import tqdm
+
+MIDI_SUFFIXES = (".mid", ".midi")
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+HASH_CHUNK_SIZE = 1 << 20
+
+
+@dataclass
+class ConversionResult:
+    source: str
+    output: str
+    sha256: str
+    note_count: int = 0
+    bpm: int = 0
+    total_ticks: int = 0
+    duration_seconds: float = 0.0
+    conversion_seconds: float = 0.0
+    error: str = ""
+
+
+def hash_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def glob_root(pattern: str) -> Path:
+    """The leading directories of a glob pattern that contain no wildcards."""
+    parts = Path(pattern).parts
+    root = []
+    for part in parts[:-1]:
+        if glob.has_magic(part):
+            break
+        root.append(part)
+    return Path(*root) if root else Path(".")
+
+
+def collect_inputs(
+    inputs: Sequence[str], output_format: str
+) -> List[Tuple[Path, Path]]:
+    """Expand files, directories and globs into (source, relative output) pairs.
+
+    Outputs keep each source's path below its directory or the fixed part of its glob,
+    so songs with the same name in different folders stay apart. An input that names
+    no MIDI file is an error rather than an empty library.
+    """
+    suffix = "." + output_format
+    pairs = {}
+    for pattern in inputs:
+        path = Path(pattern)
+        if path.is_dir():
+            root, matches = path, path.rglob("*")
+        else:
+            root, matches = glob_root(pattern), map(
+                Path, glob.glob(pattern, recursive=True)
+            )
+        sources = [
+            source
+            for source in sorted(matches)
+            if source.is_file() and source.suffix.lower() in MIDI_SUFFIXES
+        ]
+        if not sources:
+            raise ValueError(f"{pattern} matches no MIDI files")
+        for source in sources:
+            pairs[source] = source.relative_to(root).with_suffix(suffix)
+
+    sources = {}
+    for source, output in pairs.items():
+        if output in sources:
+            raise ValueError(
+                f"{sources[output]} and {source} would both be written to {output}"
+            )
+        sources[output] = source
+    return list(pairs.items())
+
+
+def load_manifest(path: Path) -> dict:
+    try:
+        with open(path) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return manifest if manifest.get("version") == MANIFEST_VERSION else {}
+
+
+def save_manifest(path: Path, manifest: dict) -> None:
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _convert_file(
+    job: Tuple[str, str, str, int, Optional[float], str]
+) -> ConversionResult:
+    source, output, sha256, quantize, max_duration, output_format = job
+    result = ConversionResult(source, output, sha256)
+    start = time.perf_counter()
+    try:
+        notes, bpm, total_ticks = midi_to_notes(
+            source, quantize, max_duration, verbose=False
+        )
+        Path(output).parent.mkdir(parents=True, exist_ok=True)
+        if output_format == "bin":
+            write_song_binary(notes, bpm, output, verbose=False)
+        else:
+            generate_c_code(notes, bpm, output, verbose=False)
+        result.note_count = len(notes)
+        result.bpm = bpm
+        result.total_ticks = total_ticks
+        result.duration_seconds = total_ticks * 60 / (bpm * TICKS_PER_QUARTER)
+    except Exception as e:
+        result.error = str(e)
+    result.conversion_seconds = time.perf_counter() - start
+    return result
+
+
+def convert_library(
+    inputs: Sequence[str],
+    output_dir: Path = SONGS_PATH,
+    quantize: int = 0,
+    max_duration: Optional[float] = None,
+    output_format: str = "bin",
+    workers: Optional[int] = None,
+    force: bool = False,
+) -> Dict[str, dict]:
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = output_dir / MANIFEST_NAME
+
+    options = {
+        "quantize": quantize,
+        "max_duration": max_duration,
+        "format": output_format,
+    }
+    manifest = load_manifest(manifest_path)
+    previous = (
+        manifest.get("files", {})
+        if manifest.get("options") == options and not force
+        else {}
+    )
+
+    files = {}
+    jobs = []
+    for source, relative_output in collect_inputs(inputs, output_format):
+        output = output_dir / relative_output
+        sha256 = hash_file(source)
+        entry = previous.get(str(source))
+        if (
+            entry
+            and entry["sha256"] == sha256
+            and not entry["error"]
+            and entry["output"] == str(output)
+            and output.exists()
+        ):
+            files[str(source)] = entry
+        else:
+            jobs.append(
+                (
+                    str(source),
+                    str(output),
+                    sha256,
+                    quantize,
+                    max_duration,
+                    output_format,
+                )
+            )
+
+    print(
+        f"{len(files) + len(jobs)} MIDI files: {len(jobs)} to convert, {len(files)} unchanged"
+    )
+
+    if jobs:
+        with Pool(min(workers or os.cpu_count() or 1, len(jobs))) as pool:
+            for result in tqdm(
+                pool.imap_unordered(_convert_file, jobs),
+                total=len(jobs),
+                desc="Converting",
+            ):
+                files[result.source] = asdict(result)
+                if result.error:
+                    print(f"Error converting {result.source}: {result.error}")
+
+    files = dict(sorted(files.items()))
+    save_manifest(
+        manifest_path, {"version": MANIFEST_VERSION, "options": options, "files": files}
+    )
+
+    converted = [entry for entry in files.values() if not entry["error"]]
+    print(
+        f"Converted library: {len(converted)} songs, "
+        f"{sum(entry['note_count'] for entry in converted)} notes, "
+        f"{sum(entry['duration_seconds'] for entry in converted):.1f} seconds"
+    )
+    print(f"Manifest written to {manifest_path}")
+    return files
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Convert directories or globs of MIDI files to song files in parallel"
+    )
+    parser.add_argument(
+        "inputs", nargs="+", help="MIDI files, directories or glob patterns"
+    )
+    parser.add_argument(
+        "-o",
+        "--output-dir",
+        type=Path,
+        default=SONGS_PATH,
+        help="Output directory, also holds manifest.json (default: %(default)s)",
+    )
+    parser.add_argument(
+        "-f",
+        "--format",
+        choices=("bin", "c"),
+        default="bin",
+        help="Binary song files or C sources (default: %(default)s)",
+    )
+    parser.add_argument(
+        "-q",
+        "--quantize",
+        type=int,
+        default=0,
+        help="Quantization level in ticks (0=none, 120=32nd note, 240=16th note)",
+    )
+    parser.add_argument(
+        "-d",
+        "--duration",
+        type=float,
+        help="Maximum duration in seconds (truncate long songs)",
+    )
+    parser.add_argument(
+        "-j",
+        "--workers",
+        type=int,
+        help="Number of conversion processes (default: all cores)",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Convert every file even if its content hash is unchanged",
+    )
+
+    args = parser.parse_args()
+    try:
+        files = convert_library(
+            args.inputs,
+            args.output_dir,
+            args.quantize,
+            args.duration,
+            args.format,
+            args.workers,
+            args.force,
+        )
+    except ValueError as e:
+        parser.error(str(e))
+    return 1 if any(entry["error"] for entry in files.values()) else 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,159 @@
+import argparse
+import time
+from dataclasses import dataclass
+from typing import Callable, List, Tuple
+
+import numpy as np
+from constants import ANALYSIS_DURATION, MAX_HARMONICS, SAMPLE_RATE
+from fft import analyze_harmonics, find_window, get_harmonic
+from notes import calculate_frequency
+
+PITCHES = (33, 45, 57, 69, 81)
+INHARMONICITY = 2e-4  # typical piano B coefficient
+MAX_DETUNE_CENTS = 20.0
+MIN_LEVEL_DB = -60.0  # partials quieter than this are left out of the error
+
+
+Engine = Callable[[np.ndarray, int, int, float], Tuple[np.ndarray, np.ndarray]]
+
+
+@dataclass
+class EngineResult:
+    name: str
+    seconds_per_note: float
+    median_error_db: float
+    p95_error_db: float
+
+
+def synthesize_note(
+    pitch: int, fs: int, duration: float, inharmonicity: float, rng: np.random.Generator
+) -> Tuple[float, np.ndarray, np.ndarray, np.ndarray]:
+    """Decaying, inharmonic, detuned test note. Returns (nominal f0, signal, amplitudes, decay rates)."""
+    nominal = calculate_frequency(pitch)
+    f0 = nominal * 2.0 ** (rng.uniform(-MAX_DETUNE_CENTS, MAX_DETUNE_CENTS) / 1200.0)
+    harmonics = np.arange(1, MAX_HARMONICS + 1)
+    freqs = f0 * harmonics * np.sqrt(1.0 + inharmonicity * harmonics**2)
+    amplitudes = rng.uniform(0.2, 1.0, MAX_HARMONICS) / harmonics
+    amplitudes[freqs >= fs / 2] = 0.0
+    decays = rng.uniform(0.2, 1.5, MAX_HARMONICS) * np.sqrt(harmonics)
+    phases = rng.uniform(0.0, 2.0 * np.pi, MAX_HARMONICS)
+
+    t = np.arange(int(duration * fs)) / fs
+    signal = np.zeros_like(t)
+    for freq, amplitude, decay, phase in zip(freqs, amplitudes, decays, phases):
+        if amplitude > 0.0:
+            signal += (
+                amplitude * np.exp(-decay * t) * np.sin(2.0 * np.pi * freq * t + phase)
+            )
+    return nominal, signal.astype(np.float32), amplitudes, decays
+
+
+def per_harmonic_stft(
+    signal: np.ndarray, fs: int, window_size: int, f0: float
+) -> Tuple[np.ndarray, np.ndarray]:
+    """The original archive builder: one full STFT per harmonic."""
+    tracks = [
+        get_harmonic(signal, fs, window_size, f0, h)
+        for h in range(1, MAX_HARMONICS + 1)
+    ]
+    return tracks[0][0], np.stack([amplitudes for _, amplitudes in tracks])
+
+
+def analysis_engine(engine: str, refine: bool = False) -> Engine:
+    return lambda signal, fs, window_size, f0: analyze_harmonics(
+        signal, fs, window_size, f0, MAX_HARMONICS, engine, refine
+    )
+
+
+def level_errors_db(
+    times: np.ndarray, measured: np.ndarray, amplitudes: np.ndarray, decays: np.ndarray
+) -> np.ndarray:
+    # A Hann-windowed sinusoid of amplitude A measures A / 2 with stft's spectrum scaling
+    expected = 0.5 * amplitudes[:, None] * np.exp(-decays[:, None] * times[None, :])
+    mask = expected > 10.0 ** (MIN_LEVEL_DB / 20.0) * expected.max()
+    ratio = np.maximum(measured[mask], 1e-12) / expected[mask]
+    return np.abs(20.0 * np.log10(ratio))
+
+
+def benchmark(
+    engines: List[Tuple[str, Engine]],
+    notes: int,
+    fs: int = SAMPLE_RATE,
+    duration: float = ANALYSIS_DURATION,
+    inharmonicity: float = INHARMONICITY,
+    seed: int = 0,
+) -> List[EngineResult]:
+    rng = np.random.default_rng(seed)
+    cases = [
+        synthesize_note(PITCHES[i % len(PITCHES)], fs, duration, inharmonicity, rng)
+        for i in range(notes)
+    ]
+
+    results = []
+    for name, engine in engines:
+        errors = []
+        elapsed = 0.0
+        for f0, signal, amplitudes, decays in cases:
+            window_size = find_window(fs, f0)
+            start = time.perf_counter()
+            times, measured = engine(signal, fs, window_size, f0)
+            elapsed += time.perf_counter() - start
+            errors.append(level_errors_db(times, measured, amplitudes, decays))
+
+        errors = np.concatenate(errors)
+        results.append(
+            EngineResult(
+                name,
+                elapsed / notes,
+                float(np.median(errors)),
+                float(np.percentile(errors, 95)),
+            )
+        )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare harmonic tracker engines on synthetic piano notes"
+    )
+    parser.add_argument(
+        "--notes",
+        type=int,
+        default=10,
+        help="Number of test notes (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--inharmonicity",
+        type=float,
+        default=INHARMONICITY,
+        help="Inharmonicity coefficient B of the test notes (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--seed", type=int, default=0, help="Random seed (default: %(default)s)"
+    )
+    args = parser.parse_args()
+
+    engines = [
+        ("stft per harm.", per_harmonic_stft),
+        ("stft", analysis_engine("stft")),
+        ("dft", analysis_engine("dft")),
+        ("dft + refine", analysis_engine("dft", refine=True)),
+    ]
+    results = benchmark(
+        engines, args.notes, inharmonicity=args.inharmonicity, seed=args.seed
+    )
+
+    print(
+        f"{args.notes} notes, {ANALYSIS_DURATION:.0f} s at {SAMPLE_RATE} Hz, "
+        f"{MAX_HARMONICS} harmonics, B={args.inharmonicity:g}, detune up to {MAX_DETUNE_CENTS:.0f} cents"
+    )
+    print(f"{'engine':<16}{'ms/note':>10}{'median dB':>12}{'p95 dB':>10}")
+    for result in results:
+        print(
+            f"{result.name:<16}{result.seconds_per_note * 1e3:>10.1f}"
+            f"{result.median_error_db:>12.2f}{result.p95_error_db:>10.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
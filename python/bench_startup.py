@@ -0,0 +1,94 @@
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import List, Sequence, Tuple
+
+PYTHON_DIR = Path(__file__).resolve().parent
+HEAVY_MODULES = ("torch", "scipy.signal", "mido", "pydub", "IPython")
+
+# Modules each main.py subcommand imports before doing any work
+COMMAND_MODULES = {
+    "build": ("dataset",),
+    "train": ("dataset", "train"),
+    "train --workers": ("dataset", "distributed"),
+    "check": ("dataset", "quality"),
+    "sweep": ("dataset", "sweep"),
+}
+
+
+def time_command(command: Sequence[str], repeats: int) -> float:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        subprocess.run(command, cwd=PYTHON_DIR, check=True, stdout=subprocess.DEVNULL)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def loaded_heavy_modules(modules: Sequence[str]) -> List[str]:
+    script = (
+        f"import json, sys\n"
+        f"for module in {list(modules)!r}: __import__(module)\n"
+        f"print(json.dumps([m for m in {list(HEAVY_MODULES)!r} if m in sys.modules]))"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=PYTHON_DIR,
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    return json.loads(output.stdout)
+
+
+def benchmark(repeats: int) -> List[Tuple[str, float, float, List[str]]]:
+    interpreter = time_command([sys.executable, "-c", "pass"], repeats)
+    print(f"Interpreter startup: {interpreter * 1e3:.0f} ms (median of {repeats})")
+
+    rows = [
+        (
+            "--help",
+            time_command([sys.executable, "main.py", "--help"], repeats),
+            0.0,
+            [],
+        )
+    ]
+    for command, modules in COMMAND_MODULES.items():
+        subcommand = command.split()[0]
+        cli = time_command([sys.executable, "main.py", subcommand, "--help"], repeats)
+        imports = time_command(
+            [sys.executable, "-c", "; ".join(f"import {m}" for m in modules)], repeats
+        )
+        rows.append(
+            (command, cli, imports - interpreter, loaded_heavy_modules(modules))
+        )
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measure main.py startup time per subcommand"
+    )
+    parser.add_argument(
+        "--repeats",
+        type=int,
+        default=5,
+        help="Runs per measurement (default: %(default)s)",
+    )
+    args = parser.parse_args()
+
+    rows = benchmark(args.repeats)
+    print(f"\n{'command':<18}{'CLI ms':>8}{'imports ms':>12}  heavy modules loaded")
+    for command, cli, imports, heavy in rows:
+        imports_ms = f"{imports * 1e3:.0f}" if imports else "-"
+        print(
+            f"{command:<18}{cli * 1e3:>8.0f}{imports_ms:>12}  {', '.join(heavy) or '-'}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -3,12 +3,36 @@ from pathlib import Path
 DATASET_PATH = Path("wav")
 ARCHIVE_PATH = Path("data/harmonics.pkl")
 MODEL_PATH = Path("models/tiny.pth")
+WEIGHTS_BLOB_PATH = Path("models/tiny.bin")
+SWEEP_PATH = Path("models/sweep")
+NOTE_CACHE_PATH = Path("data/note_cache")
+SONGS_PATH = Path("songs")
 CODE_PATH = Path("src/model.c")
 WEIGHTS_PATH = Path("src/weights.c")
+FIXED_WEIGHTS_PATH = Path("src/weights_fixed.c")
 SONG_PATH = Path("src/data.c")
 
 MAX_HARMONICS = 32
-SAMPLE_RATE = 48000
+SAMPLE_RATE = (
+    48000  # the C engine's final quality tier; draft and preview are chosen at runtime
+)
+ANALYSIS_DURATION = 4.0  # seconds of each sample the model is trained on
+ANALYSIS_ENGINES = ("stft", "dft")
+PREFETCH_WORKERS = 4
+NOTE_CACHE_BYTES = (
+    1 << 30
+)  # rendered notes kept on disk before the least recently used are evicted
+
+# Mirrors of src/synth.h, used when rendering in Python
+FADE_IN_DURATION = 0.1
+FADE_OUT_DURATION = 1.0
+MASTER_GAIN = 0.1
+
+# Default training parameters
+HIDDEN_SIZES = (64, 64, 32)
+BATCH_SIZE = 1024
+LEARNING_RATE = 1e-2
+EPOCHS = 20
 
 TICKS_PER_QUARTER = 480
 DEFAULT_BPM = 120
@@ -1,10 +1,74 @@
 import argparse
+import struct
+from bisect import bisect_right
 from pathlib import Path
-from typing import List, Optional, Tuple
+from typing import TYPE_CHECKING, List, Optional, Tuple
 
-import mido
 from constants import DEFAULT_BPM, SONG_PATH, TICKS_PER_QUARTER
 
+if TYPE_CHECKING:
+    import mido
+
+
+SONG_FILE_MAGIC = b"TPSG"
+SONG_FILE_VERSION = 1
+MAX_TICKS = 0xFFFFFFFF
+MAX_BPM = 0xFFFF  # the song header's uint16 tempo
+DEFAULT_TEMPO = 60_000_000 // DEFAULT_BPM  # microseconds per quarter note
+
+
+class TempoMap:
+    def __init__(self, changes: List[Tuple[int, int]], ticks_per_beat: int):
+        if not changes or changes[0][0] > 0:
+            changes = [(0, DEFAULT_TEMPO)] + changes
+
+        self.ticks_per_beat = ticks_per_beat
+        self.ticks = []
+        self.tempos = []
+        self.seconds = []
+
+        elapsed = 0.0
+        for tick, tempo in changes:
+            if self.ticks:
+                elapsed += self._span(self.ticks[-1], tick, self.tempos[-1])
+                if tick == self.ticks[-1]:
+                    self.ticks.pop()
+                    self.tempos.pop()
+                    self.seconds.pop()
+            self.ticks.append(tick)
+            self.tempos.append(tempo)
+            self.seconds.append(elapsed)
+
+    def _span(self, start: int, end: int, tempo: int) -> float:
+        return (end - start) * tempo / (self.ticks_per_beat * 1_000_000)
+
+    def __len__(self) -> int:
+        return len(self.ticks)
+
+    @property
+    def initial_bpm(self) -> int:
+        return max(1, min(MAX_BPM, round(60_000_000 / self.tempos[0])))
+
+    def to_seconds(self, tick: int) -> float:
+        i = bisect_right(self.ticks, tick) - 1
+        return self.seconds[i] + self._span(self.ticks[i], tick, self.tempos[i])
+
+
+def read_tempo_map(mid: "mido.MidiFile") -> TempoMap:
+    changes = []
+    for track in mid.tracks:
+        tick = 0
+        for msg in track:
+            tick += msg.time
+            if msg.type == "set_tempo":
+                changes.append((tick, msg.tempo))
+    changes.sort(key=lambda change: change[0])
+    return TempoMap(changes, mid.ticks_per_beat)
+
+
+def seconds_to_ticks(seconds: float, bpm: int) -> int:
+    return int(round(seconds * bpm * TICKS_PER_QUARTER / 60))
+
 
 def quantize_time(time_ticks: int, quantize_level: int) -> int:
     if quantize_level <= 0:
@@ -12,50 +76,55 @@ def quantize_time(time_ticks: int, quantize_level: int) -> int:
     return round(time_ticks / quantize_level) * quantize_level
 
 
+def clamp_ticks(ticks: int, minimum: int = 0) -> int:
+    return max(minimum, min(MAX_TICKS, ticks))
+
+
 def midi_to_notes(
-    midi_file: str, quantize_level: int = 0, max_duration: Optional[float] = None
+    midi_file: str,
+    quantize_level: int = 0,
+    max_duration: Optional[float] = None,
+    verbose: bool = True,
 ) -> Tuple[List[tuple], int, int]:
+    import mido
+
     try:
         mid = mido.MidiFile(midi_file)
     except Exception as e:
         raise ValueError(f"Could not load MIDI file: {e}")
 
-    bpm = DEFAULT_BPM
-    for track in mid.tracks:
-        for msg in track:
-            if msg.type == "set_tempo":
-                bpm = int(60_000_000 / msg.tempo)
-                break
-        if bpm != DEFAULT_BPM:
-            break
+    tempo_map = read_tempo_map(mid)
+    bpm = tempo_map.initial_bpm
 
-    print(f"MIDI file info:")
-    print(f"  Tracks: {len(mid.tracks)}")
-    print(f"  Ticks per beat: {mid.ticks_per_beat}")
-    print(f"  BPM: {bpm}")
+    log = print if verbose else lambda *args: None
 
-    tick_scale = TICKS_PER_QUARTER / mid.ticks_per_beat
-    active_notes = {}  # note_pitch -> (start_time, velocity)
-    notes = []
+    log(f"MIDI file info:")
+    log(f"  Tracks: {len(mid.tracks)}")
+    log(f"  Ticks per beat: {mid.ticks_per_beat}")
+    log(f"  BPM: {bpm}")
+    log(f"  Tempo changes: {len(tempo_map) - 1}")
 
-    max_time_ticks = None
-    if max_duration:
-        max_time_ticks = int(max_duration * bpm * TICKS_PER_QUARTER / 60)
+    def to_song_ticks(midi_ticks: int) -> int:
+        # Absolute MIDI ticks go through the tempo map once, so rounding never accumulates
+        song_ticks = seconds_to_ticks(tempo_map.to_seconds(midi_ticks), bpm)
+        return quantize_time(song_ticks, quantize_level)
+
+    active_notes = {}  # (channel, pitch) -> (start_time, velocity)
+    notes = []
 
     for track_idx, track in enumerate(mid.tracks):
-        current_time = 0
-        print(f"\nProcessing track {track_idx}: {track.name}")
+        current_tick = 0
+        log(f"\nProcessing track {track_idx}: {track.name}")
 
         for msg in track:
-            current_time += int(msg.time * tick_scale)
+            current_tick += msg.time
 
-            if max_time_ticks and current_time > max_time_ticks:
+            if max_duration and tempo_map.to_seconds(current_tick) > max_duration:
                 break
 
             if msg.type == "note_on" and msg.velocity > 0:
                 key = (msg.channel, msg.note)
-                start_time = quantize_time(current_time, quantize_level)
-                active_notes[key] = (start_time, msg.velocity)
+                active_notes[key] = (to_song_ticks(current_tick), msg.velocity)
 
             elif msg.type == "note_off" or (
                 msg.type == "note_on" and msg.velocity == 0
@@ -63,60 +132,105 @@ def midi_to_notes(
                 key = (msg.channel, msg.note)
                 if key in active_notes:
                     start_time, velocity = active_notes[key]
-                    end_time = quantize_time(current_time, quantize_level)
-                    duration = max(1, end_time - start_time)  # Ensure minimum duration
+                    end_time = to_song_ticks(current_tick)
 
                     # Clamp values to our format limits
                     pitch = max(0, min(127, msg.note))
                     velocity = max(1, min(127, velocity))
-                    start_time = max(0, min(65535, start_time))
-                    duration = max(1, min(65535, duration))
+                    start_time = clamp_ticks(start_time)
+                    duration = clamp_ticks(end_time - start_time, minimum=1)
 
                     notes.append((pitch, velocity, start_time, duration))
                     del active_notes[key]
 
     if active_notes:
-        print(f"Warning: {len(active_notes)} notes were still active at end of file")
+        log(f"Warning: {len(active_notes)} notes were still active at end of file")
         for key, (start_time, velocity) in active_notes.items():
             _, note = key
-            duration = max(1, min(65535, TICKS_PER_QUARTER))
             pitch = max(0, min(127, note))
             velocity = max(1, min(127, velocity))
-            start_time = max(0, min(65535, start_time))
-            notes.append((pitch, velocity, start_time, duration))
+            notes.append((pitch, velocity, clamp_ticks(start_time), TICKS_PER_QUARTER))
 
-    notes.sort(key=lambda x: x[2])
+    notes.sort(key=lambda x: (x[2], x[0]))
 
-    print(f"\nExtracted {len(notes)} notes")
+    log(f"\nExtracted {len(notes)} notes")
+    total_ticks = 0
     if notes:
         total_ticks = max(note[2] + note[3] for note in notes)
         duration_seconds = total_ticks * 60 / (bpm * TICKS_PER_QUARTER)
-        print(f"Total duration: {total_ticks} ticks ({duration_seconds:.2f} seconds)")
+        log(f"Total duration: {total_ticks} ticks ({duration_seconds:.2f} seconds)")
 
     return notes, bpm, total_ticks
 
 
-def generate_c_code(notes: List[tuple], bpm: int, output_file: str) -> None:
-    c_code = f"""#include "data.h"
-
-Song* create_midi_song(void) {{
-    Note notes[] = {{
-"""
-
-    # Add each note
+def encode_deltas(notes: List[tuple]) -> List[tuple]:
+    encoded = []
+    previous_start = 0
     for pitch, velocity, start, duration in notes:
-        c_code += f"        {{{pitch}, {velocity}, {start}, {duration}, 0}},\n"
-
-    c_code += f"""    }};
+        encoded.append((pitch, velocity, start - previous_start, duration))
+        previous_start = start
+    return encoded
+
+
+def generate_c_code(
+    notes: List[tuple], bpm: int, output_file: str, verbose: bool = True
+) -> None:
+    if not notes:
+        # C99 has no empty initializer list, so the table would not compile
+        raise ValueError("No notes to write; a C note table needs at least one")
+
+    lines = [
+        '#include "data.h"',
+        "",
+        "static const Note notes[] = {",
+    ]
+
+    # Add each note as {pitch, velocity, padding, delta, duration}
+    for pitch, velocity, delta, duration in encode_deltas(notes):
+        lines.append(f"    {{{pitch}, {velocity}, 0, {delta}, {duration}}},")
+
+    lines += [
+        "};",
+        "",
+        "Song* create_midi_song(void) {",
+        f"    return create_song(notes, {len(notes)}, {bpm});",
+        "}",
+        "",
+    ]
 
-    return create_song(notes, {len(notes)}, {bpm});
-}}
-"""
     # Write to file
     with open(output_file, "w") as f:
-        f.write(c_code)
+        f.write("\n".join(lines))
+
+    if verbose:
+        print(f"Generated C code written to {output_file}")
+
+
+def write_song_binary(
+    notes: List[tuple], bpm: int, output_file: str, verbose: bool = True
+) -> None:
+    total_ticks = max((start + duration for _, _, start, duration in notes), default=0)
+    header = struct.pack(
+        "<4sIIIHH",
+        SONG_FILE_MAGIC,
+        SONG_FILE_VERSION,
+        len(notes),
+        min(MAX_TICKS, total_ticks),
+        bpm,
+        TICKS_PER_QUARTER,
+    )
+    records = b"".join(
+        struct.pack("<BBHII", pitch, velocity, 0, delta, duration)
+        for pitch, velocity, delta, duration in encode_deltas(notes)
+    )
 
-    print(f"Generated C code written to {output_file}")
+    with open(output_file, "wb") as f:
+        f.write(header + records)
+
+    if verbose:
+        print(
+            f"Binary song ({len(notes)} notes, {len(header) + len(records)} bytes) written to {output_file}"
+        )
 
 
 def main():
@@ -124,7 +238,12 @@ def main():
         description="Convert MIDI file to our custom song format"
     )
     parser.add_argument("input", help="Input MIDI file path")
-    parser.add_argument("-o", "--output", help="Output C file path", default=SONG_PATH)
+    parser.add_argument(
+        "-o",
+        "--output",
+        help="Output path: C source, or binary song file if it ends with .bin",
+        default=SONG_PATH,
+    )
     parser.add_argument(
         "-q",
         "--quantize",
@@ -176,7 +295,11 @@ def main():
         if len(notes) > 5:
             print(f"  ... and {len(notes) - 5} more notes")
 
-        if not args.dry_run:
+        if not args.dry_run and Path(args.output).suffix == ".bin":
+            write_song_binary(notes, bpm, args.output)
+            print(f"\nTo use in your C code:")
+            print(f'  Song* song = load_song("{args.output}");')
+        elif not args.dry_run:
             generate_c_code(notes, bpm, args.output)
             print(f"\nTo use in your C code:")
             print(f'  #include "{args.output}"')
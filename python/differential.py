@@ -0,0 +1,656 @@
+import argparse
+import ctypes
+import json
+import math
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from constants import DEFAULT_BPM, TICKS_PER_QUARTER
+from engine import NOTE_DTYPE, ROOT, Engine, RenderSettings
+from fft import frame_signal
+
+# Note tables compiled into the C programs: the convert_midi.py song and the tests' song
+BUILTIN_SONGS = {
+    "test_data": ROOT / "src/tests/test_data.c",
+    "data": ROOT / "src/data.c",
+}
+NOTE_TABLE = re.compile(r"static const Note notes\[\] = \{(.*?)\n\};", re.DOTALL)
+NOTE_ROW = re.compile(r"\{([^{}]*)\}")
+SONG_BPM = re.compile(r"create_song\(notes, [^;]*, (\w+)\);")
+C_CONSTANTS = {"TICKS_PER_QUARTER": TICKS_PER_QUARTER, "DEFAULT_BPM": DEFAULT_BPM}
+REFERENCE = "reference"
+MODEL = "model"  # the song column of model comparisons
+MODEL_POINTS = 100_000
+RANDOM_SONG_NOTES = 32
+SPECTRUM_WINDOW = 2048
+SPECTRUM_FLOOR_DB = (
+    -80.0
+)  # bins this far below the loudest reference bin are not compared
+GAIN_PEAK = 1  # GainMode in src/synth.h
+
+
+class VoiceConfig(ctypes.Structure):
+    _fields_ = [
+        ("max_voices", ctypes.c_size_t),
+        ("block_size", ctypes.c_size_t),
+        ("budget", ctypes.c_uint64),
+        ("steal", ctypes.c_int),
+        ("release", ctypes.c_float),
+    ]
+
+
+@dataclass
+class Tolerance:
+    """Limits a configuration must stay within against the reference; None is not checked."""
+
+    model_log_error: Optional[
+        float
+    ] = None  # max |ln a - ln a_ref| over random model inputs
+    max_error: Optional[float] = None  # max per-sample absolute error
+    min_snr_db: Optional[float] = None
+    max_spectral_db: Optional[float] = None  # mean STFT log-magnitude error
+    max_loudness_db: Optional[float] = None
+
+
+@dataclass
+class Configuration:
+    name: str
+    description: str
+    tolerance: Tolerance
+    flags: Tuple[str, ...] = ()  # CMake options of the variant library
+    renderer: str = "song"  # key of RENDERERS
+
+
+@dataclass
+class Comparison:
+    configuration: str
+    song: str
+    max_error: float
+    snr_db: float
+    spectral_db: float
+    loudness_db: float
+    seconds: float
+    speedup: float
+    failures: List[str] = field(default_factory=list)
+
+
+def render_song(engine: Engine, song: int, size: int) -> np.ndarray:
+    buffer = np.zeros(size, dtype=np.float32)
+    engine.lib.render_song(song, buffer)
+    return buffer
+
+
+def render_voices(engine: Engine, song: int, size: int) -> np.ndarray:
+    # Enough voices that nothing is stolen, so only the block renderer differs
+    config = VoiceConfig(
+        max_voices=256, block_size=256, budget=0, steal=0, release=0.005
+    )
+    buffer = np.zeros(size, dtype=np.float32)
+    if (
+        engine.lib.render_song_voices(song, ctypes.byref(config), buffer, size, None)
+        != 0
+    ):
+        raise MemoryError("render_song_voices failed")
+    return buffer
+
+
+def render_segments(engine: Engine, song: int, size: int) -> np.ndarray:
+    buffer = np.zeros(size, dtype=np.float32)
+    segment = (
+        engine.sample_rate
+    )  # one-second segments, as separate workers would render them
+    for first in range(0, size, segment):
+        last = min(first + segment, size)
+        engine.lib.render_song_range(song, first, last, buffer[first:last])
+    return buffer
+
+
+def render_cached(engine: Engine, song: int, size: int) -> np.ndarray:
+    cache = engine.lib.create_render_cache()
+    try:
+        if engine.lib.update_render_cache(cache, song) < 0:
+            raise MemoryError("update_render_cache failed")
+        length = ctypes.c_size_t()
+        buffer = engine.lib.render_cache_buffer(cache, ctypes.byref(length))
+        return np.ctypeslib.as_array(buffer, shape=(length.value,))[:size].copy()
+    finally:
+        engine.lib.free_render_cache(cache)
+
+
+def render_peak_gain(engine: Engine, song: int, size: int) -> np.ndarray:
+    current = engine.lib.current_render_settings()
+    settings = RenderSettings.from_buffer_copy(current.contents)
+    settings.gain_mode = GAIN_PEAK
+    engine.lib.use_render_settings(ctypes.byref(settings))
+    try:
+        return render_song(engine, song, size)
+    finally:
+        engine.lib.use_render_settings(current)
+
+
+RENDERERS: Dict[str, Callable[[Engine, int, int], np.ndarray]] = {
+    "song": render_song,
+    "voices": render_voices,
+    "segments": render_segments,
+    "cache": render_cached,
+    "peak-gain": render_peak_gain,
+}
+
+CONFIGURATIONS = [
+    Configuration(REFERENCE, "x87 exp, float model, render_song", Tolerance()),
+    Configuration(
+        "exp-poly",
+        "polynomial exp",
+        Tolerance(
+            model_log_error=1e-4,
+            max_error=1e-4,
+            min_snr_db=90.0,
+            max_spectral_db=0.01,
+            max_loudness_db=0.01,
+        ),
+        flags=("EXP_APPROX=POLY",),
+    ),
+    Configuration(
+        "exp-table",
+        "table exp",
+        Tolerance(
+            model_log_error=1e-4,
+            max_error=1e-4,
+            min_snr_db=90.0,
+            max_spectral_db=0.01,
+            max_loudness_db=0.01,
+        ),
+        flags=("EXP_APPROX=TABLE",),
+    ),
+    Configuration(
+        "exp-bits",
+        "bit-trick exp",
+        Tolerance(
+            model_log_error=0.5,
+            min_snr_db=20.0,
+            max_spectral_db=1.0,
+            max_loudness_db=0.5,
+        ),
+        flags=("EXP_APPROX=BITS",),
+    ),
+    Configuration(
+        "fixed-point",
+        "int8 x int16 model",
+        Tolerance(
+            model_log_error=0.3,
+            min_snr_db=30.0,
+            max_spectral_db=0.5,
+            max_loudness_db=0.2,
+        ),
+        flags=("FIXED_POINT=ON",),
+    ),
+    Configuration(
+        "voices",
+        "voice scheduler blocks, no stealing",
+        Tolerance(
+            model_log_error=0.0,
+            min_snr_db=40.0,
+            max_spectral_db=0.05,
+            max_loudness_db=0.05,
+        ),
+        renderer="voices",
+    ),
+    Configuration(
+        "segments",
+        "render_song_range in one-second segments",
+        Tolerance(model_log_error=0.0, max_error=0.0),
+        renderer="segments",
+    ),
+    Configuration(
+        "render-cache",
+        "incremental render cache, cold",
+        Tolerance(model_log_error=0.0, max_error=0.0),
+        renderer="cache",
+    ),
+    Configuration(
+        "peak-gain",
+        "rendered-peak gain instead of the estimate",
+        Tolerance(
+            model_log_error=0.0,
+            min_snr_db=40.0,
+            max_spectral_db=0.1,
+            max_loudness_db=0.1,
+        ),
+        renderer="peak-gain",
+    ),
+]
+
+
+def variant_key(configuration: Configuration) -> Tuple[str, ...]:
+    return tuple(sorted(configuration.flags))
+
+
+def build_variant(flags: Tuple[str, ...], output_dir: Path) -> Path:
+    """Configure and build tinypiano_shared with these CMake options in a build tree of its own."""
+    name = "_".join(flag.replace("=", "_").lower() for flag in flags) or "reference"
+    build = output_dir / name
+    commands = [
+        [
+            "cmake",
+            "-S",
+            str(ROOT),
+            "-B",
+            str(build),
+            "-DCMAKE_BUILD_TYPE=Release",
+            f"-DCMAKE_LIBRARY_OUTPUT_DIRECTORY={build / 'lib'}",
+            f"-DCMAKE_RUNTIME_OUTPUT_DIRECTORY={build / 'bin'}",
+            f"-DCMAKE_ARCHIVE_OUTPUT_DIRECTORY={build / 'lib'}",
+            *(f"-D{flag}" for flag in flags),
+        ],
+        ["cmake", "--build", str(build), "--target", "tinypiano_shared"],
+    ]
+    for command in commands:
+        result = subprocess.run(command, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(
+                f"Could not build the {name} variant:\n{result.stdout}{result.stderr}"
+            )
+    libraries = sorted((build / "lib").glob("*tinypiano.*"))
+    if not libraries:
+        raise RuntimeError(f"The {name} variant built no library in {build / 'lib'}")
+    return libraries[0]
+
+
+def load_engine(
+    library: Path, weights: Optional[Path], quality: Optional[str]
+) -> Engine:
+    engine = Engine(library, weights)
+    if quality:
+        engine.use_quality(quality)
+    lib = engine.lib
+    lib.render_song.argtypes = [
+        ctypes.c_void_p,
+        np.ctypeslib.ndpointer(np.float32, flags="C_CONTIGUOUS"),
+    ]
+    lib.render_song.restype = None
+    lib.render_song_range.argtypes = [
+        ctypes.c_void_p,
+        ctypes.c_size_t,
+        ctypes.c_size_t,
+        np.ctypeslib.ndpointer(np.float32, flags="C_CONTIGUOUS"),
+    ]
+    lib.render_song_range.restype = None
+    lib.render_song_voices.argtypes = [
+        ctypes.c_void_p,
+        ctypes.POINTER(VoiceConfig),
+        np.ctypeslib.ndpointer(np.float32, flags="C_CONTIGUOUS"),
+        ctypes.c_size_t,
+        ctypes.c_void_p,
+    ]
+    lib.render_song_voices.restype = ctypes.c_int
+    lib.create_render_cache.restype = ctypes.c_void_p
+    lib.free_render_cache.argtypes = [ctypes.c_void_p]
+    lib.update_render_cache.argtypes = [ctypes.c_void_p, ctypes.c_void_p]
+    lib.update_render_cache.restype = ctypes.c_long
+    lib.render_cache_buffer.argtypes = [
+        ctypes.c_void_p,
+        ctypes.POINTER(ctypes.c_size_t),
+    ]
+    lib.render_cache_buffer.restype = ctypes.POINTER(ctypes.c_float)
+    lib.use_render_settings.argtypes = [ctypes.c_void_p]
+    return engine
+
+
+def c_constant(expression: str) -> int:
+    """Value of an integer constant expression from a note table, with C's integer division."""
+    for name, value in C_CONSTANTS.items():
+        expression = expression.replace(name, str(value))
+    if not re.fullmatch(r"[0-9+\-*/() ]+", expression):
+        raise ValueError(f"Unsupported expression in a note table: {expression!r}")
+    return int(eval(expression.replace("/", "//")))
+
+
+def read_note_table(path: Path) -> Tuple[np.ndarray, int]:
+    """The notes and tempo of a C source with a static Note table, such as the one convert_midi.py writes."""
+    source = path.read_text()
+    table, bpm = NOTE_TABLE.search(source), SONG_BPM.search(source)
+    if table is None or bpm is None:
+        raise ValueError(f"{path} has no note table passed to create_song")
+    rows = [
+        [c_constant(field.strip()) for field in row.split(",")]
+        for row in NOTE_ROW.findall(table.group(1))
+    ]
+    return np.array([tuple(row) for row in rows], dtype=NOTE_DTYPE), c_constant(
+        bpm.group(1)
+    )
+
+
+def random_song(seed: int, count: int = RANDOM_SONG_NOTES) -> np.ndarray:
+    """Dense random notes: chords, repeated keys and the full keyboard, with short and long durations."""
+    rng = np.random.default_rng(seed)
+    notes = np.zeros(count, dtype=NOTE_DTYPE)
+    notes["pitch"] = rng.integers(21, 109, count)
+    notes["velocity"] = rng.integers(1, 128, count)
+    notes["delta"] = rng.choice(
+        [0, 0, TICKS_PER_QUARTER // 8, TICKS_PER_QUARTER // 2, TICKS_PER_QUARTER], count
+    )
+    notes["duration"] = rng.integers(
+        TICKS_PER_QUARTER // 16, TICKS_PER_QUARTER * 4, count
+    )
+    return notes
+
+
+class SongSet:
+    """Note arrays and their tempos as Song pointers in one variant library."""
+
+    def __init__(self, engine: Engine, songs: Dict[str, Tuple[np.ndarray, int]]):
+        self.engine = engine
+        self.songs = {
+            name: engine.lib.create_song(notes, len(notes), bpm)
+            for name, (notes, bpm) in songs.items()
+        }
+        self._notes = songs  # create_song keeps pointers into these
+
+    def size(self, name: str) -> int:
+        return self.engine.lib.song_size(self.songs[name])
+
+    def close(self) -> None:
+        for song in self.songs.values():
+            self.engine.lib.free_song(song)
+
+
+def timed_pair(
+    reference: Callable[[], np.ndarray], actual: Callable[[], np.ndarray], repeat: int
+) -> Tuple[Tuple[np.ndarray, float], Tuple[np.ndarray, float]]:
+    """Outputs and best times of two calls, alternated so that drift in machine load hits both alike."""
+    outputs: List[np.ndarray] = [np.empty(0), np.empty(0)]
+    best = [math.inf, math.inf]
+    for _ in range(repeat):
+        for i, call in enumerate((reference, actual)):
+            start = time.perf_counter()
+            outputs[i] = call()
+            best[i] = min(best[i], time.perf_counter() - start)
+    return (outputs[0], best[0]), (outputs[1], best[1])
+
+
+def compare_model(
+    configuration: Configuration,
+    reference: Engine,
+    engine: Engine,
+    inputs: np.ndarray,
+    repeat: int,
+) -> Comparison:
+    """Max log-amplitude error of predict_amplitude on the same random inputs, in the max_error column."""
+    (reference_amplitudes, reference_seconds), (amplitudes, seconds) = timed_pair(
+        lambda: reference.predict_amplitudes(*inputs),
+        lambda: engine.predict_amplitudes(*inputs),
+        repeat,
+    )
+    error = np.abs(
+        np.log(np.maximum(amplitudes, 1e-30))
+        - np.log(np.maximum(reference_amplitudes, 1e-30))
+    )
+    result = Comparison(
+        configuration.name,
+        MODEL,
+        float(np.max(error)),
+        math.nan,
+        math.nan,
+        math.nan,
+        seconds=seconds,
+        speedup=reference_seconds / max(seconds, 1e-9),
+    )
+    limit = configuration.tolerance.model_log_error
+    if limit is not None and result.max_error > limit:
+        result.failures.append(
+            f"log-amplitude error {result.max_error:.2e} > {limit:.2e}"
+        )
+    return result
+
+
+def log_spectrum(signal: np.ndarray) -> np.ndarray:
+    window_size = min(SPECTRUM_WINDOW, len(signal))
+    frames = frame_signal(signal.astype(np.float64), window_size, window_size // 4)
+    magnitude = np.abs(np.fft.rfft(frames * np.hanning(window_size), axis=1))
+    return 20.0 * np.log10(np.maximum(magnitude, 1e-12))
+
+
+def compare(
+    reference: np.ndarray, actual: np.ndarray
+) -> Tuple[float, float, float, float]:
+    """Max sample error, SNR, mean log-spectral error and loudness difference, in that order."""
+    size = max(len(reference), len(actual))
+    reference = np.pad(reference.astype(np.float64), (0, size - len(reference)))
+    actual = np.pad(actual.astype(np.float64), (0, size - len(actual)))
+    error = actual - reference
+    signal_power = float(np.sum(reference**2))
+    noise_power = float(np.sum(error**2))
+    snr_db = (
+        math.inf
+        if noise_power == 0.0
+        else 10.0 * math.log10(max(signal_power, 1e-30) / noise_power)
+    )
+
+    expected = log_spectrum(reference)
+    spectrum = log_spectrum(actual)
+    audible = expected > expected.max() + SPECTRUM_FLOOR_DB
+    spectral_db = float(np.mean(np.abs(spectrum[audible] - expected[audible])))
+
+    loudness_db = 10.0 * math.log10(
+        max(float(np.sum(actual**2)), 1e-30) / max(signal_power, 1e-30)
+    )
+    return float(np.max(np.abs(error))), snr_db, spectral_db, loudness_db
+
+
+def check_tolerance(result: Comparison, tolerance: Tolerance) -> None:
+    if tolerance.max_error is not None and result.max_error > tolerance.max_error:
+        result.failures.append(
+            f"max error {result.max_error:.2e} > {tolerance.max_error:.2e}"
+        )
+    if tolerance.min_snr_db is not None and result.snr_db < tolerance.min_snr_db:
+        result.failures.append(
+            f"SNR {result.snr_db:.1f} dB < {tolerance.min_snr_db:.1f} dB"
+        )
+    if (
+        tolerance.max_spectral_db is not None
+        and result.spectral_db > tolerance.max_spectral_db
+    ):
+        result.failures.append(
+            f"spectral error {result.spectral_db:.3f} dB > {tolerance.max_spectral_db} dB"
+        )
+    if (
+        tolerance.max_loudness_db is not None
+        and abs(result.loudness_db) > tolerance.max_loudness_db
+    ):
+        result.failures.append(
+            f"loudness {result.loudness_db:+.3f} dB beyond ±{tolerance.max_loudness_db} dB"
+        )
+
+
+def run_differential(
+    configurations: Sequence[Configuration],
+    build_dir: Path,
+    weights: Optional[Path] = None,
+    quality: Optional[str] = None,
+    random_songs: int = 2,
+    seed: int = 0,
+    bpm: int = 120,
+    repeat: int = 3,
+) -> List[Comparison]:
+    reference_configuration = next(c for c in CONFIGURATIONS if c.name == REFERENCE)
+    configurations = [reference_configuration] + [
+        c for c in configurations if c.name != REFERENCE
+    ]
+
+    keys = sorted({variant_key(c) for c in configurations})
+    print(f"Building {len(keys)} engine variants in {build_dir}")
+    with ThreadPoolExecutor() as pool:
+        libraries = dict(
+            zip(keys, pool.map(lambda key: build_variant(key, build_dir), keys))
+        )
+    engines = {
+        key: load_engine(library, weights, quality)
+        for key, library in libraries.items()
+    }
+
+    notes = {name: read_note_table(path) for name, path in BUILTIN_SONGS.items()}
+    notes.update(
+        {f"random{i}": (random_song(seed + i), bpm) for i in range(random_songs)}
+    )
+    song_sets = {key: SongSet(engine, notes) for key, engine in engines.items()}
+    reference = engines[variant_key(reference_configuration)]
+    reference_songs = song_sets[variant_key(reference_configuration)]
+
+    inputs = np.random.default_rng(seed).random((4, MODEL_POINTS), dtype=np.float32)
+    try:
+        results = []
+        for configuration in configurations:
+            key = variant_key(configuration)
+            engine, songs = engines[key], song_sets[key]
+            results.append(
+                compare_model(configuration, reference, engine, inputs, repeat)
+            )
+            render = RENDERERS[configuration.renderer]
+            for name, song in songs.songs.items():
+                reference_song, size = reference_songs.songs[
+                    name
+                ], reference_songs.size(name)
+                (reference_output, reference_seconds), (output, seconds) = timed_pair(
+                    lambda: render_song(reference, reference_song, size),
+                    lambda: render(engine, song, songs.size(name)),
+                    repeat,
+                )
+                result = Comparison(
+                    configuration.name,
+                    name,
+                    *compare(reference_output, output),
+                    seconds=seconds,
+                    speedup=reference_seconds / max(seconds, 1e-9),
+                )
+                check_tolerance(result, configuration.tolerance)
+                results.append(result)
+    finally:
+        for songs in song_sets.values():
+            songs.close()
+    return results
+
+
+def print_differential_report(results: List[Comparison]) -> None:
+    """One row per configuration and song; the model row's error is in log amplitude."""
+    print(
+        f"\n{'configuration':<14}{'song':<11}{'max error':>11}{'SNR dB':>9}{'spec dB':>9}"
+        f"{'loud dB':>9}{'ms':>9}{'speedup':>9}  result"
+    )
+    previous = None
+    for result in results:
+        name = result.configuration if result.configuration != previous else ""
+        previous = result.configuration
+        status = "FAIL: " + "; ".join(result.failures) if result.failures else "PASS"
+        audio = (
+            ""
+            if result.song == MODEL
+            else (
+                f"{result.snr_db:>9.1f}{result.spectral_db:>9.3f}{result.loudness_db:>+9.3f}"
+            )
+        )
+        print(
+            f"{name:<14}{result.song:<11}{result.max_error:>11.2e}{audio:>27}{result.seconds * 1e3:>9.1f}"
+            f"{result.speedup:>8.2f}x  {status}"
+        )
+
+
+def main():
+    names = [c.name for c in CONFIGURATIONS]
+    parser = argparse.ArgumentParser(
+        description="Render songs through the reference engine and each optimized configuration and compare"
+    )
+    parser.add_argument(
+        "--only",
+        nargs="+",
+        choices=names,
+        default=None,
+        help="Configurations to check (default: all)",
+    )
+    parser.add_argument(
+        "--weights",
+        type=Path,
+        default=None,
+        help="Weights blob for every variant (default: built-in)",
+    )
+    parser.add_argument(
+        "--quality",
+        type=str,
+        default="draft",
+        help="draft, preview or final (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--random-songs",
+        type=int,
+        default=2,
+        help="Seeded random songs (default: %(default)s)",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--bpm",
+        type=int,
+        default=120,
+        help="Tempo of the random songs (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=3,
+        help="Renders timed per song, best kept (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--build-dir", type=Path, default=None, help="Keep the variant libraries here"
+    )
+    parser.add_argument(
+        "--json", type=Path, default=None, help="Write the report as JSON"
+    )
+    args = parser.parse_args()
+
+    configurations = [
+        c
+        for c in CONFIGURATIONS
+        if args.only is None or c.name in args.only or c.name == REFERENCE
+    ]
+    with tempfile.TemporaryDirectory(prefix="tinypiano_differential_") as temporary:
+        build_dir = args.build_dir or Path(temporary)
+        build_dir.mkdir(parents=True, exist_ok=True)
+        results = run_differential(
+            configurations,
+            build_dir.resolve(),
+            args.weights,
+            args.quality,
+            args.random_songs,
+            args.seed,
+            args.bpm,
+            args.repeat,
+        )
+    print_differential_report(results)
+
+    failures = sorted({r.configuration for r in results if r.failures})
+    if args.json:
+        report = {
+            "configurations": [asdict(c) for c in configurations],
+            "results": [asdict(r) for r in results],
+            "failed": failures,
+        }
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2, default=str)
+        print(f"\nReport written to {args.json}")
+
+    if failures:
+        print(
+            f"\n{len(failures)} configuration(s) out of tolerance: {', '.join(failures)}"
+        )
+        sys.exit(1)
+    print(f"\nAll {len(configurations) - 1} configurations within tolerance")
+
+
+if __name__ == "__main__":
+    main()
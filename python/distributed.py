@@ -0,0 +1,253 @@
+import os
+import signal
+import socket
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple, Union
+
+import torch
+import torch.distributed as dist
+import torch.multiprocessing as mp
+from constants import MODEL_PATH
+from dataset import HarmonicsArchive
+from metrics import configure_metrics, emit, metrics_settings, peak_rss_mb
+from model import DirectTinyHarmonicModel
+from torch import Tensor
+from torch.nn.parallel import DistributedDataParallel
+from torch.utils.data import DataLoader, Subset, TensorDataset
+from torch.utils.data.distributed import DistributedSampler
+from train import (
+    BATCH_SIZE,
+    EPOCHS,
+    HIDDEN_SIZES,
+    LEARNING_RATE,
+    build_training_tensors,
+    train_epoch,
+)
+
+BACKEND = "gloo"
+BASELINE_BATCHES = 200
+CPU = torch.device("cpu")
+
+
+def find_free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def save_checkpoint(model: torch.nn.Module, model_path: Path) -> None:
+    model_path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = model_path.with_suffix(model_path.suffix + ".tmp")
+    torch.save(model.state_dict(), temp_path)
+    os.replace(temp_path, model_path)
+
+
+def interrupt_once(signum, frame) -> None:
+    """SIGINT handler that raises KeyboardInterrupt once, so a repeated Ctrl+C cannot cut the checkpoint short."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    raise KeyboardInterrupt
+
+
+def measure_single_process_throughput(
+    tensors: Tuple[Tensor, ...],
+    hidden_sizes: Tuple[int, ...],
+    batch_size: int,
+    learning_rate: float,
+    batches: int = BASELINE_BATCHES,
+) -> float:
+    dataset = TensorDataset(*tensors)
+    indices = torch.randperm(len(dataset))[: batches * batch_size]
+    loader = DataLoader(Subset(dataset, indices), batch_size=batch_size, shuffle=True)
+
+    model = DirectTinyHarmonicModel(hidden_sizes=hidden_sizes)
+    optimizer = torch.optim.Adam(model.parameters(), lr=learning_rate)
+    model.train()
+
+    start = time.perf_counter()
+    _, samples = train_epoch(
+        model, loader, torch.nn.MSELoss(), optimizer, CPU, "Single-process baseline"
+    )
+    return samples / (time.perf_counter() - start)
+
+
+def _distributed_worker(
+    rank: int,
+    world_size: int,
+    port: int,
+    tensors: Tuple[Tensor, ...],
+    hidden_sizes: Tuple[int, ...],
+    epochs: int,
+    batch_size: int,
+    learning_rate: float,
+    model_path: Path,
+    threads: int,
+    qat_epochs: int,
+    results: mp.SimpleQueue,
+    metrics_path: Optional[Path],
+    run_fields: Dict[str, Any],
+) -> None:
+    signal.signal(signal.SIGINT, interrupt_once)
+    if rank == 0:
+        # Spawned processes start without the parent's metrics stream
+        configure_metrics(metrics_path, **run_fields)
+    os.environ["MASTER_ADDR"] = "127.0.0.1"
+    os.environ["MASTER_PORT"] = str(port)
+    dist.init_process_group(BACKEND, rank=rank, world_size=world_size)
+    torch.set_num_threads(threads)
+
+    # Every rank reads its own shard of the shared tensors; the global batch size is kept
+    dataset = TensorDataset(*tensors)
+    sampler = DistributedSampler(
+        dataset, num_replicas=world_size, rank=rank, shuffle=True
+    )
+    loader = DataLoader(
+        dataset, batch_size=max(1, batch_size // world_size), sampler=sampler
+    )
+
+    model = DistributedDataParallel(DirectTinyHarmonicModel(hidden_sizes=hidden_sizes))
+    optimizer = torch.optim.Adam(model.parameters(), lr=learning_rate)
+    loss_fn = torch.nn.MSELoss()
+    model.train()
+
+    total_samples = 0
+    interrupted = False
+    start = time.perf_counter()
+    try:
+        for epoch in range(1, epochs + 1):
+            sampler.set_epoch(epoch)
+            model.module.quantize = epoch > epochs - qat_epochs
+            epoch_start = time.perf_counter()
+            total_loss, samples = train_epoch(
+                model,
+                loader,
+                loss_fn,
+                optimizer,
+                CPU,
+                f"Epoch {epoch}/{epochs}",
+                progress=rank == 0,
+            )
+
+            stats = torch.tensor([total_loss, samples], dtype=torch.float64)
+            dist.all_reduce(stats)
+            total_samples += int(stats[1].item())
+            seconds = time.perf_counter() - epoch_start
+
+            if rank == 0:
+                avg_loss = stats[0].item() / stats[1].item()
+                print(
+                    f"Epoch {epoch:02d} - MSE Loss: {avg_loss:.6f}{' (QAT)' if model.module.quantize else ''}"
+                )
+                emit(
+                    "epoch",
+                    epoch=epoch,
+                    loss=avg_loss,
+                    quantized=model.module.quantize,
+                    seconds=seconds,
+                    samples=int(stats[1].item()),
+                    batches=len(loader),
+                    samples_per_sec=stats[1].item() / seconds,
+                    batches_per_sec=len(loader) / seconds,
+                    peak_rss_mb=peak_rss_mb(),
+                )
+                save_checkpoint(model.module, model_path)
+            dist.barrier()
+    except KeyboardInterrupt:
+        interrupted = True
+
+    elapsed = time.perf_counter() - start
+    if rank == 0:
+        if interrupted:
+            # The ranks may stop in different batches, so rank 0 saves its own replica without a collective
+            print("Training interrupted. Saving current model state...")
+            model.module.quantize = False
+            save_checkpoint(model.module, model_path)
+        results.put((elapsed, total_samples, interrupted))
+
+    if not interrupted:
+        dist.destroy_process_group()
+
+
+def train_distributed(
+    archive: HarmonicsArchive,
+    hidden_sizes: Tuple[int, ...] = HIDDEN_SIZES,
+    epochs: int = EPOCHS,
+    batch_size: int = BATCH_SIZE,
+    learning_rate: float = LEARNING_RATE,
+    model_path: Union[str, Path] = MODEL_PATH,
+    workers: int = 2,
+    qat_epochs: int = 0,
+) -> DirectTinyHarmonicModel:
+    model_path = Path(model_path)
+    tensors = build_training_tensors(archive)
+    for tensor in tensors:
+        tensor.share_memory_()
+
+    baseline = measure_single_process_throughput(
+        tensors, hidden_sizes, batch_size, learning_rate
+    )
+
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    print(f"Training on {workers} {BACKEND} workers ({threads} threads each)")
+
+    results = mp.get_context("spawn").SimpleQueue()
+    context = mp.spawn(
+        _distributed_worker,
+        args=(
+            workers,
+            find_free_port(),
+            tensors,
+            hidden_sizes,
+            epochs,
+            batch_size,
+            learning_rate,
+            model_path,
+            threads,
+            qat_epochs,
+            results,
+            *metrics_settings(),
+        ),
+        nprocs=workers,
+        join=False,
+    )
+    try:
+        while not context.join():
+            pass
+    except KeyboardInterrupt:
+        # Pass the interrupt on in case it was sent to this process alone, then wait for rank 0's checkpoint
+        print(
+            "Training interrupted. Waiting for the workers to save the current model state..."
+        )
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        for process in context.processes:
+            if process.is_alive():
+                os.kill(process.pid, signal.SIGINT)
+        try:
+            while not context.join():
+                pass
+        finally:
+            signal.signal(signal.SIGINT, signal.default_int_handler)
+
+    elapsed, samples, interrupted = results.get()
+    throughput = samples / elapsed
+    speedup = throughput / baseline
+    print(f"\nSingle-process throughput: {baseline:,.0f} samples/s")
+    print(f"{workers}-worker throughput:    {throughput:,.0f} samples/s")
+    print(
+        f"Speedup: {speedup:.2f}x, scaling efficiency: {100.0 * speedup / workers:.1f}%"
+    )
+    emit(
+        "distributed_train",
+        workers=workers,
+        epochs=epochs,
+        seconds=elapsed,
+        samples=samples,
+        samples_per_sec=throughput,
+        baseline_samples_per_sec=baseline,
+        speedup=speedup,
+        interrupted=interrupted,
+    )
+
+    model = DirectTinyHarmonicModel(hidden_sizes=hidden_sizes)
+    model.load_state_dict(torch.load(model_path, map_location="cpu"))
+    return model
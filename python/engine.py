@@ -0,0 +1,359 @@
+import argparse
+import ctypes
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Optional, Sequence, Union
+
+import numpy as np
+from constants import WEIGHTS_BLOB_PATH
+
+LIBRARY_ENV = "TINYPIANO_LIBRARY"
+ROOT = Path(__file__).resolve().parent.parent
+LIBRARY_PATHS = {
+    "linux": "build/lib/libtinypiano.so",
+    "darwin": "build/lib/libtinypiano.dylib",
+    "win32": "bin/tinypiano.dll",
+}
+
+# Note in src/song.h: start times are deltas from the previous note, in ticks
+NOTE_DTYPE = np.dtype(
+    [
+        ("pitch", "u1"),
+        ("velocity", "u1"),
+        ("padding", "<u2"),
+        ("delta", "<u4"),
+        ("duration", "<u4"),
+    ]
+)
+
+
+class RenderSettings(ctypes.Structure):
+    _fields_ = [
+        ("name", ctypes.c_char_p),
+        ("sample_rate", ctypes.c_int),
+        ("harmonics", ctypes.c_int),
+        ("control_tolerance", ctypes.c_float),
+        ("gain_mode", ctypes.c_int),
+    ]
+
+
+_FLOATS = np.ctypeslib.ndpointer(np.float32, flags="C_CONTIGUOUS")
+_OUTPUT = np.ctypeslib.ndpointer(np.float32, flags=("C_CONTIGUOUS", "WRITEABLE"))
+_NOTES = np.ctypeslib.ndpointer(NOTE_DTYPE, flags="C_CONTIGUOUS")
+
+
+def float_array(values) -> np.ndarray:
+    """float32 C-contiguous view of values; copies only when the layout or type differs."""
+    return np.ascontiguousarray(values, dtype=np.float32)
+
+
+def notes_array(notes: Sequence[tuple]) -> np.ndarray:
+    """(pitch, velocity, start ticks, duration ticks) tuples, as from convert_midi.midi_to_notes, to Note records."""
+    notes = sorted(notes, key=lambda note: note[2])
+    array = np.zeros(len(notes), dtype=NOTE_DTYPE)
+    if notes:
+        pitch, velocity, start, duration = (np.array(column) for column in zip(*notes))
+        array["pitch"], array["velocity"], array["duration"] = pitch, velocity, duration
+        array["delta"] = np.diff(start, prepend=0)
+    return array
+
+
+def as_notes(notes: Union[np.ndarray, Sequence[tuple]]) -> np.ndarray:
+    return (
+        notes
+        if isinstance(notes, np.ndarray) and notes.dtype == NOTE_DTYPE
+        else notes_array(notes)
+    )
+
+
+def check_bpm(bpm: int) -> None:
+    """Songs keep the tempo in a uint16, and a zero tempo would make every time infinite."""
+    if not 0 < bpm <= 0xFFFF:
+        raise ValueError(f"bpm must be between 1 and 65535, got {bpm}")
+
+
+def default_library_path() -> Path:
+    return Path(
+        os.environ.get(LIBRARY_ENV)
+        or ROOT / LIBRARY_PATHS.get(sys.platform, LIBRARY_PATHS["linux"])
+    )
+
+
+class Engine:
+    """The C engine loaded from libtinypiano. NumPy arrays are passed by pointer, without copies,
+    when they are already float32 and C-contiguous."""
+
+    def __init__(
+        self,
+        path: Optional[Union[str, Path]] = None,
+        weights: Optional[Union[str, Path]] = None,
+    ):
+        path = Path(path) if path is not None else default_library_path()
+        if not path.exists():
+            raise FileNotFoundError(
+                f"{path} not found; build it with `cmake --build build --target tinypiano_shared` "
+                f"or set {LIBRARY_ENV}"
+            )
+        self.path = path
+        self.lib = lib = ctypes.CDLL(str(path))
+
+        lib.predict_amplitude.argtypes = [ctypes.c_float] * 4
+        lib.predict_amplitude.restype = ctypes.c_float
+        for name in ("predict_amplitudes", "predict_amplitudes_fixed"):
+            getattr(lib, name).argtypes = [
+                _FLOATS,
+                _FLOATS,
+                _FLOATS,
+                _FLOATS,
+                _OUTPUT,
+                ctypes.c_size_t,
+            ]
+            getattr(lib, name).restype = None
+        lib.note_size.argtypes = [ctypes.c_float]
+        lib.note_size.restype = ctypes.c_size_t
+        lib.render_note.argtypes = [_OUTPUT, ctypes.c_int, ctypes.c_int, ctypes.c_float]
+        lib.render_note.restype = ctypes.c_int
+        lib.synthesize_note.argtypes = [
+            _OUTPUT,
+            ctypes.c_size_t,
+            ctypes.c_int,
+            ctypes.c_int,
+            ctypes.c_float,
+        ]
+        lib.synthesize_note.restype = None
+        lib.render_notes.argtypes = [
+            _NOTES,
+            ctypes.c_size_t,
+            ctypes.c_uint16,
+            _OUTPUT,
+            ctypes.c_size_t,
+        ]
+        lib.render_notes.restype = ctypes.c_int
+        lib.render_notes_range.argtypes = [
+            _NOTES,
+            ctypes.c_size_t,
+            ctypes.c_uint16,
+            ctypes.c_size_t,
+            ctypes.c_size_t,
+            _OUTPUT,
+        ]
+        lib.render_notes_range.restype = ctypes.c_int
+        lib.create_song.argtypes = [_NOTES, ctypes.c_size_t, ctypes.c_uint16]
+        lib.create_song.restype = ctypes.c_void_p
+        lib.free_song.argtypes = [ctypes.c_void_p]
+        lib.song_size.argtypes = [ctypes.c_void_p]
+        lib.song_size.restype = ctypes.c_size_t
+        lib.load_weights_blob.argtypes = [ctypes.c_char_p]
+        lib.load_weights_blob.restype = ctypes.c_int
+        lib.use_quality_tier.argtypes = [ctypes.c_char_p]
+        lib.use_quality_tier.restype = ctypes.c_int
+        lib.current_render_settings.restype = ctypes.POINTER(RenderSettings)
+        lib.fixed_point_build.restype = ctypes.c_int
+
+        if weights is not None:
+            self.load_weights(weights)
+
+    def load_weights(self, path: Union[str, Path]) -> None:
+        if self.lib.load_weights_blob(str(path).encode()) != 0:
+            raise ValueError(f"Could not load weights blob {path}")
+
+    def use_builtin_weights(self) -> None:
+        self.lib.use_builtin_weights()
+
+    def use_quality(self, tier: str) -> None:
+        if self.lib.use_quality_tier(tier.encode()) != 0:
+            raise ValueError(f"Unknown quality tier {tier!r}")
+
+    @property
+    def settings(self) -> RenderSettings:
+        return self.lib.current_render_settings().contents
+
+    @property
+    def sample_rate(self) -> int:
+        return self.settings.sample_rate
+
+    @property
+    def fixed_point(self) -> bool:
+        return bool(self.lib.fixed_point_build())
+
+    def predict_amplitude(
+        self, pitch: float, velocity: float, harmonic: float, time: float
+    ) -> float:
+        return self.lib.predict_amplitude(pitch, velocity, harmonic, time)
+
+    def predict_amplitudes(
+        self,
+        pitch,
+        velocity,
+        harmonic,
+        time,
+        out: Optional[np.ndarray] = None,
+        fixed: bool = False,
+    ) -> np.ndarray:
+        """Model amplitudes for normalized inputs, broadcast against each other."""
+        inputs = [float_array(x) for x in (pitch, velocity, harmonic, time)]
+        shape = np.broadcast_shapes(*(x.shape for x in inputs))
+        inputs = [
+            x if x.shape == shape else float_array(np.broadcast_to(x, shape))
+            for x in inputs
+        ]
+        if out is None:
+            out = np.empty(shape, dtype=np.float32)
+        elif out.shape != shape:
+            raise ValueError(f"out has shape {out.shape}, expected {shape}")
+
+        predict = (
+            self.lib.predict_amplitudes_fixed if fixed else self.lib.predict_amplitudes
+        )
+        predict(*inputs, out, out.size)
+        return out
+
+    def note_size(self, duration: float) -> int:
+        return self.lib.note_size(duration)
+
+    def render_note(
+        self,
+        pitch: int,
+        velocity: int,
+        duration: float,
+        out: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        size = self.note_size(duration)
+        if out is None:
+            out = np.zeros(size, dtype=np.float32)
+        elif len(out) < size:
+            raise ValueError(f"out holds {len(out)} samples, the note needs {size}")
+        else:
+            out[:size] = 0.0
+        if self.lib.render_note(out, pitch, velocity, duration) < 0:
+            raise MemoryError("render_note failed")
+        return out
+
+    def synthesize_note(
+        self, buffer: np.ndarray, start: int, pitch: int, velocity: int, duration: float
+    ) -> None:
+        """Mix a note into buffer in place, from sample start."""
+        if start < 0 or start + self.note_size(duration) > len(buffer):
+            raise ValueError("Note does not fit in the buffer")
+        self.lib.synthesize_note(buffer, start, pitch, velocity, duration)
+
+    def song_size(self, notes: np.ndarray, bpm: int) -> int:
+        check_bpm(bpm)
+        song = self.lib.create_song(notes, len(notes), bpm)
+        try:
+            return self.lib.song_size(song)
+        finally:
+            self.lib.free_song(song)
+
+    def render_song(
+        self,
+        notes: Union[np.ndarray, Sequence[tuple]],
+        bpm: int,
+        out: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """Render Note records (NOTE_DTYPE) or (pitch, velocity, start, duration) tick tuples."""
+        notes = as_notes(notes)
+        size = self.song_size(notes, bpm)
+        if out is None:
+            out = np.zeros(size, dtype=np.float32)
+        if self.lib.render_notes(notes, len(notes), bpm, out, len(out)) != 0:
+            raise ValueError(f"out must hold at least {size} zeroed samples")
+        return out
+
+    def render_song_range(
+        self,
+        notes: Union[np.ndarray, Sequence[tuple]],
+        bpm: int,
+        first: int,
+        last: int,
+        out: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """Song samples [first, last), exactly as render_song writes them there."""
+        notes = as_notes(notes)
+        check_bpm(bpm)
+        if out is None:
+            out = np.zeros(last - first, dtype=np.float32)
+        elif len(out) < last - first:
+            raise ValueError(
+                f"out holds {len(out)} samples, the range needs {last - first}"
+            )
+        if self.lib.render_notes_range(notes, len(notes), bpm, first, last, out) != 0:
+            raise ValueError("first must not be after last")
+        return out
+
+
+def benchmark(engine: Engine, points: int, notes: int) -> None:
+    rng = np.random.default_rng(0)
+    inputs = rng.random((4, points), dtype=np.float32)
+    start = time.perf_counter()
+    engine.predict_amplitudes(*inputs)
+    seconds = time.perf_counter() - start
+    print(
+        f"predict_amplitudes: {points:,} points in {seconds * 1e3:.1f} ms, {seconds / points * 1e9:.0f} ns/point"
+    )
+
+    start = time.perf_counter()
+    for _ in range(1000):
+        engine.predict_amplitude(0.5, 0.5, 0.5, 0.5)
+    seconds = time.perf_counter() - start
+    print(
+        f"predict_amplitude:  {seconds / 1000 * 1e9:.0f} ns/call including ctypes overhead"
+    )
+
+    out = np.zeros(engine.note_size(1.0), dtype=np.float32)
+    start = time.perf_counter()
+    for i in range(notes):
+        engine.render_note(36 + i % 61, 80, 1.0, out=out)
+    seconds = time.perf_counter() - start
+    audio = notes * len(out) / engine.sample_rate
+    print(
+        f"render_note:        {notes} notes of {len(out) / engine.sample_rate:.1f} s in {seconds:.2f} s, "
+        f"{audio / seconds:.1f}x real time"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the C engine through libtinypiano"
+    )
+    parser.add_argument(
+        "--library",
+        type=Path,
+        default=None,
+        help=f"Shared library (default: ${LIBRARY_ENV} or build/)",
+    )
+    parser.add_argument(
+        "--weights",
+        type=Path,
+        default=None,
+        help=f"Weights blob, e.g. {WEIGHTS_BLOB_PATH}",
+    )
+    parser.add_argument(
+        "--quality", type=str, default=None, help="draft, preview or final"
+    )
+    parser.add_argument(
+        "--points",
+        type=int,
+        default=1_000_000,
+        help="Model inputs to evaluate (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--notes", type=int, default=20, help="Notes to render (default: %(default)s)"
+    )
+    args = parser.parse_args()
+
+    engine = Engine(args.library, args.weights)
+    if args.quality:
+        engine.use_quality(args.quality)
+    settings = engine.settings
+    print(
+        f"{engine.path}: {settings.name.decode()} quality, {settings.sample_rate} Hz, {settings.harmonics} harmonics"
+        f"{', fixed-point' if engine.fixed_point else ''}"
+    )
+    benchmark(engine, args.points, args.notes)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,20 @@
+import struct
+from pathlib import Path
+from typing import Dict, List, Tuple
+
 import numpy as np
 import torch
-from constants import MODEL_PATH, WEIGHTS_PATH
+from constants import FIXED_WEIGHTS_PATH, MODEL_PATH, WEIGHTS_BLOB_PATH, WEIGHTS_PATH
 from model import DirectTinyHarmonicModel
 
+FIXED_ACTIVATION_SHIFT = 10
+FIXED_MULTIPLIER_SHIFT = 24
+SILU_TABLE_SHIFT = 7
+SILU_TABLE_SIZE = (1 << (16 - SILU_TABLE_SHIFT)) + 1
+
+WEIGHTS_BLOB_MAGIC = b"TPWB"
+WEIGHTS_BLOB_VERSION = 1
+
 
 def infer_architecture_from_state_dict(state_dict):
     weight_keys = [k for k in state_dict.keys() if k.endswith(".weight")]
@@ -40,6 +52,173 @@ def quantize_array(array):
     return quantized, minimum, maximum
 
 
+def quantize_state_dict(state_dict: Dict[str, torch.Tensor]) -> Dict[str, torch.Tensor]:
+    quantized_state = {}
+    for name, tensor in state_dict.items():
+        array = tensor.detach().cpu().numpy()
+        quantized, minimum, maximum = quantize_array(array)
+        restored = quantized.astype(np.float32) * (maximum - minimum) / 255.0 + minimum
+        quantized_state[name] = torch.from_numpy(
+            restored.reshape(array.shape).astype(np.float32)
+        )
+    return quantized_state
+
+
+def quantize_int8(array: np.ndarray) -> Tuple[np.ndarray, float, float]:
+    quantized, minimum, maximum = quantize_array(array)
+    scale = (maximum - minimum) / 255.0 if maximum > minimum else 1.0
+    offset = float(minimum) + 128.0 * scale
+    q_int8 = (quantized.astype(np.int16) - 128).astype(np.int8).reshape(array.shape)
+    return q_int8, scale, offset
+
+
+def fixed_multiplier(scale: float) -> int:
+    return int(round(scale * (1 << FIXED_MULTIPLIER_SHIFT)))
+
+
+def build_silu_table() -> np.ndarray:
+    x = (np.arange(SILU_TABLE_SIZE) << SILU_TABLE_SHIFT) - 32768
+    x = x.astype(np.float64) / (1 << FIXED_ACTIVATION_SHIFT)
+    y = x / (1.0 + np.exp(-x))
+    y = np.round(y * (1 << FIXED_ACTIVATION_SHIFT))
+    return np.clip(y, -32768, 32767).astype(np.int16)
+
+
+def silu_fixed(x: np.ndarray, table: np.ndarray) -> np.ndarray:
+    offset = np.clip(x, -32768, 32767).astype(np.int64) + 32768
+    index = offset >> SILU_TABLE_SHIFT
+    fraction = offset & ((1 << SILU_TABLE_SHIFT) - 1)
+    low = table[np.minimum(index, SILU_TABLE_SIZE - 1)].astype(np.int64)
+    high = table[np.minimum(index + 1, SILU_TABLE_SIZE - 1)].astype(np.int64)
+    return low + (((high - low) * fraction) >> SILU_TABLE_SHIFT)
+
+
+def fixed_point_forward(
+    layers: List[Tuple[np.ndarray, np.ndarray, int, int]],
+    table: np.ndarray,
+    inputs: np.ndarray,
+) -> np.ndarray:
+    x = np.round(
+        np.asarray(inputs, dtype=np.float64) * (1 << FIXED_ACTIVATION_SHIFT)
+    ).astype(np.int64)
+    rounding = 1 << (FIXED_MULTIPLIER_SHIFT - 1)
+    for i, (q_weights, q_biases, multiplier, offset) in enumerate(layers):
+        accumulator = x @ q_weights.astype(np.int64).T + q_biases.astype(np.int64)
+        input_sum = np.sum(x, axis=-1, keepdims=True)
+        x = (
+            accumulator * multiplier + input_sum * offset + rounding
+        ) >> FIXED_MULTIPLIER_SHIFT
+        x = np.clip(x, -32768, 32767)
+        if i < len(layers) - 1:
+            x = silu_fixed(x, table)
+    return x[..., 0].astype(np.float64) / (1 << FIXED_ACTIVATION_SHIFT)
+
+
+def extract_fixed_point_weights(
+    weights: Dict[str, np.ndarray],
+    biases: Dict[str, np.ndarray],
+    layer_names: List[str],
+    bias_names: List[str],
+    fixed_weights_path: Path = FIXED_WEIGHTS_PATH,
+) -> List[Tuple[np.ndarray, np.ndarray, int, int]]:
+    layers = []
+    c_code = '#include "weights_fixed.h"\n\n'
+    header_code = f"""#pragma once
+
+#include <stdint.h>
+
+#define FIXED_ACTIVATION_SHIFT {FIXED_ACTIVATION_SHIFT}
+#define FIXED_MULTIPLIER_SHIFT {FIXED_MULTIPLIER_SHIFT}
+#define SILU_TABLE_SHIFT {SILU_TABLE_SHIFT}
+#define SILU_TABLE_SIZE {SILU_TABLE_SIZE}
+
+"""
+
+    for i, (w_name, b_name) in enumerate(zip(layer_names, bias_names)):
+        q_weights, scale, offset = quantize_int8(weights[f"layer_{i}"])
+        q_biases = np.round(
+            biases[f"layer_{i}"] * (1 << FIXED_ACTIVATION_SHIFT) / scale
+        ).astype(np.int32)
+        multiplier = fixed_multiplier(scale)
+        offset_multiplier = fixed_multiplier(offset)
+        layers.append((q_weights, q_biases, multiplier, offset_multiplier))
+
+        print(
+            f"Layer {i}: int8 scale {scale:.8f}, offset {offset:.8f}"
+            f" -> multipliers {multiplier}, {offset_multiplier}"
+        )
+
+        c_code += f"int32_t {w_name}_multiplier = {multiplier};\n"
+        c_code += f"int32_t {w_name}_offset = {offset_multiplier};\n"
+        header_code += f"extern int8_t {w_name}_i8[];\n"
+        header_code += f"extern int32_t {b_name}_i32[];\n"
+        header_code += f"extern int32_t {w_name}_multiplier, {w_name}_offset;\n"
+
+    header_code += "extern int16_t silu_table[];\n"
+
+    c_code += "\n"
+    for (q_weights, q_biases, _, _), w_name, b_name in zip(
+        layers, layer_names, bias_names
+    ):
+        c_code += format_c_array(q_weights, f"{w_name}_i8", "int8_t")
+        c_code += format_c_array(q_biases, f"{b_name}_i32", "int32_t")
+
+    c_code += format_c_array(build_silu_table(), "silu_table", "int16_t")
+
+    header_file = fixed_weights_path.parent / "weights_fixed.h"
+    with open(header_file, "w") as f:
+        f.write(header_code)
+
+    print(f"Generated fixed-point weights header written to {header_file}")
+
+    with open(fixed_weights_path, "w") as f:
+        f.write(c_code)
+
+    print(f"Generated fixed-point weights C file written to {fixed_weights_path}")
+    return layers
+
+
+def pad4(data: bytes) -> bytes:
+    return data + b"\0" * (-len(data) % 4)
+
+
+def write_weights_blob(
+    path: Path,
+    sizes: List[int],
+    quantized_weights: Dict[str, np.ndarray],
+    quantized_biases: Dict[str, np.ndarray],
+    quantization_params: Dict[str, float],
+    layer_names: List[str],
+    bias_names: List[str],
+) -> None:
+    ranges = []
+    for w_name, b_name in zip(layer_names, bias_names):
+        ranges += [
+            quantization_params[f"{w_name}_min"],
+            quantization_params[f"{w_name}_max"],
+            quantization_params[f"{b_name}_min"],
+            quantization_params[f"{b_name}_max"],
+        ]
+
+    blob = struct.pack(
+        f"<4sII{len(sizes)}I{len(ranges)}f",
+        WEIGHTS_BLOB_MAGIC,
+        WEIGHTS_BLOB_VERSION,
+        len(layer_names),
+        *sizes,
+        *ranges,
+    )
+    for w_name, b_name in zip(layer_names, bias_names):
+        blob += pad4(quantized_weights[w_name].astype(np.uint8).tobytes())
+        blob += pad4(quantized_biases[b_name].astype(np.uint8).tobytes())
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(blob)
+
+    print(f"Generated weights blob ({len(blob)} bytes) written to {path}")
+
+
 def format_c_array(array, name, dtype="float"):
     flat = array.flatten()
 
@@ -63,14 +242,24 @@ def format_c_array(array, name, dtype="float"):
     return result
 
 
-def extract_weights():
-    if not MODEL_PATH.exists():
+def extract_weights(
+    model_path: Path = MODEL_PATH,
+    weights_path: Path = WEIGHTS_PATH,
+    fixed_weights_path: Path = FIXED_WEIGHTS_PATH,
+    blob_path: Path = WEIGHTS_BLOB_PATH,
+):
+    model_path = Path(model_path)
+    weights_path = Path(weights_path)
+    fixed_weights_path = Path(fixed_weights_path)
+    blob_path = Path(blob_path)
+
+    if not model_path.exists():
         raise FileNotFoundError(
-            f"Trained model not found at {MODEL_PATH}. Please train the model first or provide a valid model file."
+            f"Trained model not found at {model_path}. Please train the model first or provide a valid model file."
         )
 
-    print(f"Loading model weights from {MODEL_PATH}")
-    state_dict = torch.load(MODEL_PATH, map_location="cpu")
+    print(f"Loading model weights from {model_path}")
+    state_dict = torch.load(model_path, map_location="cpu")
 
     hidden_sizes = infer_architecture_from_state_dict(state_dict)
     print(f"Inferred model architecture: hidden_sizes={hidden_sizes}")
@@ -152,7 +341,7 @@ extern float biases_out_min, biases_out_max;
 float dequantize(unsigned char value, float min_val, float max_val);
 """
 
-    header_file = WEIGHTS_PATH.parent / "weights.h"
+    header_file = weights_path.parent / "weights.h"
     with open(header_file, "w") as f:
         f.write(header_code)
 
@@ -183,12 +372,27 @@ float dequantize(unsigned char value, float min_val, float max_val) {
                 quantized_biases[b_name], f"{b_name}_q", "unsigned char"
             )
 
-    output_file = WEIGHTS_PATH
+    output_file = weights_path
     with open(output_file, "w") as f:
         f.write(c_code)
 
     print(f"Generated weights C file written to {output_file}")
 
+    write_weights_blob(
+        blob_path,
+        [input_size, hidden1_size, hidden2_size, hidden3_size, output_size],
+        quantized_weights,
+        quantized_biases,
+        quantization_params,
+        layer_names,
+        bias_names,
+    )
+
+    print("\nExtracting fixed-point weights:")
+    fixed_layers = extract_fixed_point_weights(
+        weights, biases, layer_names, bias_names, fixed_weights_path
+    )
+
     print("\nQuantization quality analysis:")
     total_mse = 0
     total_elements = 0
@@ -242,6 +446,7 @@ float dequantize(unsigned char value, float min_val, float max_val) {
         (1.0, 1.0, 1.0, 1.0),
     ]
 
+    silu_table = build_silu_table()
     for pitch, velocity, harmonic, time in test_inputs:
         with torch.no_grad():
             py_result = model(
@@ -251,8 +456,12 @@ float dequantize(unsigned char value, float min_val, float max_val) {
                 torch.tensor([time]),
             ).item()
 
+        fixed_result = fixed_point_forward(
+            fixed_layers, silu_table, np.array([[pitch, velocity, harmonic, time]])
+        )[0]
         print(
             f"Python model({pitch}, {velocity}, {harmonic}, {time}) = {py_result:.6f}"
+            f" (fixed-point: {fixed_result:.6f})"
         )
 
 
@@ -1,7 +1,8 @@
 from typing import Tuple, Optional
 
 import numpy as np
-from scipy.signal import stft
+
+from constants import ANALYSIS_ENGINES
 
 
 def find_window(
@@ -49,6 +50,8 @@ def get_harmonic(
         hop_size: Optional[int] = None,
         window_type: str = "hann",
 ) -> Tuple[np.ndarray, np.ndarray]:
+    from scipy.signal import stft
+
     if signal.ndim != 1:
         raise ValueError("signal must be a 1D numpy array")
     if hop_size is None:
@@ -69,3 +72,105 @@ def get_harmonic(
     amplitudes = np.abs(Zxx[bin_index, :])
 
     return times, amplitudes
+
+
+REFINE_SPAN = 0.25  # search +-REFINE_SPAN * f0 around each predicted partial
+REFINE_STEPS = 17
+REFINE_FRAMES = 16
+
+
+def frame_signal(signal: np.ndarray, window_size: int, hop_size: int) -> np.ndarray:
+    """Strided (frames, window_size) view matching scipy's stft with boundary=None, padded=False."""
+    return np.lib.stride_tricks.sliding_window_view(signal, window_size)[::hop_size]
+
+
+def dft_magnitudes(frames: np.ndarray, window: np.ndarray, freqs: np.ndarray, fs: float) -> np.ndarray:
+    """|DFT| of every frame at arbitrary frequencies, with stft's spectrum scaling. Returns (len(freqs), frames)."""
+    phase = 2.0 * np.pi * np.outer(np.arange(len(window)), freqs) / fs
+    scaled = (window / window.sum())[:, None]
+    real = frames @ (scaled * np.cos(phase)).astype(frames.dtype)
+    imag = frames @ (scaled * np.sin(phase)).astype(frames.dtype)
+    return np.hypot(real, imag).T
+
+
+def refine_frequencies(
+        frames: np.ndarray,
+        window: np.ndarray,
+        fs: float,
+        f0: float,
+        harmonics: np.ndarray,
+) -> np.ndarray:
+    """Locate each partial near h * f0, carrying the stretch of the previous partial forward (inharmonicity)."""
+    subset = frames[::max(1, len(frames) // REFINE_FRAMES)]
+    offsets = np.linspace(-REFINE_SPAN, REFINE_SPAN, REFINE_STEPS) * f0
+    step = offsets[1] - offsets[0]
+
+    freqs = harmonics * f0
+    stretch = 1.0
+    for i, harmonic in enumerate(harmonics):
+        candidates = harmonic * f0 * stretch + offsets
+        if candidates[-1] >= fs / 2:
+            break
+
+        energy = dft_magnitudes(subset, window, candidates, fs).mean(axis=1)
+        k = int(np.argmax(energy))
+        if k == 0 or k == REFINE_STEPS - 1:
+            continue
+
+        # Parabolic interpolation between grid points
+        left, peak, right = energy[k - 1:k + 2]
+        curvature = left - 2.0 * peak + right
+        offset = 0.5 * (left - right) / curvature if curvature < 0 else 0.0
+        freqs[i] = candidates[k] + offset * step
+        stretch = freqs[i] / (harmonic * f0)
+
+    return freqs
+
+
+def analyze_harmonics(
+        signal: np.ndarray,
+        fs: float,
+        window_size: int,
+        f0: float,
+        harmonic_count: int,
+        engine: str = "stft",
+        refine: bool = False,
+        hop_size: Optional[int] = None,
+        window_type: str = "hann",
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Amplitudes of harmonics 1..harmonic_count per frame. Returns (times, amplitudes[harmonic_count, frames])."""
+    from scipy.signal import get_window, stft
+
+    if signal.ndim != 1:
+        raise ValueError("signal must be a 1D numpy array")
+    if engine not in ANALYSIS_ENGINES:
+        raise ValueError(f"Unknown analysis engine: {engine}")
+    if refine and engine != "dft":
+        raise ValueError("refine needs the dft engine; the stft engine reads fixed bins")
+    if hop_size is None:
+        hop_size = max(1, window_size // 4)
+
+    harmonics = np.arange(1, harmonic_count + 1)
+
+    if engine == "stft":
+        freqs, times, Zxx = stft(
+            signal,
+            fs=fs,
+            window=window_type,
+            nperseg=window_size,
+            noverlap=window_size - hop_size,
+            boundary=None,
+            padded=False,
+        )
+        bins = np.argmin(np.abs(freqs[None, :] - (f0 * harmonics)[:, None]), axis=1)
+        return times, np.abs(Zxx[bins, :])
+
+    frames = frame_signal(signal, window_size, hop_size)
+    times = (window_size / 2 + hop_size * np.arange(len(frames))) / fs
+    window = get_window(window_type, window_size)
+
+    targets = refine_frequencies(frames, window, fs, f0, harmonics) if refine else harmonics * f0
+    amplitudes = np.zeros((harmonic_count, len(frames)), dtype=np.float32)
+    audible = targets < fs / 2  # partials at or above Nyquist cannot be measured
+    amplitudes[audible] = dft_magnitudes(frames, window, targets[audible], fs)
+    return times, amplitudes
@@ -1,47 +1,100 @@
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Tuple
+from typing import Iterable, Iterator, Optional, Tuple
 
 import numpy as np
-from pydub import AudioSegment
-from scipy.io import wavfile
 
+CHUNK_FRAMES = 1 << 16
 
-def read_mp3_mono(path: Path) -> Tuple[int, np.ndarray]:
-    if AudioSegment is None:
-        raise RuntimeError("pydub not available. Install pydub and ffmpeg to read mp3 files.")
 
-    seg = AudioSegment.from_file(str(path), format="mp3")
-    sr = seg.frame_rate
-    samples = np.array(seg.get_array_of_samples())
-    if seg.channels > 1:
-        samples = samples.reshape((-1, seg.channels))
-        samples = samples.mean(axis=1)
-    sampwidth = seg.sample_width
-    if sampwidth == 2:
-        samples = samples.astype(np.float32) / 32768.0
+def to_mono_float32(data: np.ndarray, chunk_frames: int = CHUNK_FRAMES) -> np.ndarray:
+    """Downmix and scale integer or float PCM to mono float32, one chunk at a time."""
+    if data.dtype == np.uint8:
+        offset, scale = 128.0, 1.0 / 128.0
+    elif np.issubdtype(data.dtype, np.integer):
+        offset, scale = 0.0, 1.0 / float(2 ** (8 * data.dtype.itemsize - 1))
     else:
-        maxv = float(2 ** (8 * sampwidth - 1))
-        samples = samples.astype(np.float32) / maxv
+        offset, scale = 0.0, 1.0
 
-    return sr, samples
+    mono = np.empty(data.shape[0], dtype=np.float32)
+    for start in range(0, data.shape[0], chunk_frames):
+        block = np.asarray(data[start:start + chunk_frames], dtype=np.float32)
+        if block.ndim == 2:
+            block = block.mean(axis=1)
+        if offset:
+            block -= offset
+        if scale != 1.0:
+            block *= scale
+        mono[start:start + chunk_frames] = block
+    return mono
 
 
-def read_wav_mono(path: Path) -> Tuple[int, np.ndarray]:
-    sr, data = wavfile.read(path)
-    if data.dtype == np.int16:
-        data = data.astype(np.float32) / 32768.0
-    else:
-        data = data.astype(np.float32)
-    if data.ndim == 2:
-        data = data.mean(axis=1)
-    return sr, data
+def read_mp3_mono(path: Path, max_seconds: Optional[float] = None) -> Tuple[int, np.ndarray]:
+    try:
+        from pydub import AudioSegment
+    except ImportError:
+        raise RuntimeError("pydub not available. Install pydub and ffmpeg to read mp3 files.")
+
+    # ffmpeg stops decoding after max_seconds
+    seg = AudioSegment.from_file(str(path), format="mp3", duration=max_seconds)
+    dtype = {1: np.uint8, 2: np.int16, 4: np.int32}[seg.sample_width]
+    samples = np.frombuffer(seg.raw_data, dtype=dtype).reshape((-1, seg.channels))
+
+    return seg.frame_rate, to_mono_float32(samples)
+
+
+def read_wav_mono(path: Path, max_seconds: Optional[float] = None) -> Tuple[int, np.ndarray]:
+    from scipy.io import wavfile
+
+    try:
+        sr, data = wavfile.read(path, mmap=True)
+    except ValueError:
+        # Formats numpy cannot map directly (e.g. 24-bit PCM) are read in full
+        sr, data = wavfile.read(path)
 
+    if max_seconds is not None:
+        data = data[:int(np.ceil(max_seconds * sr))]
+    return sr, to_mono_float32(data)
 
-def read_audio(path: Path) -> Tuple[int, np.ndarray]:
+
+def read_audio(path: Path, max_seconds: Optional[float] = None) -> Tuple[int, np.ndarray]:
     ext = path.suffix.lower()
     if ext == ".wav":
-        return read_wav_mono(path)
+        return read_wav_mono(path, max_seconds)
     elif ext == ".mp3":
-        return read_mp3_mono(path)
+        return read_mp3_mono(path, max_seconds)
     else:
         raise RuntimeError(f"Unsupported audio extension: {ext}")
+
+
+def _timed_read_audio(path: Path, max_seconds: Optional[float]) -> Tuple[int, np.ndarray, float]:
+    start = time.perf_counter()
+    sr, samples = read_audio(path, max_seconds)
+    return sr, samples, time.perf_counter() - start
+
+
+def prefetch_audio(
+        paths: Iterable[Path],
+        max_seconds: Optional[float] = None,
+        workers: int = 4,
+) -> Iterator[Tuple[Path, int, np.ndarray, float]]:
+    """Read audio files in a thread pool, keeping at most `workers` decoded files ahead of the consumer.
+
+    Yields (path, sample rate, samples, decode seconds)."""
+    paths = iter(paths)
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        pending = deque()
+        for path in paths:
+            pending.append((path, executor.submit(_timed_read_audio, path, max_seconds)))
+            if len(pending) >= workers:
+                break
+
+        while pending:
+            path, future = pending.popleft()
+            sr, samples, seconds = future.result()
+            next_path = next(paths, None)
+            if next_path is not None:
+                pending.append((next_path, executor.submit(_timed_read_audio, next_path, max_seconds)))
+            yield path, sr, samples, seconds
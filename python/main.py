@@ -1,11 +1,15 @@
 import argparse
 from pathlib import Path
-from typing import Tuple, Union
+from typing import TYPE_CHECKING, Optional, Tuple, Union
 
-from constants import DATASET_PATH, ARCHIVE_PATH, MODEL_PATH
-from dataset import build_archive_from_files, HarmonicsArchive
-from train import HIDDEN_SIZES, EPOCHS, BATCH_SIZE, LEARNING_RATE
-from train import train_and_save
+from constants import ANALYSIS_DURATION, ANALYSIS_ENGINES, DATASET_PATH, ARCHIVE_PATH, MODEL_PATH, SWEEP_PATH
+from constants import HIDDEN_SIZES, EPOCHS, BATCH_SIZE, LEARNING_RATE, PREFETCH_WORKERS
+from metrics import configure_metrics, emit, stage
+
+if TYPE_CHECKING:
+    from dataset import HarmonicsArchive
+
+# Subcommands import their modules on demand, so `build` and `--help` never load torch
 
 
 def parse_hidden_sizes(hidden_sizes: str) -> Tuple[int, int, int]:
@@ -18,28 +22,46 @@ def parse_hidden_sizes(hidden_sizes: str) -> Tuple[int, int, int]:
 
 def build_archive(
         dataset_path: Union[str, Path] = DATASET_PATH,
-        archive_path: Union[str, Path] = ARCHIVE_PATH
+        archive_path: Union[str, Path] = ARCHIVE_PATH,
+        analysis_duration: Optional[float] = ANALYSIS_DURATION,
+        prefetch: int = PREFETCH_WORKERS,
+        engine: str = "stft",
+        refine: bool = False
 ) -> None:
+    from dataset import build_archive_from_files
+
     dataset_path = Path(dataset_path)
     archive_path = Path(archive_path)
-    archive = build_archive_from_files(dataset_path)
+    archive = build_archive_from_files(dataset_path, analysis_duration, prefetch, engine, refine)
     archive.save(archive_path)
+    emit("archive", path=str(archive_path), notes=len(archive.notes), bytes=archive_path.stat().st_size)
 
 
 def train(
-        archive: HarmonicsArchive,
+        archive: "HarmonicsArchive",
         hidden_sizes: Tuple[int, ...] = HIDDEN_SIZES,
         epochs: int = EPOCHS,
         batch_size: int = BATCH_SIZE,
         learning_rate: float = LEARNING_RATE,
-        model_path: Union[str, Path] = MODEL_PATH
+        model_path: Union[str, Path] = MODEL_PATH,
+        workers: int = 1,
+        qat_epochs: int = 0
 ):
     model_path = Path(model_path)
-    train_and_save(archive, hidden_sizes, epochs, batch_size, learning_rate, model_path)
+    if workers > 1:
+        from distributed import train_distributed
+        train_distributed(archive, hidden_sizes, epochs, batch_size, learning_rate, model_path, workers, qat_epochs)
+    else:
+        from train import train_and_save
+        train_and_save(archive, hidden_sizes, epochs, batch_size, learning_rate, model_path, qat_epochs)
 
 
 def main():
     parser = argparse.ArgumentParser(description="Harmonic Model Training Script")
+    parser.add_argument(
+        "--metrics", type=str, default=None,
+        help="Append JSON-lines timing, throughput and memory metrics to this file"
+    )
     subparsers = parser.add_subparsers(dest="command", required=True)
 
     build_parser = subparsers.add_parser("build", help="Build the dataset archive")
@@ -51,6 +73,22 @@ def main():
         "--archive-path", type=str, default=ARCHIVE_PATH,
         help="Path to save the archive file (default: %(default)s)"
     )
+    build_parser.add_argument(
+        "--analysis-duration", type=float, default=ANALYSIS_DURATION,
+        help="Seconds of each sample to read and analyse, 0 for whole files (default: %(default)s)"
+    )
+    build_parser.add_argument(
+        "--prefetch", type=int, default=PREFETCH_WORKERS,
+        help="Number of files decoded ahead of the analysis (default: %(default)s)"
+    )
+    build_parser.add_argument(
+        "--engine", choices=ANALYSIS_ENGINES, default="stft",
+        help="Harmonic tracker: nearest STFT bin or exact-frequency DFT (default: %(default)s)"
+    )
+    build_parser.add_argument(
+        "--refine", action="store_true",
+        help="With --engine dft, search for each partial's actual (inharmonic) frequency"
+    )
 
     train_parser = subparsers.add_parser("train", help="Train the model")
     train_parser.add_argument(
@@ -77,21 +115,111 @@ def main():
         "--model-path", type=str, default=MODEL_PATH,
         help="Path to save the trained model (default: %(default)s)"
     )
+    train_parser.add_argument(
+        "--workers", type=int, default=1,
+        help="Number of data-parallel CPU training processes (default: %(default)s)"
+    )
+    train_parser.add_argument(
+        "--qat-epochs", type=int, default=0,
+        help="Train the last N epochs on uint8 fake-quantized weights, as exported to C (default: %(default)s)"
+    )
 
-    args = parser.parse_args()
+    check_parser = subparsers.add_parser("check", help="Resynthesize the archive and report extraction quality")
+    check_parser.add_argument(
+        "--archive-path", type=str, default=ARCHIVE_PATH,
+        help="Path to the archive file (default: %(default)s)"
+    )
+    check_parser.add_argument(
+        "--dataset-path", type=str, default=DATASET_PATH,
+        help="Directory with the source WAV files (default: %(default)s)"
+    )
+    check_parser.add_argument(
+        "--workers", type=int, default=None,
+        help="Number of resynthesis processes (default: all cores)"
+    )
+    check_parser.add_argument(
+        "--report", type=str, default=None,
+        help="Optional path for a JSON report with per-note results"
+    )
+
+    sweep_parser = subparsers.add_parser("sweep", help="Train several architectures and compare C inference cost")
+    sweep_parser.add_argument(
+        "--archive-path", type=str, default=ARCHIVE_PATH,
+        help="Path to the archive file (default: %(default)s)"
+    )
+    sweep_parser.add_argument(
+        "--hidden-sizes", type=parse_hidden_sizes, nargs="+",
+        default=[(8, 8, 4), (16, 16, 8), (32, 32, 16), (64, 64, 32)],
+        help="Hidden layer configurations to train, e.g. 8,8,4 16,16,8 (default: %(default)s)"
+    )
+    sweep_parser.add_argument(
+        "--epochs", type=int, default=EPOCHS,
+        help="Number of training epochs per configuration (default: %(default)s)"
+    )
+    sweep_parser.add_argument(
+        "--batch-size", type=int, default=BATCH_SIZE,
+        help="Batch size for training (default: %(default)s)"
+    )
+    sweep_parser.add_argument(
+        "--learning-rate", type=float, default=LEARNING_RATE,
+        help="Learning rate for the optimizer (default: %(default)s)"
+    )
+    sweep_parser.add_argument(
+        "--workers", type=int, default=4,
+        help="Number of configurations trained concurrently (default: %(default)s)"
+    )
+    sweep_parser.add_argument(
+        "--output-dir", type=str, default=SWEEP_PATH,
+        help="Directory for models, exported weights and the report (default: %(default)s)"
+    )
+    sweep_parser.add_argument(
+        "--qat-epochs", type=int, default=0,
+        help="Train the last N epochs of each configuration on fake-quantized weights (default: %(default)s)"
+    )
 
-    if args.command == "build":
-        build_archive(args.dataset_path, args.archive_path)
-    elif args.command == "train":
-        archive = HarmonicsArchive.load(args.archive_path)
-        train(
-            archive,
-            hidden_sizes=args.hidden_sizes,
-            epochs=args.epochs,
-            batch_size=args.batch_size,
-            learning_rate=args.learning_rate,
-            model_path=args.model_path
-        )
+    args = parser.parse_args()
+    if args.command == "build" and args.refine and args.engine != "dft":
+        parser.error("--refine needs --engine dft")
+    configure_metrics(args.metrics, command=args.command)
+
+    with stage("command"):
+        if args.command != "build":
+            from dataset import HarmonicsArchive
+
+        if args.command == "build":
+            build_archive(
+                args.dataset_path, args.archive_path, args.analysis_duration or None, args.prefetch,
+                args.engine, args.refine
+            )
+        elif args.command == "train":
+            archive = HarmonicsArchive.load(args.archive_path)
+            train(
+                archive,
+                hidden_sizes=args.hidden_sizes,
+                epochs=args.epochs,
+                batch_size=args.batch_size,
+                learning_rate=args.learning_rate,
+                model_path=args.model_path,
+                workers=args.workers,
+                qat_epochs=args.qat_epochs
+            )
+        elif args.command == "check":
+            from quality import check_archive
+            archive = HarmonicsArchive.load(args.archive_path)
+            check_archive(archive, args.dataset_path, args.workers, args.report)
+        elif args.command == "sweep":
+            from sweep import sweep_architectures
+            archive = HarmonicsArchive.load(args.archive_path)
+            sweep_architectures(
+                archive,
+                args.hidden_sizes,
+                epochs=args.epochs,
+                batch_size=args.batch_size,
+                learning_rate=args.learning_rate,
+                workers=args.workers,
+                output_dir=args.output_dir,
+                qat_epochs=args.qat_epochs
+            )
 
 
 if __name__ == "__main__":
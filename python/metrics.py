@@ -0,0 +1,89 @@
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, TextIO, Tuple, Union
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+RATE_FIELDS = ("samples", "batches")
+
+_stream: Optional[TextIO] = None
+_path: Optional[Path] = None
+_run: Dict[str, Any] = {}
+
+
+def peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    return peak / (1 << 20) if sys.platform == "darwin" else peak / 1024
+
+
+def configure_metrics(path: Optional[Union[str, Path]], **run_fields: Any) -> None:
+    """Append JSON-lines metrics to path; every record carries run_fields. None disables recording."""
+    global _stream, _path, _run
+    if _stream is not None:
+        _stream.close()
+        _stream = None
+        _path = None
+    if path is None:
+        return
+
+    _path = Path(path)
+    _path.parent.mkdir(parents=True, exist_ok=True)
+    _stream = open(_path, "a", buffering=1)
+    _run = {"run": f"{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}", **run_fields}
+
+
+def metrics_enabled() -> bool:
+    return _stream is not None
+
+
+def metrics_settings() -> Tuple[Optional[Path], Dict[str, Any]]:
+    """The path and run fields, so a spawned process can configure_metrics into the same run."""
+    return _path, dict(_run)
+
+
+def _json_value(value: Any) -> Any:
+    # NumPy and torch scalars
+    return value.item() if hasattr(value, "item") else str(value)
+
+
+def emit(event: str, **fields: Any) -> None:
+    if _stream is None:
+        return
+    record = {"event": event, "time": time.time(), **_run, **fields}
+    _stream.write(json.dumps(record, default=_json_value) + "\n")
+
+
+@contextmanager
+def stage(name: str, **fields: Any) -> Iterator[Dict[str, Any]]:
+    """Time a pipeline stage; fields added to the yielded dict are recorded with it.
+
+    Counts named in RATE_FIELDS also get a per-second rate."""
+    start = time.perf_counter()
+    extra: Dict[str, Any] = dict(fields)
+    try:
+        yield extra
+    finally:
+        seconds = time.perf_counter() - start
+        rates = {
+            f"{key}_per_sec": extra[key] / seconds
+            for key in RATE_FIELDS
+            if key in extra and seconds > 0
+        }
+        emit(
+            "stage",
+            stage=name,
+            seconds=seconds,
+            peak_rss_mb=peak_rss_mb(),
+            **extra,
+            **rates,
+        )
@@ -1,9 +1,24 @@
 import torch
 import torch.nn as nn
+import torch.nn.functional as F
 
 from constants import MAX_HARMONICS
 
 
+def fake_quantize(tensor: torch.Tensor) -> torch.Tensor:
+    """Round-trip through extract_weights.quantize_array's per-tensor uint8 min/max scheme.
+
+    Gradients pass straight through, so training sees the quantized weights the C engine will run."""
+    minimum, maximum = tensor.detach().min(), tensor.detach().max()
+    if minimum == maximum:
+        return tensor
+
+    # Same float32 operation order as quantization() and dequantization()
+    quantized = torch.clamp(torch.round((tensor.detach() - minimum) * 255.0 / (maximum - minimum)), 0, 255)
+    restored = quantized * (maximum - minimum) / 255.0 + minimum
+    return tensor + (restored - tensor).detach()
+
+
 class DirectTinyHarmonicModel(nn.Module):
     def __init__(
             self,
@@ -13,6 +28,7 @@ class DirectTinyHarmonicModel(nn.Module):
     ):
         super().__init__()
         self.num_harmonics = num_harmonics
+        self.quantize = False  # quantization-aware training: run on fake-quantized weights and biases
 
         layers = []
         input_dim = 4  # pitch, velocity, harmonic, time
@@ -43,5 +59,12 @@ class DirectTinyHarmonicModel(nn.Module):
             time = time.unsqueeze(1)
 
         x = torch.cat([pitch, velocity, harmonic, time], dim=1)  # (B, 4)
-        log_amp = self.mlp(x).squeeze(1)  # (B,)
-        return log_amp
+        if not self.quantize:
+            return self.mlp(x).squeeze(1)  # (B,)
+
+        for layer in self.mlp:
+            if isinstance(layer, nn.Linear):
+                x = F.linear(x, fake_quantize(layer.weight), fake_quantize(layer.bias))
+            else:
+                x = layer(x)
+        return x.squeeze(1)
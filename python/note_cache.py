@@ -0,0 +1,151 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Optional, Union
+
+import numpy as np
+from constants import NOTE_CACHE_BYTES, NOTE_CACHE_PATH
+
+DURATION_QUANTUM = (
+    0.01  # seconds; cached notes are rendered at durations rounded to this step
+)
+
+
+def model_fingerprint(model) -> str:
+    """Hash of a model's weights, so a retrained model never reads another model's notes."""
+    digest = hashlib.sha256()
+    for name, tensor in sorted(model.state_dict().items()):
+        digest.update(name.encode())
+        digest.update(tensor.detach().cpu().numpy().tobytes())
+    return digest.hexdigest()
+
+
+def quantize_duration(duration: float, quantum: float = DURATION_QUANTUM) -> float:
+    return max(1, round(duration / quantum)) * quantum
+
+
+class NoteCache:
+    """Content-addressed store of rendered note waveforms with a least-recently-used size cap.
+
+    Waveforms are .npy files named by the hash of everything that affects them and are read back memory-mapped.
+    Several processes may share a directory: writes are atomic renames and missing files are treated as misses.
+    """
+
+    def __init__(
+        self,
+        directory: Union[str, Path] = NOTE_CACHE_PATH,
+        max_bytes: int = NOTE_CACHE_BYTES,
+    ):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        # Oldest first; a hit touches the file so the order survives restarts
+        files = sorted(
+            self.directory.glob("*/*.npy"), key=lambda path: path.stat().st_mtime
+        )
+        self.entries: "OrderedDict[str, int]" = OrderedDict(
+            (path.stem, path.stat().st_size) for path in files
+        )
+        self.size = sum(self.entries.values())
+        with self.lock:
+            self._evict()
+
+    @staticmethod
+    def key(
+        fingerprint: str, pitch: int, velocity: int, duration: float, **settings: Any
+    ) -> str:
+        fields = {
+            "model": fingerprint,
+            "pitch": pitch,
+            "velocity": velocity,
+            "duration": round(duration, 6),
+            **settings,
+        }
+        return hashlib.sha256(json.dumps(fields, sort_keys=True).encode()).hexdigest()
+
+    def path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.npy"
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        """The cached waveform as a read-only memory map, or None."""
+        path = self.path(key)
+        try:
+            waveform = np.load(path, mmap_mode="r")
+            os.utime(path)
+        except FileNotFoundError:
+            return self._miss(key)
+        except (
+            EOFError,
+            OSError,
+            ValueError,
+        ):  # empty or truncated file: drop it and render again
+            path.unlink(missing_ok=True)
+            return self._miss(key)
+
+        with self.lock:
+            self.hits += 1
+            if key not in self.entries:  # written by another process
+                self.entries[key] = path.stat().st_size
+                self.size += self.entries[key]
+            self.entries.move_to_end(key)
+        return waveform
+
+    def _miss(self, key: str) -> None:
+        with self.lock:
+            self.misses += 1
+            self.size -= self.entries.pop(key, 0)
+        return None
+
+    def put(self, key: str, waveform: np.ndarray) -> None:
+        path = self.path(key)
+        path.parent.mkdir(exist_ok=True)
+        with tempfile.NamedTemporaryFile(
+            dir=path.parent, suffix=".tmp", delete=False
+        ) as f:
+            np.save(f, np.asarray(waveform, dtype=np.float32))
+        try:
+            os.replace(f.name, path)
+        except OSError:
+            # Windows cannot replace a file another reader has memory-mapped; it already holds this note
+            os.unlink(f.name)
+            if not path.exists():
+                raise
+
+        with self.lock:
+            self.size += path.stat().st_size - self.entries.pop(key, 0)
+            self.entries[key] = path.stat().st_size
+            self._evict()
+
+    def _evict(self) -> None:
+        for key in list(self.entries):
+            if self.size <= self.max_bytes or len(self.entries) <= 1:
+                break
+            try:
+                self.path(key).unlink()
+            except FileNotFoundError:
+                pass
+            except OSError:
+                # Memory-mapped on Windows (PermissionError); keep it for a later eviction
+                continue
+            self.size -= self.entries.pop(key)
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "entries": len(self.entries),
+                "bytes": self.size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,118 @@
+import argparse
+import json
+from pathlib import Path
+from typing import Dict, List, Optional
+
+SECTION_UNITS = {
+    "model": "calls",
+    "oscillator": "samples",
+    "alloc": "allocs",
+    "mix": "samples",
+    "normalize": "samples",
+}
+# With the estimated gain, notes are mixed inside the oscillator loop and never buffered or normalized
+FUSED_SECTIONS = ("alloc", "mix", "normalize")
+SLOWEST_NOTES = 10
+
+
+def load_profile(path: Path) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def section_rows(profile: dict) -> Dict[str, dict]:
+    total_ns = profile["total"]["ns"]
+    rows = {}
+    for name, section in profile["total"]["sections"].items():
+        rows[name] = {
+            "count": section["count"],
+            "ms": section["ns"] / 1e6,
+            "ns_per_unit": section["ns"] / section["count"]
+            if section["count"]
+            else 0.0,
+            "share": 100.0 * section["ns"] / total_ns if total_ns else 0.0,
+        }
+    return rows
+
+
+def print_summary(profile: dict, path: Path) -> None:
+    total = profile["total"]
+    print(f"{path}: {total['notes']} notes, {total['ns'] / 1e6:.1f} ms")
+    print(
+        f"{'section':<12}{'count':>14}{'unit':>9}{'ms':>11}{'ns/unit':>10}{'share':>8}"
+    )
+    rows = section_rows(profile)
+    for name, row in rows.items():
+        if row["count"] == 0 and name in FUSED_SECTIONS:
+            continue
+        print(
+            f"{name:<12}{row['count']:>14}{SECTION_UNITS.get(name, ''):>9}{row['ms']:>11.2f}"
+            f"{row['ns_per_unit']:>10.1f}{row['share']:>7.1f}%"
+        )
+    skipped = [
+        name for name in FUSED_SECTIONS if name in rows and rows[name]["count"] == 0
+    ]
+    if skipped:
+        print(
+            f"(no {', '.join(skipped)}: estimated-gain notes are mixed in the oscillator section)"
+        )
+
+    notes = sorted(profile["notes"], key=lambda note: note["ns"], reverse=True)[
+        :SLOWEST_NOTES
+    ]
+    if notes:
+        print(f"\nSlowest {len(notes)} notes:")
+        for note in notes:
+            model = note["sections"]["model"]
+            print(
+                f"  pitch {note['pitch']:>3} velocity {note['velocity']:>3} "
+                f"duration {note['duration']:6.2f} s: {note['ns'] / 1e6:8.2f} ms, {model['count']} model calls"
+            )
+
+
+def print_comparison(baseline: dict, current: dict) -> None:
+    def change(before: float, after: float) -> str:
+        return f"{100.0 * (after - before) / before:+.1f}%" if before else "n/a"
+
+    print(
+        f"\n{'section':<12}{'base ms':>11}{'ms':>11}{'change':>9}{'base ns/unit':>14}{'ns/unit':>10}"
+    )
+    base_rows = section_rows(baseline)
+    for name, row in section_rows(current).items():
+        base = base_rows.get(name)
+        if base is None or base["count"] == row["count"] == 0:
+            continue
+        print(
+            f"{name:<12}{base['ms']:>11.2f}{row['ms']:>11.2f}{change(base['ms'], row['ms']):>9}"
+            f"{base['ns_per_unit']:>14.1f}{row['ns_per_unit']:>10.1f}"
+        )
+
+    before, after = baseline["total"]["ns"], current["total"]["ns"]
+    print(
+        f"{'total':<12}{before / 1e6:>11.2f}{after / 1e6:>11.2f}{change(before, after):>9}"
+    )
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(
+        description="Summarize or compare PROFILE build reports"
+    )
+    parser.add_argument(
+        "profile", type=Path, help="Report written by a PROFILE build (profile.json)"
+    )
+    parser.add_argument(
+        "baseline",
+        type=Path,
+        nargs="?",
+        help="Optional earlier report to compare against",
+    )
+    args = parser.parse_args(argv)
+
+    current = load_profile(args.profile)
+    print_summary(current, args.profile)
+    if args.baseline:
+        print_comparison(load_profile(args.baseline), current)
+
+
+if __name__ == "__main__":
+    main()
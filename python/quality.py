@@ -0,0 +1,141 @@
+import json
+import os
+import time
+from dataclasses import asdict, dataclass
+from multiprocessing import Pool
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+from constants import DATASET_PATH
+from dataset import HarmonicsArchive, NoteHarmonics, get_pitch_and_volume_from_path
+from file import read_audio
+from synth import resynthesize_note
+
+SPECTRUM_GAIN = 2.0  # archive amplitudes use stft's spectrum scaling, where a sinusoid of amplitude A reads A / 2
+WORST_NOTES = 10
+
+
+@dataclass
+class NoteQuality:
+    pitch: int
+    volume: int
+    snr_db: float
+    source_level_db: float
+    seconds: float
+
+
+def spectral_snr_db(
+    source: np.ndarray, resynthesis: np.ndarray, window_size: int
+) -> float:
+    """Phase-independent SNR of the resynthesis, from STFT magnitudes."""
+    from scipy.signal import stft
+
+    hop_size = max(1, window_size // 4)
+    kwargs = dict(
+        nperseg=window_size,
+        noverlap=window_size - hop_size,
+        boundary=None,
+        padded=False,
+    )
+    source_magnitude = np.abs(stft(source, **kwargs)[2])
+    resynthesis_magnitude = np.abs(stft(resynthesis, **kwargs)[2])
+
+    signal = np.sum(source_magnitude**2)
+    noise = np.sum((source_magnitude - resynthesis_magnitude) ** 2)
+    return float(10.0 * np.log10(max(signal, 1e-20) / max(noise, 1e-20)))
+
+
+def _check_note(job: Tuple[NoteHarmonics, Path]) -> NoteQuality:
+    note, wav_path = job
+    start = time.perf_counter()
+
+    sample_rate, source = read_audio(wav_path, float(note.times[-1]))
+    resynthesis = resynthesize_note(note, sample_rate, gain=SPECTRUM_GAIN)
+
+    # Resynthesis starts at the centre of the first analysis frame
+    offset = int(round(note.times[0] * sample_rate))
+    source = source[offset : offset + len(resynthesis)]
+    resynthesis = resynthesis[: len(source)]
+
+    source_rms = (
+        float(np.sqrt(np.mean(source.astype(np.float64) ** 2))) if len(source) else 0.0
+    )
+    return NoteQuality(
+        pitch=note.pitch,
+        volume=note.volume,
+        snr_db=spectral_snr_db(source, resynthesis, note.window_size),
+        source_level_db=float(20.0 * np.log10(max(source_rms, 1e-10))),
+        seconds=time.perf_counter() - start,
+    )
+
+
+def print_quality_report(results: List[NoteQuality]) -> None:
+    pitches = sorted({r.pitch for r in results})
+    volumes = sorted({r.volume for r in results})
+    grid = {(r.pitch, r.volume): r.snr_db for r in results}
+
+    print("Spectral SNR (dB) per pitch / velocity:")
+    print("pitch " + "".join(f"{volume:>7}" for volume in volumes))
+    for pitch in pitches:
+        cells = (
+            f"{grid[(pitch, v)]:>7.1f}" if (pitch, v) in grid else f"{'-':>7}"
+            for v in volumes
+        )
+        print(f"{pitch:>5} " + "".join(cells))
+
+    snrs = np.array([r.snr_db for r in results])
+    print(
+        f"\n{len(results)} notes: mean {snrs.mean():.1f} dB, median {np.median(snrs):.1f} dB, "
+        f"min {snrs.min():.1f} dB"
+    )
+
+    print(f"Worst {min(WORST_NOTES, len(results))} notes:")
+    for r in sorted(results, key=lambda r: r.snr_db)[:WORST_NOTES]:
+        print(
+            f"  pitch {r.pitch:>3} velocity {r.volume:>3}: {r.snr_db:6.1f} dB (source {r.source_level_db:6.1f} dBFS)"
+        )
+
+
+def check_archive(
+    archive: HarmonicsArchive,
+    dataset_path: Union[str, Path] = DATASET_PATH,
+    workers: Optional[int] = None,
+    report_path: Optional[Union[str, Path]] = None,
+) -> List[NoteQuality]:
+    wav_paths: Dict[Tuple[int, int], Path] = {
+        get_pitch_and_volume_from_path(path): path
+        for path in sorted(Path(dataset_path).glob("*.wav"))
+    }
+    jobs = [
+        (note, wav_paths[key])
+        for key, note in sorted(archive.notes.items())
+        if key in wav_paths
+    ]
+    missing = len(archive.notes) - len(jobs)
+    if missing:
+        print(f"Warning: no source WAV for {missing} archive notes")
+    if not jobs:
+        return []
+
+    workers = min(workers or os.cpu_count() or 1, len(jobs))
+    start = time.perf_counter()
+    with Pool(workers) as pool:
+        results = pool.map(
+            _check_note, jobs, chunksize=max(1, len(jobs) // (4 * workers))
+        )
+    elapsed = time.perf_counter() - start
+
+    print_quality_report(results)
+    print(
+        f"Checked in {elapsed:.1f} s ({sum(r.seconds for r in results):.1f} s of worker time)"
+    )
+
+    if report_path is not None:
+        report_path = Path(report_path)
+        report_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(report_path, "w") as f:
+            json.dump([asdict(r) for r in results], f, indent=2)
+        print(f"Report written to {report_path}")
+
+    return results
@@ -0,0 +1,671 @@
+import argparse
+import hashlib
+import http.client
+import json
+import os
+import queue
+import socket
+import socketserver
+import struct
+import tempfile
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+from urllib.parse import urlparse
+
+import numpy as np
+from constants import (
+    FADE_IN_DURATION,
+    FADE_OUT_DURATION,
+    MASTER_GAIN,
+    MAX_HARMONICS,
+    MODEL_PATH,
+    NOTE_CACHE_BYTES,
+    SAMPLE_RATE,
+    TICKS_PER_QUARTER,
+)
+from metrics import configure_metrics, emit
+
+if TYPE_CHECKING:
+    from engine import Engine
+    from model import DirectTinyHarmonicModel
+    from note_cache import NoteCache
+
+RENDER_PORT = 8765
+CONTROL_RATE = 100.0  # model evaluations per second of note
+STREAM_CHUNK = 1 << 14  # samples per streamed WAV chunk
+LATENCY_WINDOW = 1000  # recent jobs kept for latency percentiles
+
+Note = Tuple[int, int, float, float]  # pitch, velocity, start seconds, duration seconds
+
+
+def wav_header(sample_count: int, sample_rate: int) -> bytes:
+    """Header of a mono 16-bit PCM WAV with a known length."""
+    data_size = sample_count * 2
+    return (
+        b"RIFF"
+        + struct.pack("<I", 36 + data_size)
+        + b"WAVE"
+        + b"fmt "
+        + struct.pack("<IHHIIHH", 16, 1, 1, sample_rate, sample_rate * 2, 2, 16)
+        + b"data"
+        + struct.pack("<I", data_size)
+    )
+
+
+def to_pcm16(samples: np.ndarray) -> bytes:
+    return (np.clip(samples, -1.0, 1.0) * 32767.0).astype("<i2").tobytes()
+
+
+def load_model(model_path: Union[str, Path]) -> "DirectTinyHarmonicModel":
+    import torch
+    from extract_weights import infer_architecture_from_state_dict
+    from model import DirectTinyHarmonicModel
+
+    state_dict = torch.load(model_path, map_location="cpu")
+    model = DirectTinyHarmonicModel(
+        hidden_sizes=infer_architecture_from_state_dict(state_dict)
+    )
+    model.load_state_dict(state_dict)
+    model.eval()
+    return model
+
+
+class ModelRenderer:
+    """Renders notes like the C engine: model amplitudes at a control rate, the C envelope and peak gain."""
+
+    def __init__(
+        self,
+        model,
+        sample_rate: int = SAMPLE_RATE,
+        control_rate: float = CONTROL_RATE,
+        cache: Optional["NoteCache"] = None,
+    ):
+        self.model = model
+        self.sample_rate = sample_rate
+        self.control_rate = control_rate
+        self.cache = cache
+        if cache is not None:
+            from note_cache import model_fingerprint
+
+            self.fingerprint = model_fingerprint(model)
+
+    def cache_settings(self) -> dict:
+        return {
+            "renderer": "control",
+            "sample_rate": self.sample_rate,
+            "control_rate": self.control_rate,
+        }
+
+    def duration(self, duration: float) -> float:
+        if self.cache is None:
+            return duration
+        from note_cache import quantize_duration
+
+        return quantize_duration(duration)
+
+    def note_size(self, duration: float) -> int:
+        return int((duration + FADE_OUT_DURATION) * self.sample_rate)
+
+    def render_note(self, pitch: int, velocity: int, duration: float) -> np.ndarray:
+        if self.cache is None:
+            return self._render_note(pitch, velocity, duration)
+
+        key = self.cache.key(
+            self.fingerprint, pitch, velocity, duration, **self.cache_settings()
+        )
+        waveform = self.cache.get(key)
+        if waveform is None:
+            waveform = self._render_note(pitch, velocity, duration)
+            self.cache.put(key, waveform)
+        return waveform
+
+    def _render_note(self, pitch: int, velocity: int, duration: float) -> np.ndarray:
+        import torch
+        from dataset import HarmonicData, NoteHarmonics
+        from synth import resynthesize_note
+
+        end = duration + FADE_OUT_DURATION
+        times = np.append(np.arange(0.0, end, 1.0 / self.control_rate), end)
+        envelope = np.clip(
+            np.minimum(times / FADE_IN_DURATION, (end - times) / FADE_OUT_DURATION),
+            0.0,
+            1.0,
+        )
+
+        count = len(times)
+        harmonic = np.repeat(np.arange(MAX_HARMONICS) / (MAX_HARMONICS - 1), count)
+        with torch.no_grad():
+            log_amplitudes = self.model(
+                torch.full((MAX_HARMONICS * count,), pitch / 127.0),
+                torch.full((MAX_HARMONICS * count,), velocity / 127.0),
+                torch.from_numpy(harmonic.astype(np.float32)),
+                torch.from_numpy(np.tile(times, MAX_HARMONICS).astype(np.float32)),
+            )
+        amplitudes = (
+            np.exp(log_amplitudes.numpy().reshape(MAX_HARMONICS, count)) * envelope
+        )
+
+        note = NoteHarmonics(
+            pitch,
+            velocity,
+            times,
+            0,
+            {h + 1: HarmonicData(amplitudes[h]) for h in range(MAX_HARMONICS)},
+        )
+        waveform = resynthesize_note(note, self.sample_rate)[: self.note_size(duration)]
+        peak = float(np.max(np.abs(waveform))) if len(waveform) else 0.0
+        return waveform * (MASTER_GAIN / peak) if peak > 0.0 else waveform
+
+    def stream(self, notes: Sequence[Note]) -> Iterator[bytes]:
+        """Yield a WAV header, then PCM chunks as soon as no later note can still change them."""
+        notes = sorted(
+            ((p, v, s, self.duration(d)) for p, v, s, d in notes),
+            key=lambda note: note[2],
+        )
+        starts = [int(start * self.sample_rate) for _, _, start, _ in notes]
+        total = max(
+            (start + self.note_size(note[3]) for start, note in zip(starts, notes)),
+            default=0,
+        )
+        yield wav_header(total, self.sample_rate)
+
+        mix = np.zeros(total, dtype=np.float32)
+        flushed = 0
+        for i, (pitch, velocity, _, duration) in enumerate(notes):
+            waveform = self.render_note(pitch, velocity, duration)
+            mix[starts[i] : starts[i] + len(waveform)] += waveform
+            final = starts[i + 1] if i + 1 < len(notes) else total
+            for begin in range(flushed, final, STREAM_CHUNK):
+                yield to_pcm16(mix[begin : min(begin + STREAM_CHUNK, final)])
+            flushed = max(flushed, final)
+
+
+class NativeRenderer(ModelRenderer):
+    """Renders notes with the C engine through libtinypiano. ctypes releases the GIL, so workers run in parallel."""
+
+    def __init__(
+        self,
+        engine: "Engine",
+        weights: Optional[Union[str, Path]] = None,
+        cache: Optional["NoteCache"] = None,
+    ):
+        self.engine = engine
+        self.sample_rate = engine.sample_rate
+        self.control_rate = None
+        self.cache = cache
+        if cache is not None:
+            self.fingerprint = (
+                hashlib.sha256(Path(weights).read_bytes()).hexdigest()
+                if weights
+                else "builtin"
+            )
+
+    def cache_settings(self) -> dict:
+        settings = self.engine.settings
+        return {
+            "renderer": "native",
+            "quality": settings.name.decode(),
+            "sample_rate": settings.sample_rate,
+            "fixed_point": self.engine.fixed_point,
+        }
+
+    def note_size(self, duration: float) -> int:
+        return self.engine.note_size(duration)
+
+    def _render_note(self, pitch: int, velocity: int, duration: float) -> np.ndarray:
+        return self.engine.render_note(pitch, velocity, duration)
+
+
+def notes_from_midi(data: bytes) -> List[Note]:
+    from convert_midi import midi_to_notes
+
+    with tempfile.NamedTemporaryFile(suffix=".mid", delete=False) as f:
+        f.write(data)
+    try:
+        notes, bpm, _ = midi_to_notes(f.name, verbose=False)
+    finally:
+        os.unlink(f.name)
+    unit = 60.0 / (bpm * TICKS_PER_QUARTER)
+    return [
+        (pitch, velocity, start * unit, duration * unit)
+        for pitch, velocity, start, duration in notes
+    ]
+
+
+def notes_from_json(data: bytes) -> List[Note]:
+    """{"notes": [[pitch, velocity, start, duration], ...]} in seconds, or in ticks when "bpm" is given."""
+    request = json.loads(data)
+    unit = 1.0
+    if "bpm" in request:
+        if not request["bpm"] > 0:
+            raise ValueError(f"Invalid bpm {request['bpm']}")
+        unit = 60.0 / (request["bpm"] * TICKS_PER_QUARTER)
+    notes = []
+    for pitch, velocity, start, duration in request["notes"]:
+        if not (
+            0 <= pitch <= 127 and 0 < velocity <= 127 and start >= 0 and duration > 0
+        ):
+            raise ValueError(f"Invalid note {[pitch, velocity, start, duration]}")
+        notes.append(
+            (int(pitch), int(velocity), float(start) * unit, float(duration) * unit)
+        )
+    return notes
+
+
+@dataclass
+class RenderJob:
+    notes: List[Note]
+    submitted: float = field(default_factory=time.perf_counter)
+    chunks: "queue.Queue" = field(default_factory=lambda: queue.Queue(maxsize=64))
+    cancelled: threading.Event = field(default_factory=threading.Event)
+
+
+class RenderService:
+    """A worker pool sharing one loaded model, with queue depth and latency statistics."""
+
+    def __init__(self, renderer: ModelRenderer, workers: int):
+        self.renderer = renderer
+        self.workers = workers
+        self.executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="render"
+        )
+        self.lock = threading.Lock()
+        self.queued = 0
+        self.active = 0
+        self.completed = 0
+        self.failed = 0
+        self.audio_seconds = 0.0
+        self.latencies: Dict[str, deque] = {
+            name: deque(maxlen=LATENCY_WINDOW)
+            for name in ("queue", "first_chunk", "total")
+        }
+        self.started = time.time()
+
+    def submit(self, notes: List[Note]) -> RenderJob:
+        job = RenderJob(notes)
+        with self.lock:
+            self.queued += 1
+        self.executor.submit(self._run, job)
+        return job
+
+    def _put(self, job: RenderJob, item) -> bool:
+        # The client may disconnect; stop rendering instead of blocking on a full queue
+        while not job.cancelled.is_set():
+            try:
+                job.chunks.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _run(self, job: RenderJob) -> None:
+        started = time.perf_counter()
+        with self.lock:
+            self.queued -= 1
+            self.active += 1
+        first_chunk = None
+        error = None
+        try:
+            for index, chunk in enumerate(self.renderer.stream(job.notes)):
+                if not self._put(job, chunk):
+                    error = "cancelled"
+                    break
+                if index == 1:  # first audio after the header
+                    first_chunk = time.perf_counter()
+        except Exception as e:
+            error = str(e)
+            self._put(job, e)
+        finally:
+            self._put(job, None)
+
+        finished = time.perf_counter()
+        audio_seconds = max(
+            (
+                start + duration + FADE_OUT_DURATION
+                for _, _, start, duration in job.notes
+            ),
+            default=0.0,
+        )
+        with self.lock:
+            self.active -= 1
+            if error:
+                self.failed += 1
+            else:
+                self.completed += 1
+                self.audio_seconds += audio_seconds
+            self.latencies["queue"].append(started - job.submitted)
+            self.latencies["first_chunk"].append(
+                (first_chunk or finished) - job.submitted
+            )
+            self.latencies["total"].append(finished - job.submitted)
+        emit(
+            "render_job",
+            notes=len(job.notes),
+            audio_seconds=audio_seconds,
+            error=error,
+            queue_seconds=started - job.submitted,
+            total_seconds=finished - job.submitted,
+        )
+
+    def stats(self) -> dict:
+        with self.lock:
+            latency = {
+                name: {
+                    "p50": float(np.percentile(values, 50)) if values else None,
+                    "p95": float(np.percentile(values, 95)) if values else None,
+                }
+                for name, values in self.latencies.items()
+            }
+            return {
+                "uptime_seconds": time.time() - self.started,
+                "workers": self.workers,
+                "queue_depth": self.queued,
+                "active": self.active,
+                "completed": self.completed,
+                "failed": self.failed,
+                "audio_seconds": self.audio_seconds,
+                "latency_seconds": latency,
+                "note_cache": self.renderer.cache.stats()
+                if self.renderer.cache is not None
+                else None,
+            }
+
+
+class RenderHandler(BaseHTTPRequestHandler):
+    service: RenderService
+
+    def address_string(self) -> str:
+        # Unix socket peers have no address
+        return self.client_address[0] if self.client_address else "unix"
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+    def _send_json(self, status: int, body: dict) -> None:
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self) -> None:
+        path = urlparse(self.path).path
+        if path == "/metrics":
+            self._send_json(200, self.service.stats())
+        elif path == "/health":
+            self._send_json(200, {"status": "ok"})
+        else:
+            self._send_json(404, {"error": f"Unknown path {path}"})
+
+    def do_POST(self) -> None:
+        if urlparse(self.path).path != "/render":
+            self._send_json(404, {"error": f"Unknown path {self.path}"})
+            return
+
+        data = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        content_type = (
+            self.headers.get("Content-Type", "application/json").split(";")[0].strip()
+        )
+        try:
+            notes = (
+                notes_from_json(data)
+                if content_type == "application/json"
+                else notes_from_midi(data)
+            )
+        except (ValueError, KeyError, TypeError) as e:
+            self._send_json(400, {"error": str(e)})
+            return
+
+        job = self.service.submit(notes)
+        header = job.chunks.get()
+        if isinstance(header, Exception):
+            self._send_json(500, {"error": str(header)})
+            return
+
+        data_size = struct.unpack("<I", header[40:44])[0]
+        self.send_response(200)
+        self.send_header("Content-Type", "audio/wav")
+        self.send_header("Content-Length", str(len(header) + data_size))
+        self.end_headers()
+        try:
+            self.wfile.write(header)
+            while (chunk := job.chunks.get()) is not None:
+                if isinstance(chunk, Exception):
+                    break
+                self.wfile.write(chunk)
+        except (BrokenPipeError, ConnectionResetError):
+            job.cancelled.set()
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path: str, timeout: Optional[float] = None):
+        super().__init__("localhost", timeout=timeout)
+        self.path = path
+
+    def connect(self) -> None:
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self.path)
+
+
+def serve(
+    model_path: Union[str, Path] = MODEL_PATH,
+    port: int = RENDER_PORT,
+    unix_socket: Optional[str] = None,
+    workers: int = 2,
+    sample_rate: int = SAMPLE_RATE,
+    cache_dir: Optional[Union[str, Path]] = None,
+    cache_bytes: int = NOTE_CACHE_BYTES,
+    native: bool = False,
+    weights: Optional[Union[str, Path]] = None,
+    quality: Optional[str] = None,
+) -> None:
+    start = time.perf_counter()
+    cache = None
+    if cache_dir is not None:
+        from note_cache import NoteCache
+
+        cache = NoteCache(cache_dir, cache_bytes)
+        print(
+            f"Note cache {cache_dir}: {len(cache.entries)} notes, {cache.size / 1e6:.1f} MB"
+        )
+    if native:
+        from engine import Engine
+
+        engine = Engine(weights=weights)
+        if quality:
+            engine.use_quality(quality)
+        renderer = NativeRenderer(engine, weights, cache)
+        source = f"{engine.path} ({weights or 'built-in weights'}, {engine.settings.name.decode()} quality)"
+    else:
+        renderer = ModelRenderer(load_model(model_path), sample_rate, cache=cache)
+        source = model_path
+    handler = type(
+        "Handler", (RenderHandler,), {"service": RenderService(renderer, workers)}
+    )
+    print(f"Loaded {source} in {time.perf_counter() - start:.2f} s")
+
+    if unix_socket:
+        if os.path.exists(unix_socket):
+            os.unlink(unix_socket)
+        server = UnixHTTPServer(unix_socket, handler)
+        print(f"Serving on unix socket {unix_socket} with {workers} workers")
+    else:
+        server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+        print(f"Serving on http://127.0.0.1:{port} with {workers} workers")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if unix_socket and os.path.exists(unix_socket):
+            os.unlink(unix_socket)
+
+
+def connect(port: int, unix_socket: Optional[str]) -> http.client.HTTPConnection:
+    return (
+        UnixHTTPConnection(unix_socket)
+        if unix_socket
+        else http.client.HTTPConnection("127.0.0.1", port)
+    )
+
+
+def render_remote(
+    source: Path,
+    output: Path,
+    port: int = RENDER_PORT,
+    unix_socket: Optional[str] = None,
+) -> float:
+    """Send a MIDI file or JSON note list to the daemon and save the streamed WAV. Returns seconds taken."""
+    start = time.perf_counter()
+    content_type = (
+        "application/json" if source.suffix.lower() == ".json" else "audio/midi"
+    )
+    connection = connect(port, unix_socket)
+    connection.request(
+        "POST",
+        "/render",
+        body=source.read_bytes(),
+        headers={"Content-Type": content_type},
+    )
+    response = connection.getresponse()
+    if response.status != 200:
+        raise RuntimeError(
+            f"Render failed ({response.status}): {response.read().decode()}"
+        )
+    with open(output, "wb") as f:
+        while chunk := response.read(STREAM_CHUNK):
+            f.write(chunk)
+    connection.close()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Long-running local render service with a persistent model"
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=RENDER_PORT,
+        help="Localhost HTTP port (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--socket",
+        type=str,
+        default=None,
+        help="Unix socket path instead of a TCP port",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = subparsers.add_parser(
+        "serve", help="Load the model and serve render requests"
+    )
+    serve_parser.add_argument(
+        "--model-path",
+        type=str,
+        default=MODEL_PATH,
+        help="Trained model (default: %(default)s)",
+    )
+    serve_parser.add_argument(
+        "--workers",
+        type=int,
+        default=2,
+        help="Concurrent render jobs (default: %(default)s)",
+    )
+    serve_parser.add_argument(
+        "--sample-rate",
+        type=int,
+        default=SAMPLE_RATE,
+        help="Output rate (default: %(default)s)",
+    )
+    serve_parser.add_argument(
+        "--cache-dir",
+        type=str,
+        default=None,
+        help="Reuse rendered notes from this directory",
+    )
+    serve_parser.add_argument(
+        "--cache-mb",
+        type=int,
+        default=NOTE_CACHE_BYTES >> 20,
+        help="Note cache size cap (default: %(default)s)",
+    )
+    serve_parser.add_argument(
+        "--native", action="store_true", help="Render with the C engine (libtinypiano)"
+    )
+    serve_parser.add_argument(
+        "--weights",
+        type=str,
+        default=None,
+        help="With --native, a weights blob to load",
+    )
+    serve_parser.add_argument(
+        "--quality",
+        type=str,
+        default=None,
+        help="With --native, draft, preview or final",
+    )
+    serve_parser.add_argument(
+        "--metrics",
+        type=str,
+        default=None,
+        help="Append one JSON line per job to this file",
+    )
+
+    render_parser = subparsers.add_parser(
+        "render", help="Render a MIDI file or JSON note list through the daemon"
+    )
+    render_parser.add_argument(
+        "source", type=Path, help=".mid/.midi file, or .json with a note list"
+    )
+    render_parser.add_argument(
+        "-o",
+        "--output",
+        type=Path,
+        default=None,
+        help="Output WAV (default: source.wav)",
+    )
+
+    subparsers.add_parser(
+        "metrics", help="Print the daemon's queue depth and latency statistics"
+    )
+
+    args = parser.parse_args()
+    if args.command == "serve":
+        configure_metrics(args.metrics, command="render_server")
+        serve(
+            args.model_path,
+            args.port,
+            args.socket,
+            args.workers,
+            args.sample_rate,
+            args.cache_dir,
+            args.cache_mb << 20,
+            args.native,
+            args.weights,
+            args.quality,
+        )
+    elif args.command == "render":
+        output = args.output or args.source.with_suffix(".wav")
+        seconds = render_remote(args.source, output, args.port, args.socket)
+        print(f"Wrote {output} in {seconds:.2f} s")
+    elif args.command == "metrics":
+        connection = connect(args.port, args.socket)
+        connection.request("GET", "/metrics")
+        print(json.dumps(json.loads(connection.getresponse().read()), indent=2))
+
+
+if __name__ == "__main__":
+    main()
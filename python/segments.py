@@ -0,0 +1,443 @@
+import argparse
+import hashlib
+import json
+import os
+import socket
+import struct
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from multiprocessing import get_context
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from engine import NOTE_DTYPE, Engine, notes_array
+from render_server import STREAM_CHUNK, to_pcm16, wav_header
+
+JOB_FILE = "job.json"
+NOTES_FILE = "notes.npy"
+JOB_VERSION = 1
+SEGMENT_SECONDS = 10.0
+CLAIM_TIMEOUT = (
+    600.0  # seconds before another worker may take over an unfinished segment
+)
+SONG_FILE_HEADER = struct.Struct("<4sIIIHH")  # SongFileHeader in src/song_file.h
+
+
+def load_song_notes(path: Union[str, Path]) -> Tuple[np.ndarray, int]:
+    """Note records and tempo from a MIDI file or a binary song file (convert_midi.py -o song.bin)."""
+    path = Path(path)
+    if path.suffix.lower() in (".mid", ".midi"):
+        from convert_midi import midi_to_notes
+
+        notes, bpm, _ = midi_to_notes(str(path), verbose=False)
+        return notes_array(notes), bpm
+
+    data = path.read_bytes()
+    magic, _, note_count, _, bpm, _ = SONG_FILE_HEADER.unpack_from(data)
+    if magic != b"TPSG":
+        raise ValueError(f"{path} is neither a MIDI file nor a song file")
+    notes = np.frombuffer(
+        data, dtype=NOTE_DTYPE, count=note_count, offset=SONG_FILE_HEADER.size
+    )
+    return notes.copy(), bpm
+
+
+def sha256_file(path: Union[str, Path]) -> str:
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+
+
+@dataclass
+class SegmentJob:
+    """A song split into time segments in a directory every worker can reach."""
+
+    directory: str
+    bpm: int
+    quality: str
+    sample_rate: int
+    size: int  # samples in the whole song
+    segment_samples: int
+    notes_sha256: str
+    weights: Optional[str] = None
+    weights_sha256: Optional[str] = None
+    version: int = JOB_VERSION
+
+    @property
+    def segment_count(self) -> int:
+        return max(1, -(-self.size // self.segment_samples))
+
+    def segment_range(self, index: int) -> Tuple[int, int]:
+        first = index * self.segment_samples
+        return first, min(first + self.segment_samples, self.size)
+
+    @property
+    def plan_id(self) -> str:
+        """Hash of everything that determines the segments' samples; part of every segment file name."""
+        fields = asdict(self)
+        fields.pop("directory")
+        fields.pop(
+            "weights"
+        )  # the same weights may sit at different paths; weights_sha256 identifies them
+        return hashlib.sha256(json.dumps(fields, sort_keys=True).encode()).hexdigest()[
+            :16
+        ]
+
+    def segment_path(self, index: int) -> Path:
+        return Path(self.directory) / f"segment_{self.plan_id}_{index:05d}.npy"
+
+    def claim_path(self, index: int) -> Path:
+        return Path(self.directory) / f"segment_{self.plan_id}_{index:05d}.claim"
+
+    def notes(self) -> np.ndarray:
+        return np.load(Path(self.directory) / NOTES_FILE)
+
+    def save(self) -> None:
+        fields = asdict(self)
+        fields.pop("directory")
+        with open(Path(self.directory) / JOB_FILE, "w") as f:
+            json.dump(fields, f, indent=2)
+
+    @classmethod
+    def load(cls, directory: Union[str, Path]) -> "SegmentJob":
+        with open(Path(directory) / JOB_FILE) as f:
+            fields = json.load(f)
+        if fields.get("version") != JOB_VERSION:
+            raise ValueError(
+                f"{directory} holds a version {fields.get('version')} job, expected {JOB_VERSION}"
+            )
+        return cls(directory=str(directory), **fields)
+
+
+def open_engine(
+    library: Optional[Union[str, Path]],
+    weights: Optional[Union[str, Path]],
+    quality: Optional[str],
+) -> Engine:
+    engine = Engine(library, weights)
+    if quality:
+        engine.use_quality(quality)
+    return engine
+
+
+def plan_job(
+    notes: np.ndarray,
+    bpm: int,
+    directory: Union[str, Path],
+    segment_seconds: float = SEGMENT_SECONDS,
+    quality: Optional[str] = None,
+    weights: Optional[Union[str, Path]] = None,
+    library: Optional[Union[str, Path]] = None,
+) -> SegmentJob:
+    """Write the notes and the segment plan, and delete segments and claims of any other plan.
+
+    Re-planning the same song with the same settings keeps its finished segments.
+    Weights must be at the same path on every host.
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    engine = open_engine(library, weights, quality)
+    notes = np.ascontiguousarray(notes, dtype=NOTE_DTYPE)
+    np.save(directory / NOTES_FILE, notes)
+
+    job = SegmentJob(
+        directory=str(directory),
+        bpm=bpm,
+        quality=engine.settings.name.decode(),
+        sample_rate=engine.sample_rate,
+        size=engine.song_size(notes, bpm),
+        segment_samples=max(1, int(segment_seconds * engine.sample_rate)),
+        notes_sha256=hashlib.sha256(notes.tobytes()).hexdigest(),
+        weights=str(Path(weights).resolve()) if weights else None,
+        weights_sha256=sha256_file(weights) if weights else None,
+    )
+    job.save()
+
+    # Segments of an earlier plan in this directory would otherwise look finished
+    for path in directory.glob("segment_*"):
+        if not path.name.startswith(f"segment_{job.plan_id}_"):
+            path.unlink(missing_ok=True)
+    return job
+
+
+def claim_segment(job: SegmentJob, index: int, timeout: float = CLAIM_TIMEOUT) -> bool:
+    """Take a segment by creating its claim file, or by replacing a claim older than timeout.
+
+    Two workers can both take over the same stale claim. That only costs time: segments
+    render deterministically and are published with an atomic rename.
+    """
+    path = job.claim_path(index)
+    owner = f"{socket.gethostname()}:{os.getpid()}".encode()
+    try:
+        fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        try:
+            if time.time() - path.stat().st_mtime < timeout:
+                return False
+        except FileNotFoundError:
+            pass
+        temporary = path.with_suffix(f".{os.getpid()}.tmp")
+        temporary.write_bytes(owner)
+        os.replace(temporary, path)
+        return True
+    with os.fdopen(fd, "wb") as f:
+        f.write(owner)
+    return True
+
+
+def render_segments(
+    directory: Union[str, Path],
+    indices: Optional[Sequence[int]] = None,
+    library: Optional[Union[str, Path]] = None,
+    claim_timeout: float = CLAIM_TIMEOUT,
+) -> List[int]:
+    """Render every unfinished, unclaimed segment (or just indices). Returns the segments rendered here."""
+    job = SegmentJob.load(directory)
+    if job.weights and sha256_file(job.weights) != job.weights_sha256:
+        raise ValueError(
+            f"{job.weights} differs from the weights the job was planned with"
+        )
+    engine = open_engine(library, job.weights, job.quality)
+    notes = job.notes()
+    if hashlib.sha256(notes.tobytes()).hexdigest() != job.notes_sha256:
+        raise ValueError(
+            f"{Path(directory) / NOTES_FILE} differs from the planned song"
+        )
+    if (
+        engine.sample_rate != job.sample_rate
+        or engine.song_size(notes, job.bpm) != job.size
+    ):
+        raise ValueError(
+            f"{engine.path} renders this song at different settings than the plan"
+        )
+
+    rendered = []
+    for index in indices if indices is not None else range(job.segment_count):
+        path = job.segment_path(index)
+        if path.exists() or not claim_segment(job, index, claim_timeout):
+            continue
+        first, last = job.segment_range(index)
+        samples = engine.render_song_range(notes, job.bpm, first, last)
+        temporary = path.with_suffix(f".{socket.gethostname()}.{os.getpid()}.tmp")
+        with open(temporary, "wb") as f:
+            np.save(f, samples)
+        os.replace(temporary, path)
+        job.claim_path(index).unlink(missing_ok=True)
+        rendered.append(index)
+    return rendered
+
+
+def missing_segments(job: SegmentJob) -> List[int]:
+    return [
+        index
+        for index in range(job.segment_count)
+        if not job.segment_path(index).exists()
+    ]
+
+
+def stitch(
+    directory: Union[str, Path], output: Optional[Union[str, Path]] = None
+) -> Tuple[np.ndarray, str]:
+    """Concatenate the segments in order and optionally write a 16-bit WAV.
+
+    Segments hold disjoint sample ranges, so the song is the same bytes whoever rendered
+    each part. Returns the samples and the SHA-256 of their float32 bytes.
+    """
+    job = SegmentJob.load(directory)
+    missing = missing_segments(job)
+    if missing:
+        raise RuntimeError(
+            f"{len(missing)} segment(s) not rendered yet, first {missing[0]}"
+        )
+
+    song = np.empty(job.size, dtype=np.float32)
+    for index in range(job.segment_count):
+        first, last = job.segment_range(index)
+        segment = np.load(job.segment_path(index), mmap_mode="r")
+        if len(segment) != last - first:
+            raise RuntimeError(
+                f"{job.segment_path(index)} holds {len(segment)} samples, expected {last - first}"
+            )
+        song[first:last] = segment
+
+    if output is not None:
+        with open(output, "wb") as f:
+            f.write(wav_header(len(song), job.sample_rate))
+            for start in range(0, len(song), STREAM_CHUNK):
+                f.write(to_pcm16(song[start : start + STREAM_CHUNK]))
+    return song, hashlib.sha256(song.tobytes()).hexdigest()
+
+
+def _work(task: Tuple[str, Optional[str]]) -> List[int]:
+    directory, library = task
+    return render_segments(directory, library=library)
+
+
+def render_local(
+    directory: Union[str, Path],
+    processes: int,
+    library: Optional[Union[str, Path]] = None,
+) -> List[List[int]]:
+    """Run processes workers on one machine; they share the job directory like farm hosts."""
+    context = get_context("spawn")
+    with context.Pool(processes) as pool:
+        return pool.map(
+            _work, [(str(directory), str(library) if library else None)] * processes
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Render a song as independent time segments across processes or hosts and stitch them"
+    )
+    parser.add_argument(
+        "--library",
+        type=Path,
+        default=None,
+        help="libtinypiano to render with (default: build/)",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    def add_plan_arguments(subparser: argparse.ArgumentParser) -> None:
+        subparser.add_argument(
+            "song", type=Path, help=".mid/.midi file or binary song file"
+        )
+        subparser.add_argument(
+            "--segment-seconds",
+            type=float,
+            default=SEGMENT_SECONDS,
+            help="Audio per segment (default: %(default)s)",
+        )
+        subparser.add_argument(
+            "--quality", type=str, default=None, help="draft, preview or final"
+        )
+        subparser.add_argument(
+            "--weights",
+            type=Path,
+            default=None,
+            help="Weights blob, at the same path on every host (default: built-in)",
+        )
+
+    plan_parser = subparsers.add_parser(
+        "plan", help="Split a song into segments in a shared job directory"
+    )
+    plan_parser.add_argument("job_dir", type=Path)
+    add_plan_arguments(plan_parser)
+
+    work_parser = subparsers.add_parser(
+        "work", help="Render unclaimed segments of a job; run one per core or host"
+    )
+    work_parser.add_argument("job_dir", type=Path)
+    work_parser.add_argument(
+        "--segments",
+        type=int,
+        nargs="+",
+        default=None,
+        help="Only these segment indices",
+    )
+    work_parser.add_argument(
+        "--claim-timeout",
+        type=float,
+        default=CLAIM_TIMEOUT,
+        help="Seconds before a claimed segment may be taken over (default: %(default)s)",
+    )
+
+    stitch_parser = subparsers.add_parser(
+        "stitch", help="Assemble rendered segments into a WAV"
+    )
+    stitch_parser.add_argument("job_dir", type=Path)
+    stitch_parser.add_argument("-o", "--output", type=Path, required=True)
+
+    render_parser = subparsers.add_parser(
+        "render", help="Plan, render with local processes and stitch"
+    )
+    add_plan_arguments(render_parser)
+    render_parser.add_argument(
+        "-o", "--output", type=Path, default=None, help="Output WAV (default: song.wav)"
+    )
+    render_parser.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    render_parser.add_argument(
+        "--job-dir",
+        type=Path,
+        default=None,
+        help="Keep the job here (default: temporary)",
+    )
+    render_parser.add_argument(
+        "--check",
+        action="store_true",
+        help="Also render in one piece and require identical samples",
+    )
+
+    args = parser.parse_args()
+    if args.command == "plan":
+        notes, bpm = load_song_notes(args.song)
+        job = plan_job(
+            notes,
+            bpm,
+            args.job_dir,
+            args.segment_seconds,
+            args.quality,
+            args.weights,
+            args.library,
+        )
+        print(
+            f"Planned {job.segment_count} segments of {args.segment_seconds:g} s "
+            f"({len(notes)} notes, {job.size / job.sample_rate:.1f} s, {job.quality} quality) in {args.job_dir}"
+        )
+        print(
+            f"Run on each host or core: python python/segments.py work {args.job_dir}"
+        )
+    elif args.command == "work":
+        start = time.perf_counter()
+        rendered = render_segments(
+            args.job_dir, args.segments, args.library, args.claim_timeout
+        )
+        missing = missing_segments(SegmentJob.load(args.job_dir))
+        print(
+            f"Rendered {len(rendered)} segment(s) in {time.perf_counter() - start:.2f} s, "
+            f"{len(missing)} still missing"
+        )
+    elif args.command == "stitch":
+        song, digest = stitch(args.job_dir, args.output)
+        print(f"Wrote {args.output}: {len(song)} samples, sha256 {digest}")
+    elif args.command == "render":
+        notes, bpm = load_song_notes(args.song)
+        output = args.output or args.song.with_suffix(".wav")
+        with tempfile.TemporaryDirectory(prefix="tinypiano_segments_") as temporary:
+            directory = args.job_dir or Path(temporary)
+            start = time.perf_counter()
+            job = plan_job(
+                notes,
+                bpm,
+                directory,
+                args.segment_seconds,
+                args.quality,
+                args.weights,
+                args.library,
+            )
+            counts = [
+                len(rendered)
+                for rendered in render_local(directory, args.processes, args.library)
+            ]
+            song, digest = stitch(directory, output)
+            seconds = time.perf_counter() - start
+        print(
+            f"Wrote {output}: {job.segment_count} segments on {args.processes} processes {counts} "
+            f"in {seconds:.2f} s, sha256 {digest}"
+        )
+
+        if args.check:
+            engine = open_engine(args.library, args.weights, args.quality)
+            start = time.perf_counter()
+            reference = engine.render_song(notes, bpm)
+            seconds = time.perf_counter() - start
+            same = np.array_equal(reference, song)
+            print(
+                f"Single render in {seconds:.2f} s: {'identical' if same else 'DIFFERENT'}"
+            )
+            if not same:
+                raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
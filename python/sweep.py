@@ -0,0 +1,249 @@
+import json
+import os
+import subprocess
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple, Union
+
+import torch
+import torch.multiprocessing as mp
+from constants import SWEEP_PATH
+from dataset import HarmonicsArchive
+from engine import ROOT
+from extract_weights import extract_weights, quantize_state_dict
+from model import DirectTinyHarmonicModel
+from torch import Tensor
+from torch.utils.data import DataLoader, TensorDataset
+from train import BATCH_SIZE, EPOCHS, LEARNING_RATE, build_training_tensors, train_model
+
+MAX_LAYER_SIZE = 64  # MAX_LAYER_SIZE in src/model.h
+BENCH_ITERATIONS = 200000
+EVAL_BATCH_SIZE = 65536
+
+_shared_tensors: Optional[Tuple[Tensor, ...]] = None
+
+
+@dataclass
+class SweepResult:
+    hidden_sizes: Tuple[int, ...]
+    parameters: int
+    rmse: float
+    quantized_rmse: float
+    ns_per_call: float = float("nan")
+    model_path: str = ""
+    blob_path: str = ""
+    pareto: bool = False
+
+
+def configuration_name(hidden_sizes: Sequence[int]) -> str:
+    return "tiny_" + "_".join(map(str, hidden_sizes))
+
+
+def count_parameters(model: torch.nn.Module) -> int:
+    return sum(p.numel() for p in model.parameters())
+
+
+def evaluate_rmse(model: DirectTinyHarmonicModel, tensors: Tuple[Tensor, ...]) -> float:
+    pitch, velocity, harmonic, time, target = tensors
+    model.eval()
+    squared_error = 0.0
+    with torch.no_grad():
+        for start in range(0, len(target), EVAL_BATCH_SIZE):
+            batch = slice(start, start + EVAL_BATCH_SIZE)
+            prediction = model(
+                pitch[batch], velocity[batch], harmonic[batch], time[batch]
+            )
+            squared_error += torch.sum((prediction - target[batch]) ** 2).item()
+    return (squared_error / max(1, len(target))) ** 0.5
+
+
+def _init_worker(tensors: Tuple[Tensor, ...], threads: int) -> None:
+    global _shared_tensors
+    _shared_tensors = tensors
+    torch.set_num_threads(threads)
+
+
+def _train_configuration(
+    task: Tuple[Tuple[int, ...], int, int, float, str, int]
+) -> SweepResult:
+    hidden_sizes, epochs, batch_size, learning_rate, model_path, qat_epochs = task
+    loader = DataLoader(
+        TensorDataset(*_shared_tensors), batch_size=batch_size, shuffle=True
+    )
+
+    model = DirectTinyHarmonicModel(hidden_sizes=hidden_sizes)
+    optimizer = torch.optim.Adam(model.parameters(), lr=learning_rate)
+    train_model(
+        model,
+        loader,
+        torch.nn.MSELoss(),
+        optimizer,
+        torch.device("cpu"),
+        epochs,
+        progress=False,
+        qat_epochs=qat_epochs,
+    )
+    model.quantize = False
+    torch.save(model.state_dict(), model_path)
+
+    rmse = evaluate_rmse(model, _shared_tensors)
+    model.load_state_dict(quantize_state_dict(model.state_dict()))
+    quantized_rmse = evaluate_rmse(model, _shared_tensors)
+
+    print(
+        f"Trained {hidden_sizes}: RMSE {rmse:.4f}, quantized RMSE {quantized_rmse:.4f}"
+    )
+    return SweepResult(
+        hidden_sizes=tuple(hidden_sizes),
+        parameters=count_parameters(model),
+        rmse=rmse,
+        quantized_rmse=quantized_rmse,
+        model_path=str(model_path),
+    )
+
+
+def build_benchmark(output_dir: Path) -> Path:
+    """Configure and build the bench_model CMake target in a build tree under output_dir."""
+    build = output_dir / "build"
+    commands = [
+        [
+            "cmake",
+            "-S",
+            str(ROOT),
+            "-B",
+            str(build),
+            "-DCMAKE_BUILD_TYPE=Release",
+            f"-DCMAKE_LIBRARY_OUTPUT_DIRECTORY={build / 'lib'}",
+            f"-DCMAKE_RUNTIME_OUTPUT_DIRECTORY={build / 'bin'}",
+            f"-DCMAKE_ARCHIVE_OUTPUT_DIRECTORY={build / 'lib'}",
+        ],
+        ["cmake", "--build", str(build), "--target", "bench_model"],
+    ]
+    for command in commands:
+        result = subprocess.run(command, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(
+                f"Could not build the C benchmark:\n{result.stdout}{result.stderr}"
+            )
+    executables = sorted((build / "bin").glob("bench_model*"))
+    if not executables:
+        raise RuntimeError(f"bench_model was not built in {build / 'bin'}")
+    return executables[0]
+
+
+def measure_inference_cost(
+    benchmark: Path, blob_path: Path, iterations: int = BENCH_ITERATIONS
+) -> float:
+    result = subprocess.run(
+        [str(benchmark), str(blob_path), str(iterations)],
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(
+            f"C benchmark failed for {blob_path}: {result.stderr.strip()}"
+        )
+
+    for line in result.stdout.splitlines():
+        if line.startswith("ns/call:"):
+            return float(line.split(":")[1])
+    raise RuntimeError(f"Unexpected C benchmark output:\n{result.stdout}")
+
+
+def mark_pareto_front(results: List[SweepResult]) -> None:
+    for result in results:
+        result.pareto = not any(
+            other.quantized_rmse <= result.quantized_rmse
+            and other.ns_per_call <= result.ns_per_call
+            and (
+                other.quantized_rmse < result.quantized_rmse
+                or other.ns_per_call < result.ns_per_call
+            )
+            for other in results
+        )
+
+
+def print_report(results: List[SweepResult]) -> None:
+    print(
+        f"\n{'hidden sizes':<16}{'params':>8}{'RMSE':>10}{'q-RMSE':>10}{'ns/call':>10}  pareto"
+    )
+    for result in sorted(results, key=lambda r: r.ns_per_call):
+        sizes = ",".join(map(str, result.hidden_sizes))
+        marker = "*" if result.pareto else ""
+        print(
+            f"{sizes:<16}{result.parameters:>8}{result.rmse:>10.4f}"
+            f"{result.quantized_rmse:>10.4f}{result.ns_per_call:>10.1f}  {marker}"
+        )
+
+
+def sweep_architectures(
+    archive: HarmonicsArchive,
+    configurations: Sequence[Tuple[int, ...]],
+    epochs: int = EPOCHS,
+    batch_size: int = BATCH_SIZE,
+    learning_rate: float = LEARNING_RATE,
+    workers: int = 4,
+    output_dir: Union[str, Path] = SWEEP_PATH,
+    qat_epochs: int = 0,
+) -> List[SweepResult]:
+    for hidden_sizes in configurations:
+        if max(hidden_sizes) > MAX_LAYER_SIZE:
+            raise ValueError(
+                f"Hidden sizes {hidden_sizes} exceed the C engine limit of {MAX_LAYER_SIZE}"
+            )
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    # One flattened dataset, moved to shared memory and mapped read-only by every worker
+    tensors = build_training_tensors(archive)
+    for tensor in tensors:
+        tensor.share_memory_()
+
+    workers = max(1, min(workers, len(configurations)))
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    tasks = [
+        (
+            tuple(h),
+            epochs,
+            batch_size,
+            learning_rate,
+            str(output_dir / f"{configuration_name(h)}.pth"),
+            qat_epochs,
+        )
+        for h in configurations
+    ]
+
+    print(
+        f"Training {len(tasks)} configurations on {workers} workers ({threads} threads each)"
+    )
+    context = mp.get_context("spawn")
+    with context.Pool(
+        workers, initializer=_init_worker, initargs=(tensors, threads)
+    ) as pool:
+        results = pool.map(_train_configuration, tasks)
+
+    # Export and benchmark sequentially so timings do not compete for cores
+    benchmark = build_benchmark(output_dir)
+    for result in results:
+        export_dir = output_dir / configuration_name(result.hidden_sizes)
+        export_dir.mkdir(parents=True, exist_ok=True)
+        blob_path = export_dir / "tiny.bin"
+        extract_weights(
+            model_path=result.model_path,
+            weights_path=export_dir / "weights.c",
+            fixed_weights_path=export_dir / "weights_fixed.c",
+            blob_path=blob_path,
+        )
+        result.blob_path = str(blob_path)
+        result.ns_per_call = measure_inference_cost(benchmark, blob_path)
+
+    mark_pareto_front(results)
+    print_report(results)
+
+    report_path = output_dir / "sweep.json"
+    with open(report_path, "w") as f:
+        json.dump([asdict(result) for result in results], f, indent=2)
+    print(f"\nSweep report written to {report_path}")
+
+    return results
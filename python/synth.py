@@ -1,34 +1,65 @@
+from typing import TYPE_CHECKING, Optional
+
 import numpy as np
-import torch
 from constants import MAX_HARMONICS, SAMPLE_RATE
 from dataset import NoteHarmonics
-from IPython.display import Audio
 from notes import calculate_frequency
 
+if TYPE_CHECKING:
+    import torch
+    from IPython.display import Audio
+    from note_cache import NoteCache
+
+
+RESYNTHESIS_CHUNK = 1 << 15  # samples per oscillator-bank block
+
 
 def resynthesize_note(
-    note: NoteHarmonics, sample_rate: int = SAMPLE_RATE
+    note: NoteHarmonics, sample_rate: int = SAMPLE_RATE, gain: float = 1.0
 ) -> np.ndarray:
     times = note.times  # shape (T_fft,), times of FFT windows in seconds
     duration = times[-1] - times[0]
     total_samples = int(np.ceil(duration * sample_rate))
+    if total_samples == 0:
+        return np.zeros(0, dtype=np.float32)
 
     full_time = np.linspace(times[0], times[-1], total_samples, endpoint=False)
 
-    pitch = note.pitch
-    base_freq = calculate_frequency(pitch)
+    base_freq = calculate_frequency(note.pitch)
+
+    # Partials at or above Nyquist would only alias
+    harmonics = np.array(
+        [h for h in sorted(note.harmonics) if base_freq * h < sample_rate / 2]
+    )
+    if len(harmonics) == 0:
+        return np.zeros(total_samples, dtype=np.float32)
+    freqs = base_freq * harmonics
+    amps = gain * np.stack([note.harmonics[h].amplitudes for h in harmonics]).astype(
+        np.float32
+    )  # (H, T_fft)
 
-    waveform = np.zeros(total_samples, dtype=np.float32)
+    # Interpolation weights are shared by every harmonic
+    upper = np.clip(np.searchsorted(times, full_time, side="right"), 1, len(times) - 1)
+    lower = upper - 1
+    weight = ((full_time - times[lower]) / (times[upper] - times[lower])).astype(
+        np.float32
+    )
 
-    for h, harmonic_data in note.harmonics.items():
-        freq = base_freq * h
-        amps = harmonic_data.amplitudes  # shape (T_fft,)
+    waveform = np.empty(total_samples, dtype=np.float32)
+    for start in range(0, total_samples, RESYNTHESIS_CHUNK):
+        block = slice(start, start + RESYNTHESIS_CHUNK)
+        envelopes = amps[:, lower[block]]
+        envelopes += (amps[:, upper[block]] - envelopes) * weight[block]
 
-        amps_interp = np.interp(full_time, times, amps)
-        sinusoid = np.sin(2 * np.pi * freq * full_time)
-        waveform += amps_interp * sinusoid.astype(np.float32)
+        # Reduce phase to [0, 1) cycles in float64, then evaluate sin in (SIMD) float32
+        cycles = np.outer(freqs, full_time[block])
+        cycles -= np.floor(cycles)
+        oscillators = (2 * np.pi * cycles).astype(np.float32)
+        np.sin(oscillators, out=oscillators)
 
-    return waveform.astype(np.float32)
+        waveform[block] = np.einsum("ht,ht->t", envelopes, oscillators)
+
+    return waveform
 
 
 def synthesize_note(
@@ -38,8 +69,55 @@ def synthesize_note(
     duration: float,
     sample_rate: int = SAMPLE_RATE,
     max_harmonics: int = MAX_HARMONICS,
-    device: torch.device = torch.device("cpu"),
+    device: Optional["torch.device"] = None,
+    cache: Optional["NoteCache"] = None,
+    fingerprint: Optional[str] = None,
+) -> np.ndarray:
+    """Render one note from the model. With a cache the duration is quantized, and a repeated
+    note is returned as a read-only memory map instead of being rendered again.
+
+    The cache key needs a hash of every weight, so callers rendering many notes should compute
+    model_fingerprint(model) once and pass it as fingerprint."""
+    if cache is None:
+        return _synthesize_note(
+            model, pitch, velocity, duration, sample_rate, max_harmonics, device
+        )
+
+    from note_cache import model_fingerprint, quantize_duration
+
+    if fingerprint is None:
+        fingerprint = model_fingerprint(model)
+    duration = quantize_duration(duration)
+    key = cache.key(
+        fingerprint,
+        pitch,
+        velocity,
+        duration,
+        renderer="synthesize_note",
+        sample_rate=sample_rate,
+        max_harmonics=max_harmonics,
+    )
+    waveform = cache.get(key)
+    if waveform is None:
+        waveform = _synthesize_note(
+            model, pitch, velocity, duration, sample_rate, max_harmonics, device
+        )
+        cache.put(key, waveform)
+    return waveform
+
+
+def _synthesize_note(
+    model,
+    pitch: int,
+    velocity: int,
+    duration: float,
+    sample_rate: int,
+    max_harmonics: int,
+    device: Optional["torch.device"],
 ) -> np.ndarray:
+    import torch
+
+    device = torch.device("cpu") if device is None else device
     model.eval()
     with torch.no_grad():
         N = int(duration * sample_rate)
@@ -75,5 +153,7 @@ def synthesize_note(
 
 def play_waveform(
     waveform: np.ndarray, sample_rate: int = SAMPLE_RATE, autoplay: bool = False
-) -> Audio:
+) -> "Audio":
+    from IPython.display import Audio
+
     return Audio(waveform, rate=sample_rate, autoplay=autoplay)
@@ -1,18 +1,33 @@
+import numpy as np
+import pytest
 import torch
-import subprocess
-import tempfile
-import os
 
+from engine import ROOT, Engine
 from model import DirectTinyHarmonicModel
 from constants import MODEL_PATH
+from extract_weights import infer_architecture_from_state_dict, quantize_state_dict
+
+# Inference modes: (name, use the fixed-point path, max |log amplitude| difference)
+MODES = [
+    ("float", False, 1e-5),
+    ("fixed-point", True, 0.2),
+]
+RANDOM_POINTS = 10000
+
 
 def test_consistency():
-    model = DirectTinyHarmonicModel(hidden_sizes=(8, 8, 4))
-    if MODEL_PATH.exists():
-        state_dict = torch.load(MODEL_PATH, map_location='cpu')
-        model.load_state_dict(state_dict)
+    # The compiled-in C weights are exported from the trained model, so there is nothing to compare without it
+    model_path = ROOT / MODEL_PATH
+    if not model_path.exists():
+        pytest.skip(f"{model_path} not found; train a model and run extract_weights.py first")
+    state_dict = torch.load(model_path, map_location='cpu')
+    model = DirectTinyHarmonicModel(hidden_sizes=infer_architecture_from_state_dict(state_dict))
+    model.load_state_dict(quantize_state_dict(state_dict))  # the uint8 weights compiled into weights.c
     model.eval()
 
+    # The library's float path runs the compiled-in weights, like the throwaway programs this replaced
+    engine = Engine()
+
     # Test cases
     test_cases = [
         (0.5, 0.8, 0.1, 0.3),
@@ -21,62 +36,38 @@ def test_consistency():
         (0.25, 0.6, 0.5, 0.8),
         (0.75, 0.9, 0.3, 0.1),
     ]
+    random_cases = np.random.default_rng(0).random((RANDOM_POINTS, 4), dtype=np.float32)
 
-    print("Testing Python vs C model consistency:")
-    print("=" * 60)
-
-    for i, (pitch, velocity, harmonic, time) in enumerate(test_cases):
-        with torch.no_grad():
-            py_result = model(
-                torch.tensor([pitch]),
-                torch.tensor([velocity]),
-                torch.tensor([harmonic]),
-                torch.tensor([time])
-            ).item()
+    for mode, fixed, tolerance in MODES:
+        if not fixed and engine.fixed_point:
+            print(f"Skipping {mode}: {engine.path} was built with FIXED_POINT\n")
+            continue
 
-        c_test_code = f'''
-#include <stdio.h>
-#include <math.h>
-#include "src/model.h"
+        print(f"Testing Python vs C model consistency ({mode}):")
+        print("=" * 60)
 
-int main() {{
-    float result = predict_amplitude({pitch}f, {velocity}f, {harmonic}f, {time}f);
-    printf("%.6f\\n", result);
-    return 0;
-}}
-'''
-
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.c', delete=False) as f:
-            f.write(c_test_code)
-            temp_c_file = f.name
-
-        try:
-            temp_exe = temp_c_file.replace('.c', '')
-            compile_result = subprocess.run([
-                'gcc', '-o', temp_exe, temp_c_file, 'src/model.c', 'src/weights.c', '-lm'
-            ], capture_output=True, text=True)
-
-            if compile_result.returncode == 0:
-                run_result = subprocess.run([temp_exe], capture_output=True, text=True)
-                c_result = float(run_result.stdout.strip())
+        inputs = np.concatenate([np.array(test_cases, dtype=np.float32), random_cases])
+        with torch.no_grad():
+            py_results = model(*torch.from_numpy(inputs).T).numpy()
+        c_results = np.log(engine.predict_amplitudes(*inputs.T, fixed=fixed))
+        diffs = np.abs(py_results - c_results)
 
-                diff = abs(py_result - c_result)
-                status = "✓ PASS" if diff < 1e-5 else "✗ FAIL"
+        for i, (pitch, velocity, harmonic, time) in enumerate(test_cases):
+            status = "✓ PASS" if diffs[i] < tolerance else "✗ FAIL"
 
-                print(f"Test {i+1}: ({pitch}, {velocity}, {harmonic}, {time})")
-                print(f"  Python: {py_result:.6f}")
-                print(f"  C:      {c_result:.6f}")
-                print(f"  Diff:   {diff:.2e}")
-                print(f"  Status: {status}")
-                print()
-            else:
-                print(f"Test {i+1}: Compilation failed")
-                print(compile_result.stderr)
+            print(f"Test {i+1}: ({pitch}, {velocity}, {harmonic}, {time})")
+            print(f"  Python: {py_results[i]:.6f}")
+            print(f"  C:      {c_results[i]:.6f}")
+            print(f"  Diff:   {diffs[i]:.2e}")
+            print(f"  Status: {status}")
+            print()
 
-        finally:
-            for temp_file in [temp_c_file, temp_exe]:
-                if os.path.exists(temp_file):
-                    os.unlink(temp_file)
+        random_diffs = diffs[len(test_cases):]
+        status = "✓ PASS" if random_diffs.max() < tolerance else "✗ FAIL"
+        print(f"{RANDOM_POINTS} random points: max diff {random_diffs.max():.2e}, "
+              f"mean {random_diffs.mean():.2e}  {status}")
+        print()
+        assert diffs.max() < tolerance, f"{mode}: max log-amplitude difference {diffs.max():.2e} >= {tolerance:.0e}"
 
 if __name__ == "__main__":
     test_consistency()
@@ -0,0 +1,195 @@
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+import note_cache
+import numpy as np
+from model import DirectTinyHarmonicModel
+from note_cache import NoteCache, model_fingerprint
+from synth import synthesize_note
+
+WAVEFORM_BYTES = 128 + 1000 * 4  # .npy header plus 1000 float32 samples
+
+
+def check(condition: bool, description: str) -> bool:
+    print(f"  {'✓ PASS' if condition else '✗ FAIL'}: {description}")
+    return condition
+
+
+def test_note_cache():
+    print("Testing the note cache:")
+    print("=" * 60)
+    results = []
+    waveform = np.linspace(-1, 1, 1000, dtype=np.float32)
+
+    with tempfile.TemporaryDirectory() as directory:
+        cache = NoteCache(directory, max_bytes=3 * WAVEFORM_BYTES)
+        keys = [cache.key("model", pitch, 100, 0.5) for pitch in (60, 62, 64, 65)]
+
+        results.append(check(cache.get(keys[0]) is None, "an empty cache misses"))
+        cache.put(keys[0], waveform)
+        hit = cache.get(keys[0])
+        results.append(
+            check(
+                hit is not None and np.array_equal(hit, waveform),
+                "a stored note is read back",
+            )
+        )
+        results.append(
+            check(
+                cache.key("other", 60, 100, 0.5) != keys[0],
+                "another model gets another key",
+            )
+        )
+
+        # Touching the first note makes the second the least recently used
+        cache.put(keys[1], waveform)
+        cache.put(keys[2], waveform)
+        cache.get(keys[0])
+        cache.put(keys[3], waveform)
+        results.append(
+            check(cache.get(keys[1]) is None, "the least recently used note is evicted")
+        )
+        results.append(
+            check(cache.get(keys[0]) is not None, "a recently read note is kept")
+        )
+        results.append(
+            check(
+                cache.stats()["bytes"] <= cache.max_bytes,
+                "the cache stays under its size cap",
+            )
+        )
+
+        reopened = NoteCache(directory, max_bytes=3 * WAVEFORM_BYTES)
+        results.append(
+            check(reopened.get(keys[3]) is not None, "notes survive a restart")
+        )
+
+        # An empty or truncated file is a miss and is removed, so the next put replaces it
+        for name, contents in [
+            ("an empty", b""),
+            ("a truncated", cache.path(keys[2]).read_bytes()[:100]),
+        ]:
+            cache.path(keys[2]).write_bytes(contents)
+            missed = cache.get(keys[2]) is None and not cache.path(keys[2]).exists()
+            results.append(check(missed, f"{name} file is a miss and is removed"))
+            cache.put(keys[2], waveform)
+
+        stats = cache.stats()
+        print(f"  {stats}")
+        results.append(
+            check(
+                stats["hits"] == 3 and stats["misses"] == 4,
+                "hits and misses are counted",
+            )
+        )
+        results.append(check(stats["evictions"] >= 1, "evictions are counted"))
+
+        # synthesize_note renders a repeated note once and hashes the weights only when not given a fingerprint
+        model = DirectTinyHarmonicModel(hidden_sizes=(8, 8))
+        fingerprint = model_fingerprint(model)
+        with mock.patch.object(
+            note_cache, "model_fingerprint", wraps=model_fingerprint
+        ) as hashed:
+            first = synthesize_note(
+                model,
+                60,
+                100,
+                0.1,
+                max_harmonics=4,
+                cache=cache,
+                fingerprint=fingerprint,
+            )
+            again = synthesize_note(
+                model,
+                60,
+                100,
+                0.1,
+                max_harmonics=4,
+                cache=cache,
+                fingerprint=fingerprint,
+            )
+            results.append(
+                check(
+                    np.array_equal(first, again),
+                    "a repeated note is served from the cache",
+                )
+            )
+            results.append(
+                check(hashed.call_count == 0, "a given fingerprint is not recomputed")
+            )
+            synthesize_note(model, 60, 100, 0.1, max_harmonics=4, cache=cache)
+            results.append(
+                check(hashed.call_count == 1, "a missing fingerprint is computed")
+            )
+    print()
+
+    assert all(results)
+
+
+def test_mapped_files():
+    print("Testing the note cache with memory-mapped files that Windows cannot remove:")
+    print("=" * 60)
+    results = []
+    waveform = np.linspace(-1, 1, 1000, dtype=np.float32)
+
+    with tempfile.TemporaryDirectory() as directory:
+        cache = NoteCache(directory, max_bytes=2 * WAVEFORM_BYTES)
+        keys = [cache.key("model", pitch, 100, 0.5) for pitch in (60, 62, 64)]
+        cache.put(keys[0], waveform)
+        cache.put(keys[1], waveform)
+        locked = cache.path(keys[0])
+        unlink_file = Path.unlink
+
+        def unlink(path, *args, **kwargs):
+            if path == locked:
+                raise PermissionError(13, "The process cannot access the file", path)
+            return unlink_file(path, *args, **kwargs)
+
+        with mock.patch.object(Path, "unlink", unlink):
+            cache.put(keys[2], waveform)
+        results.append(
+            check(
+                locked.exists() and keys[0] in cache.entries,
+                "a locked note is kept for a later eviction",
+            )
+        )
+        results.append(
+            check(
+                cache.get(keys[1]) is None and cache.get(keys[2]) is not None,
+                "the next least recently used note is evicted instead",
+            )
+        )
+
+        cache.put(keys[1], waveform)
+        results.append(
+            check(not locked.exists(), "the note is evicted once it is unlocked")
+        )
+
+        with mock.patch.object(
+            note_cache.os,
+            "replace",
+            side_effect=PermissionError(13, "Access is denied"),
+        ):
+            cache.put(keys[2], waveform)
+        results.append(
+            check(
+                cache.get(keys[2]) is not None
+                and not list(Path(directory).glob("*/*.tmp")),
+                "a note that cannot be replaced keeps its file and drops the new one",
+            )
+        )
+        results.append(
+            check(
+                cache.stats()["bytes"] <= cache.max_bytes,
+                "the cache stays under its size cap",
+            )
+        )
+    print()
+
+    assert all(results)
+
+
+if __name__ == "__main__":
+    test_note_cache()
+    test_mapped_files()
@@ -0,0 +1,65 @@
+import numpy as np
+from dataset import HarmonicData, NoteHarmonics
+from model import DirectTinyHarmonicModel
+from render_server import ModelRenderer
+from synth import resynthesize_note
+
+LOW_SAMPLE_RATE = 22050
+
+
+def check(condition: bool, description: str) -> bool:
+    print(f"  {'✓ PASS' if condition else '✗ FAIL'}: {description}")
+    return condition
+
+
+def flat_note(pitch: int, harmonics: int = 4) -> NoteHarmonics:
+    times = np.linspace(0.0, 0.5, 11)
+    amplitudes = {
+        h: HarmonicData(np.ones(len(times), dtype=np.float32))
+        for h in range(1, harmonics + 1)
+    }
+    return NoteHarmonics(pitch, 100, times, 0, amplitudes)
+
+
+def test_resynthesis_above_nyquist():
+    print("Testing resynthesis when partials reach Nyquist:")
+    print("=" * 60)
+    results = []
+
+    audible = resynthesize_note(flat_note(60), LOW_SAMPLE_RATE)
+    results.append(
+        check(
+            len(audible) == LOW_SAMPLE_RATE // 2 and np.abs(audible).max() > 0,
+            "a mid-range note sounds",
+        )
+    )
+
+    # Pitch 127 is 12.5 kHz, above the 11.025 kHz Nyquist frequency of 22.05 kHz
+    silent = resynthesize_note(flat_note(127), LOW_SAMPLE_RATE)
+    results.append(
+        check(
+            len(silent) == len(audible),
+            "a note with no partial below Nyquist keeps its length",
+        )
+    )
+    results.append(
+        check(silent.dtype == np.float32 and not silent.any(), "and is silent")
+    )
+
+    renderer = ModelRenderer(
+        DirectTinyHarmonicModel(hidden_sizes=(8, 8)), LOW_SAMPLE_RATE
+    )
+    waveform = renderer.render_note(127, 100, 0.25)
+    results.append(
+        check(
+            len(waveform) == renderer.note_size(0.25),
+            "the render server renders it at 22.05 kHz",
+        )
+    )
+    print()
+
+    assert all(results)
+
+
+if __name__ == "__main__":
+    test_resynthesis_above_nyquist()
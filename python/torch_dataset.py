@@ -0,0 +1,110 @@
+from typing import Iterable, Optional, Tuple
+
+import numpy as np
+import torch
+from constants import MAX_HARMONICS
+from dataset import HarmonicsArchive
+from torch.utils.data import Dataset
+
+
+class HarmonicTorchDataset(Dataset):
+    def __init__(
+        self,
+        archive: HarmonicsArchive,
+        keys: Optional[Iterable[Tuple[int, int]]] = None,
+        harmonics: Optional[Iterable[int]] = None,
+        use_log: bool = True,
+        eps: float = 1e-9,
+        return_torch: bool = False,
+        time_grid: Optional[np.ndarray] = None,
+    ):
+        self.archive = archive
+        self.eps = float(eps)
+        self.use_log = bool(use_log)
+        self.return_torch = bool(return_torch)
+        self.time_grid = (
+            None if time_grid is None else np.asarray(time_grid, dtype=np.float32)
+        )
+
+        # Build flat index of available (pitch,volume,harmonic) triples
+        all_keys = list(archive.notes.keys()) if keys is None else list(keys)
+        idx = []
+        for k in all_keys:
+            if k not in archive.notes:
+                continue
+            note = archive.notes[k]
+            available_h = sorted(note.harmonics.keys())
+            sel_h = list(harmonics) if harmonics is not None else available_h
+            for h in sel_h:
+                if h in note.harmonics:
+                    idx.append((k[0], k[1], h))  # (pitch, volume, harmonic)
+        self.index = idx
+
+        self._global_log_mean = None
+        self._global_log_std = None
+        if self.use_log:
+            self._compute_global_log_stats()
+
+    def _compute_global_log_stats(self):
+        logs = []
+        for p, v, h in self.index:
+            note = self.archive.notes[(p, v)]
+            amps = note.harmonics[h].amplitudes.astype(np.float32)
+            amps = np.maximum(amps, self.eps)
+            logs.append(np.log(amps).ravel())
+        if len(logs) == 0:
+            self._global_log_mean = 0.0
+            self._global_log_std = 1.0
+            return
+        all_logs = np.concatenate(logs, axis=0)
+        self._global_log_mean = float(np.mean(all_logs))
+        self._global_log_std = float(np.std(all_logs) + 1e-12)
+
+    @property
+    def global_log_stats(self):
+        return self._global_log_mean, self._global_log_std
+
+    def __len__(self):
+        return len(self.index)
+
+    def _resample_to_grid(
+        self, src_times: np.ndarray, src_amps: np.ndarray
+    ) -> np.ndarray:
+        if self.time_grid is None:
+            return src_amps.astype(np.float32)
+
+        src_times = np.asarray(src_times, dtype=np.float32)
+        src_amps = np.asarray(src_amps, dtype=np.float32)
+        res = np.interp(
+            self.time_grid, src_times, src_amps, left=src_amps[0], right=src_amps[-1]
+        )
+        return res.astype(np.float32)
+
+    def __getitem__(self, idx):
+        p, v, h = self.index[idx]
+        note = self.archive.notes[(p, v)]
+        hd = note.harmonics[h]
+        amps = hd.amplitudes  # shape (T_src,)
+        times = note.times
+
+        amps = self._resample_to_grid(times, amps)  # shape (T_target,)
+        amps = np.maximum(amps, self.eps)
+
+        if self.use_log:
+            target = np.log(amps).astype(np.float32)
+        else:
+            target = amps.astype(np.float32)
+
+        norm_pitch = p / 127.0
+        norm_velocity = float(v) / 127.0
+        norm_harmonic = float(h - 1) / (MAX_HARMONICS - 1) if MAX_HARMONICS > 1 else 0.0
+
+        if self.return_torch:
+            return (
+                torch.tensor(norm_pitch, dtype=torch.float32),
+                torch.tensor(norm_velocity, dtype=torch.float32),
+                torch.tensor(norm_harmonic, dtype=torch.float32),
+                torch.from_numpy(target),
+            )
+        else:
+            return norm_pitch, norm_velocity, norm_harmonic, target
@@ -1,3 +1,4 @@
+import time
 from pathlib import Path
 from typing import List, Tuple, Union
 
@@ -8,15 +9,12 @@ from torch import Tensor
 from torch.utils.data import DataLoader, TensorDataset
 from tqdm import tqdm
 
-from constants import MODEL_PATH
-from dataset import HarmonicTorchDataset, HarmonicsArchive
+from constants import ANALYSIS_DURATION, BATCH_SIZE, EPOCHS, HIDDEN_SIZES, LEARNING_RATE, MODEL_PATH
+from dataset import HarmonicsArchive
+from metrics import emit, peak_rss_mb, stage
 from model import DirectTinyHarmonicModel
+from torch_dataset import HarmonicTorchDataset
 
-# Default training parameters
-HIDDEN_SIZES = (64, 64, 32)
-BATCH_SIZE = 1024
-LEARNING_RATE = 1e-2
-EPOCHS = 20
 T = 64
 
 
@@ -25,10 +23,12 @@ DEVICE = torch.device("cuda" if torch.cuda.is_available() else "cpu")
 
 def flatten_dataset(ds: HarmonicTorchDataset, time_grid: np.ndarray) -> Tuple[List[Tuple[float, float, float, float]], List[float]]:
     inputs, targets = [], []
-    for pitch, velocity, harmonic, amplitudes in tqdm(ds, desc="Flattening dataset"):
-        for i, t in enumerate(time_grid):
-            inputs.append((pitch, velocity, harmonic, t))
-            targets.append(amplitudes[i])
+    with stage("flatten_dataset", tracks=len(ds)) as metrics:
+        for pitch, velocity, harmonic, amplitudes in tqdm(ds, desc="Flattening dataset"):
+            for i, t in enumerate(time_grid):
+                inputs.append((pitch, velocity, harmonic, t))
+                targets.append(amplitudes[i])
+        metrics["samples"] = len(targets)
     return inputs, targets
 
 
@@ -95,6 +95,41 @@ def add_jitter(x: Tensor, std: float = 1e-3) -> Tensor:
     return x + torch.randn_like(x) * std
 
 
+def train_epoch(
+        model: torch.nn.Module,
+        train_loader: DataLoader,
+        loss_fn: callable,
+        optimizer: torch.optim.Optimizer,
+        device: torch.device,
+        desc: str = "Training",
+        vel_jitter_std: float = 1e-3,
+        time_jitter_std: float = 5e-3,
+        progress: bool = True
+) -> Tuple[float, int]:
+    total_loss = 0.0
+    total_samples = 0
+    for b_pitch, b_vel, b_harm, b_time, b_target in tqdm(train_loader, desc=desc, disable=not progress):
+        b_pitch = b_pitch.to(device)
+        b_vel = b_vel.to(device)
+        b_harm = b_harm.to(device)
+        b_time = b_time.to(device)
+        b_target = b_target.to(device)
+
+        # Apply jitter
+        b_vel_j = add_jitter(b_vel, std=vel_jitter_std)
+        b_time_j = add_jitter(b_time, std=time_jitter_std)
+
+        optimizer.zero_grad()
+        out = model(b_pitch, b_vel_j, b_harm, b_time_j)
+        loss = loss_fn(out, b_target)
+        loss.backward()
+        optimizer.step()
+        total_loss += loss.item() * b_pitch.size(0)
+        total_samples += b_pitch.size(0)
+
+    return total_loss, total_samples
+
+
 def train_model(
         model: DirectTinyHarmonicModel,
         train_loader: DataLoader,
@@ -103,31 +138,42 @@ def train_model(
         device: torch.device,
         epochs: int,
         vel_jitter_std: float = 1e-3,
-        time_jitter_std: float = 5e-3
+        time_jitter_std: float = 5e-3,
+        progress: bool = True,
+        qat_epochs: int = 0
 ) -> None:
+    """Train for `epochs`; the last `qat_epochs` of them run on fake-quantized weights (see model.fake_quantize)."""
     model.train()
     for epoch in range(1, epochs + 1):
-        total_loss = 0.0
-        for b_pitch, b_vel, b_harm, b_time, b_target in tqdm(train_loader, desc=f"Epoch {epoch}/{epochs}"):
-            b_pitch = b_pitch.to(device)
-            b_vel = b_vel.to(device)
-            b_harm = b_harm.to(device)
-            b_time = b_time.to(device)
-            b_target = b_target.to(device)
-
-            # Apply jitter
-            b_vel_j = add_jitter(b_vel, std=vel_jitter_std)
-            b_time_j = add_jitter(b_time, std=time_jitter_std)
-
-            optimizer.zero_grad()
-            out = model(b_pitch, b_vel_j, b_harm, b_time_j)
-            loss = loss_fn(out, b_target)
-            loss.backward()
-            optimizer.step()
-            total_loss += loss.item() * b_pitch.size(0)
+        model.quantize = epoch > epochs - qat_epochs
+        start = time.perf_counter()
+        total_loss, samples = train_epoch(
+            model, train_loader, loss_fn, optimizer, device, f"Epoch {epoch}/{epochs}",
+            vel_jitter_std, time_jitter_std, progress
+        )
+        seconds = time.perf_counter() - start
 
         avg_loss = total_loss / len(train_loader.dataset)
-        print(f"Epoch {epoch:02d} - MSE Loss: {avg_loss:.6f}")
+        if progress:
+            print(f"Epoch {epoch:02d} - MSE Loss: {avg_loss:.6f}{' (QAT)' if model.quantize else ''}")
+        emit(
+            "epoch", epoch=epoch, loss=avg_loss, quantized=model.quantize, seconds=seconds, samples=samples, batches=len(train_loader),
+            samples_per_sec=samples / seconds, batches_per_sec=len(train_loader) / seconds, peak_rss_mb=peak_rss_mb()
+        )
+
+
+def build_training_tensors(archive: HarmonicsArchive) -> Tuple[Tensor, Tensor, Tensor, Tensor, Tensor]:
+    common_times = np.linspace(0.0, ANALYSIS_DURATION, T, dtype=np.float32)
+    dataset = HarmonicTorchDataset(archive, time_grid=common_times, use_log=True, return_torch=False)
+
+    # Flatten data to (p, v, h, t) → amplitude
+    flat_inputs, flat_targets = flatten_dataset(dataset, common_times)
+    tensors = collate_batch(flat_inputs, flat_targets)
+    emit(
+        "dataset", notes=len(archive.notes), tracks=len(dataset), samples=len(flat_targets),
+        bytes=sum(tensor.element_size() * tensor.nelement() for tensor in tensors)
+    )
+    return tensors
 
 
 def train_and_save(
@@ -137,13 +183,9 @@ def train_and_save(
         batch_size: int = BATCH_SIZE,
         learning_rate: float = LEARNING_RATE,
         model_path: Union[str, Path] = MODEL_PATH,
+        qat_epochs: int = 0,
 ) -> DirectTinyHarmonicModel:
-    common_times = np.linspace(0.0, 4.0, T, dtype=np.float32)
-    dataset = HarmonicTorchDataset(archive, time_grid=common_times, use_log=True, return_torch=False)
-
-    # Flatten data to (p, v, h, t) → amplitude
-    flat_inputs, flat_targets = flatten_dataset(dataset, common_times)
-    pitch, vel, harm, time, target = collate_batch(flat_inputs, flat_targets)
+    pitch, vel, harm, time, target = build_training_tensors(archive)
 
     # Build dataloader
     train_dataset = TensorDataset(pitch, vel, harm, time, target)
@@ -155,14 +197,21 @@ def train_and_save(
     loss_fn = torch.nn.MSELoss()
 
     # Train
-    try:
-        train_model(model, train_loader, loss_fn, optimizer, DEVICE, epochs)
-    except KeyboardInterrupt:
-        print("Training interrupted. Saving current model state...")
+    with stage(
+            "train", epochs=epochs, qat_epochs=qat_epochs, batch_size=batch_size, hidden_sizes=list(hidden_sizes)
+    ) as metrics:
+        try:
+            train_model(model, train_loader, loss_fn, optimizer, DEVICE, epochs, qat_epochs=qat_epochs)
+        except KeyboardInterrupt:
+            print("Training interrupted. Saving current model state...")
+            metrics["interrupted"] = True
+        metrics["samples"] = epochs * len(train_dataset)
+        metrics["batches"] = epochs * len(train_loader)
 
     # Save model
     model_path = Path(model_path)
     model_path.parent.mkdir(parents=True, exist_ok=True)
+    model.quantize = False
     torch.save(model.state_dict(), model_path)
 
     return model
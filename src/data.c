@@ -1,167 +1,167 @@
 #include "data.h"
 
-Song* create_midi_song(void) {
-    Note notes[] = {
-        {60, 73, 0, 470, 0},
-        {72, 79, 10, 525, 0},
-        {67, 71, 20, 495, 0},
-        {64, 68, 25, 495, 0},
-        {60, 57, 490, 350, 0},
-        {72, 76, 720, 140, 0},
-        {67, 69, 720, 160, 0},
-        {64, 67, 720, 160, 0},
-        {61, 65, 960, 335, 0},
-        {58, 50, 960, 335, 0},
-        {67, 73, 960, 460, 0},
-        {64, 61, 965, 305, 0},
-        {64, 71, 1435, 145, 0},
-        {69, 79, 1435, 155, 0},
-        {58, 53, 1435, 320, 0},
-        {61, 63, 1435, 325, 0},
-        {67, 63, 1610, 150, 0},
-        {64, 54, 1615, 140, 0},
-        {64, 69, 1765, 150, 0},
-        {60, 62, 1915, 470, 0},
-        {57, 61, 1915, 480, 0},
-        {64, 72, 1920, 475, 0},
-        {60, 62, 2395, 325, 0},
-        {57, 63, 2400, 380, 0},
-        {64, 75, 2415, 225, 0},
-        {60, 64, 2870, 330, 0},
-        {56, 56, 2870, 335, 0},
-        {54, 59, 2875, 325, 0},
-        {62, 72, 2875, 340, 0},
-        {64, 80, 3350, 160, 0},
-        {58, 62, 3350, 255, 0},
-        {56, 64, 3350, 255, 0},
-        {62, 59, 3520, 160, 0},
-        {60, 60, 3685, 110, 0},
-        {57, 68, 3835, 475, 0},
-        {60, 74, 3835, 485, 0},
-        {53, 61, 3840, 465, 0},
-        {53, 55, 4320, 320, 0},
-        {57, 59, 4320, 335, 0},
-        {60, 66, 4620, 175, 0},
-        {52, 65, 4795, 335, 0},
-        {60, 66, 4800, 315, 0},
-        {55, 64, 4800, 335, 0},
-        {52, 68, 5275, 160, 0},
-        {55, 67, 5275, 165, 0},
-        {64, 78, 5275, 165, 0},
-        {60, 82, 5275, 175, 0},
-        {55, 43, 5450, 215, 0},
-        {52, 45, 5450, 220, 0},
-        {54, 66, 5755, 340, 0},
-        {51, 61, 5755, 340, 0},
-        {60, 74, 5755, 485, 0},
-        {51, 68, 6235, 305, 0},
-        {54, 64, 6235, 310, 0},
-        {60, 68, 6500, 215, 0},
-        {57, 56, 6715, 330, 0},
-        {55, 62, 6715, 340, 0},
-        {60, 66, 6715, 465, 0},
-        {53, 65, 6720, 335, 0},
-        {57, 63, 7200, 160, 0},
-        {60, 74, 7200, 170, 0},
-        {64, 66, 7200, 170, 0},
-        {50, 66, 7200, 175, 0},
-        {67, 81, 7360, 250, 0},
-        {64, 50, 7520, 160, 0},
-        {72, 89, 7675, 5, 0},
-        {60, 60, 7685, 340, 0},
-        {67, 64, 7685, 490, 0},
-        {64, 60, 7690, 475, 0},
-        {72, 57, 7690, 485, 0},
-        {60, 62, 8155, 315, 0},
-        {72, 83, 8395, 180, 0},
-        {64, 73, 8400, 170, 0},
-        {67, 63, 8400, 175, 0},
-        {64, 74, 8640, 315, 0},
-        {61, 72, 8640, 335, 0},
-        {58, 54, 8640, 335, 0},
-        {67, 74, 8640, 460, 0},
-        {64, 77, 9115, 150, 0},
-        {69, 80, 9115, 155, 0},
-        {61, 70, 9115, 180, 0},
-        {58, 54, 9115, 315, 0},
-        {72, 67, 9265, 160, 0},
-        {74, 70, 9440, 155, 0},
-        {60, 60, 9590, 345, 0},
-        {57, 62, 9595, 470, 0},
-        {69, 65, 9600, 480, 0},
-        {76, 72, 9600, 490, 0},
-        {60, 61, 10075, 315, 0},
-        {57, 54, 10075, 320, 0},
-        {76, 79, 10320, 230, 0},
-        {54, 70, 10555, 320, 0},
-        {60, 85, 10555, 325, 0},
-        {56, 71, 10555, 325, 0},
-        {70, 65, 10560, 320, 0},
-        {74, 69, 10560, 325, 0},
-        {69, 40, 10960, 80, 0},
-        {75, 54, 10985, 80, 0},
-        {76, 89, 11030, 165, 0},
-        {58, 77, 11035, 175, 0},
-        {56, 70, 11040, 170, 0},
-        {70, 72, 11040, 240, 0},
-        {79, 64, 11200, 160, 0},
-        {60, 69, 11360, 155, 0},
-        {74, 71, 11360, 160, 0},
-        {57, 76, 11510, 470, 0},
-        {65, 64, 11510, 470, 0},
-        {69, 65, 11520, 480, 0},
-        {72, 94, 11520, 495, 0},
-        {53, 76, 11520, 950, 0},
-        {57, 61, 12000, 300, 0},
-        {65, 65, 12000, 305, 0},
-        {60, 70, 12240, 230, 0},
-        {74, 101, 12470, 250, 0},
-        {66, 75, 12475, 245, 0},
-        {60, 88, 12475, 405, 0},
-        {69, 72, 12480, 240, 0},
-        {63, 78, 12480, 265, 0},
-        {57, 78, 12480, 315, 0},
-        {51, 65, 12480, 480, 0},
-        {67, 72, 12720, 205, 0},
-        {72, 83, 12720, 240, 0},
-        {78, 65, 12905, 80, 0},
-        {67, 80, 12950, 325, 0},
-        {45, 84, 12950, 415, 0},
-        {50, 76, 12950, 415, 0},
-        {79, 96, 12960, 140, 0},
-        {57, 84, 12960, 410, 0},
-        {74, 74, 13105, 165, 0},
-        {72, 69, 13260, 170, 0},
-        {62, 73, 13435, 340, 0},
-        {72, 72, 13440, 470, 0},
-        {66, 84, 13440, 480, 0},
-        {69, 78, 13440, 495, 0},
-        {26, 58, 13440, 950, 0},
-        {38, 63, 13440, 955, 0},
-        {62, 69, 13915, 310, 0},
-        {66, 68, 13920, 470, 0},
-        {69, 65, 14220, 165, 0},
-        {72, 78, 14220, 175, 0},
-        {64, 61, 14395, 305, 0},
-        {31, 79, 14395, 310, 0},
-        {69, 75, 14395, 340, 0},
-        {72, 84, 14395, 470, 0},
-        {76, 89, 14395, 475, 0},
-        {43, 82, 14400, 315, 0},
-        {79, 70, 14875, 155, 0},
-        {72, 93, 14875, 160, 0},
-        {24, 79, 14875, 310, 0},
-        {69, 94, 14880, 150, 0},
-        {36, 86, 14880, 315, 0},
-        {80, 65, 14995, 80, 0},
-        {72, 75, 15035, 155, 0},
-        {81, 92, 15035, 155, 0},
-        {78, 74, 15040, 160, 0},
-        {79, 74, 15195, 155, 0},
-        {84, 70, 15200, 150, 0},
-        {76, 75, 15200, 150, 0},
-        {82, 65, 15200, 160, 0},
-    };
+static const Note notes[] = {
+    {60, 73, 0, 0, 470},
+    {72, 79, 0, 10, 525},
+    {67, 71, 0, 10, 495},
+    {64, 68, 0, 5, 495},
+    {60, 57, 0, 465, 350},
+    {64, 67, 0, 230, 160},
+    {67, 69, 0, 0, 160},
+    {72, 76, 0, 0, 140},
+    {58, 50, 0, 240, 335},
+    {61, 65, 0, 0, 335},
+    {67, 73, 0, 0, 460},
+    {64, 61, 0, 5, 305},
+    {58, 53, 0, 470, 320},
+    {61, 63, 0, 0, 325},
+    {64, 71, 0, 0, 145},
+    {69, 79, 0, 0, 155},
+    {67, 63, 0, 175, 150},
+    {64, 54, 0, 5, 140},
+    {64, 69, 0, 150, 150},
+    {57, 61, 0, 150, 480},
+    {60, 62, 0, 0, 470},
+    {64, 72, 0, 5, 475},
+    {60, 62, 0, 475, 325},
+    {57, 63, 0, 5, 380},
+    {64, 75, 0, 15, 225},
+    {56, 56, 0, 455, 335},
+    {60, 64, 0, 0, 330},
+    {54, 59, 0, 5, 325},
+    {62, 72, 0, 0, 340},
+    {56, 64, 0, 475, 255},
+    {58, 62, 0, 0, 255},
+    {64, 80, 0, 0, 160},
+    {62, 59, 0, 170, 160},
+    {60, 60, 0, 165, 110},
+    {57, 68, 0, 150, 475},
+    {60, 74, 0, 0, 485},
+    {53, 61, 0, 5, 465},
+    {53, 55, 0, 480, 320},
+    {57, 59, 0, 0, 335},
+    {60, 66, 0, 300, 175},
+    {52, 65, 0, 175, 335},
+    {55, 64, 0, 5, 335},
+    {60, 66, 0, 0, 315},
+    {52, 68, 0, 475, 160},
+    {55, 67, 0, 0, 165},
+    {60, 82, 0, 0, 175},
+    {64, 78, 0, 0, 165},
+    {52, 45, 0, 175, 220},
+    {55, 43, 0, 0, 215},
+    {51, 61, 0, 305, 340},
+    {54, 66, 0, 0, 340},
+    {60, 74, 0, 0, 485},
+    {51, 68, 0, 480, 305},
+    {54, 64, 0, 0, 310},
+    {60, 68, 0, 265, 215},
+    {55, 62, 0, 215, 340},
+    {57, 56, 0, 0, 330},
+    {60, 66, 0, 0, 465},
+    {53, 65, 0, 5, 335},
+    {50, 66, 0, 480, 175},
+    {57, 63, 0, 0, 160},
+    {60, 74, 0, 0, 170},
+    {64, 66, 0, 0, 170},
+    {67, 81, 0, 160, 250},
+    {64, 50, 0, 160, 160},
+    {72, 89, 0, 155, 5},
+    {60, 60, 0, 10, 340},
+    {67, 64, 0, 0, 490},
+    {64, 60, 0, 5, 475},
+    {72, 57, 0, 0, 485},
+    {60, 62, 0, 465, 315},
+    {72, 83, 0, 240, 180},
+    {64, 73, 0, 5, 170},
+    {67, 63, 0, 0, 175},
+    {58, 54, 0, 240, 335},
+    {61, 72, 0, 0, 335},
+    {64, 74, 0, 0, 315},
+    {67, 74, 0, 0, 460},
+    {58, 54, 0, 475, 315},
+    {61, 70, 0, 0, 180},
+    {64, 77, 0, 0, 150},
+    {69, 80, 0, 0, 155},
+    {72, 67, 0, 150, 160},
+    {74, 70, 0, 175, 155},
+    {60, 60, 0, 150, 345},
+    {57, 62, 0, 5, 470},
+    {69, 65, 0, 5, 480},
+    {76, 72, 0, 0, 490},
+    {57, 54, 0, 475, 320},
+    {60, 61, 0, 0, 315},
+    {76, 79, 0, 245, 230},
+    {54, 70, 0, 235, 320},
+    {56, 71, 0, 0, 325},
+    {60, 85, 0, 0, 325},
+    {70, 65, 0, 5, 320},
+    {74, 69, 0, 0, 325},
+    {69, 40, 0, 400, 80},
+    {75, 54, 0, 25, 80},
+    {76, 89, 0, 45, 165},
+    {58, 77, 0, 5, 175},
+    {56, 70, 0, 5, 170},
+    {70, 72, 0, 0, 240},
+    {79, 64, 0, 160, 160},
+    {60, 69, 0, 160, 155},
+    {74, 71, 0, 0, 160},
+    {57, 76, 0, 150, 470},
+    {65, 64, 0, 0, 470},
+    {53, 76, 0, 10, 950},
+    {69, 65, 0, 0, 480},
+    {72, 94, 0, 0, 495},
+    {57, 61, 0, 480, 300},
+    {65, 65, 0, 0, 305},
+    {60, 70, 0, 240, 230},
+    {74, 101, 0, 230, 250},
+    {60, 88, 0, 5, 405},
+    {66, 75, 0, 0, 245},
+    {51, 65, 0, 5, 480},
+    {57, 78, 0, 0, 315},
+    {63, 78, 0, 0, 265},
+    {69, 72, 0, 0, 240},
+    {67, 72, 0, 240, 205},
+    {72, 83, 0, 0, 240},
+    {78, 65, 0, 185, 80},
+    {45, 84, 0, 45, 415},
+    {50, 76, 0, 0, 415},
+    {67, 80, 0, 0, 325},
+    {57, 84, 0, 10, 410},
+    {79, 96, 0, 0, 140},
+    {74, 74, 0, 145, 165},
+    {72, 69, 0, 155, 170},
+    {62, 73, 0, 175, 340},
+    {26, 58, 0, 5, 950},
+    {38, 63, 0, 0, 955},
+    {66, 84, 0, 0, 480},
+    {69, 78, 0, 0, 495},
+    {72, 72, 0, 0, 470},
+    {62, 69, 0, 475, 310},
+    {66, 68, 0, 5, 470},
+    {69, 65, 0, 300, 165},
+    {72, 78, 0, 0, 175},
+    {31, 79, 0, 175, 310},
+    {64, 61, 0, 0, 305},
+    {69, 75, 0, 0, 340},
+    {72, 84, 0, 0, 470},
+    {76, 89, 0, 0, 475},
+    {43, 82, 0, 5, 315},
+    {24, 79, 0, 475, 310},
+    {72, 93, 0, 0, 160},
+    {79, 70, 0, 0, 155},
+    {36, 86, 0, 5, 315},
+    {69, 94, 0, 0, 150},
+    {80, 65, 0, 115, 80},
+    {72, 75, 0, 40, 155},
+    {81, 92, 0, 0, 155},
+    {78, 74, 0, 5, 160},
+    {79, 74, 0, 155, 155},
+    {76, 75, 0, 5, 150},
+    {82, 65, 0, 0, 160},
+    {84, 70, 0, 0, 150},
+};
 
+Song* create_midi_song(void) {
     return create_song(notes, 159, 96);
 }
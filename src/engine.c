@@ -0,0 +1,56 @@
+#include "engine.h"
+#include "model.h"
+#include "model_fixed.h"
+
+// Whether predict_amplitude runs the integer path (a build-time choice)
+int fixed_point_build(void) {
+#ifdef FIXED_POINT
+    return 1;
+#else
+    return 0;
+#endif
+}
+
+int use_quality_tier(const char* name) {
+    const RenderSettings* tier = find_quality_tier(name);
+    if (!tier) {
+        return -1;
+    }
+    use_render_settings(tier);
+    return 0;
+}
+
+void predict_amplitudes(const float* pitch, const float* velocity, const float* harmonic, const float* time,
+                        float* amplitude, size_t count) {
+    for (size_t i = 0; i < count; i++) {
+        amplitude[i] = predict_amplitude(pitch[i], velocity[i], harmonic[i], time[i]);
+    }
+}
+
+void predict_amplitudes_fixed(const float* pitch, const float* velocity, const float* harmonic,
+                              const float* time, float* amplitude, size_t count) {
+    for (size_t i = 0; i < count; i++) {
+        amplitude[i] = predict_amplitude_fixed(pitch[i], velocity[i], harmonic[i], time[i]);
+    }
+}
+
+// render_song on caller-owned notes and buffer, which must hold song_size() zeroed samples
+int render_notes(const Note* notes, size_t note_count, uint16_t bpm, float* buffer, size_t buffer_size) {
+    Song song = {notes, note_count, bpm, song_total_ticks(notes, note_count)};
+    if (bpm == 0 || buffer_size < song_size(&song)) {
+        return -1;
+    }
+    render_song(&song, buffer);
+    return 0;
+}
+
+// render_song_range on caller-owned notes and buffer, which must hold last - first zeroed samples
+int render_notes_range(const Note* notes, size_t note_count, uint16_t bpm, size_t first, size_t last,
+                       float* buffer) {
+    Song song = {notes, note_count, bpm, song_total_ticks(notes, note_count)};
+    if (bpm == 0 || last < first) {
+        return -1;
+    }
+    render_song_range(&song, first, last, buffer);
+    return 0;
+}
@@ -0,0 +1,19 @@
+#pragma once
+
+// Batch entry points of the libtinypiano shared library. The library also exports the
+// model, synth, song, voice and weights-blob APIs.
+
+#include <stddef.h>
+#include <stdint.h>
+
+#include "song.h"
+
+int fixed_point_build(void);
+int use_quality_tier(const char *name);
+void predict_amplitudes(const float *pitch, const float *velocity, const float *harmonic, const float *time,
+                        float *amplitude, size_t count);
+void predict_amplitudes_fixed(const float *pitch, const float *velocity, const float *harmonic,
+                              const float *time, float *amplitude, size_t count);
+int render_notes(const Note *notes, size_t note_count, uint16_t bpm, float *buffer, size_t buffer_size);
+int render_notes_range(const Note *notes, size_t note_count, uint16_t bpm, size_t first, size_t last,
+                       float *buffer);
@@ -0,0 +1,284 @@
+#define _POSIX_C_SOURCE 200809L
+
+#include <ctype.h>
+#include <errno.h>
+#include <fcntl.h>
+#include <stdlib.h>
+#include <string.h>
+#include <time.h>
+#include <unistd.h>
+
+#include "live.h"
+
+typedef struct {
+    int fd;
+    int closed;
+    char buffer[LIVE_BUFFER_SIZE];
+    size_t length;
+    int has_pending;
+    LiveEvent pending;
+} LiveInput;
+
+typedef struct {
+    float rate;
+    float due;
+    uint32_t state;
+    size_t release[128];  // sample each generated note is released at, 0 = not held
+} LoadGenerator;
+
+LiveConfig default_live_config(void) {
+    LiveConfig config;
+    config.voices = default_voice_config();
+    config.latency = LIVE_DEFAULT_LATENCY;
+    config.realtime = 1;
+    config.duration = 0.0;
+    config.load = 0.0f;
+    config.seed = 1;
+    return config;
+}
+
+static double now_seconds(void) {
+    struct timespec now;
+    clock_gettime(CLOCK_MONOTONIC, &now);
+    return now.tv_sec + now.tv_nsec * 1e-9;
+}
+
+static void sleep_until(double deadline) {
+    struct timespec until;
+    until.tv_sec = (time_t)deadline;
+    until.tv_nsec = (long)((deadline - until.tv_sec) * 1e9);
+    while (clock_nanosleep(CLOCK_MONOTONIC, TIMER_ABSTIME, &until, NULL) == EINTR) {
+    }
+}
+
+int parse_live_event(const char* line, LiveEvent* event) {
+    char type[8];
+    int pitch;
+    int velocity = 0;
+    int consumed = 0;
+
+    while (isspace((unsigned char)*line)) {
+        line++;
+    }
+    event->time = -1.0;
+    if (*line == '@') {
+        if (sscanf(line + 1, "%lf%n", &event->time, &consumed) != 1 || event->time < 0.0) {
+            return -1;
+        }
+        line += 1 + consumed;
+    }
+
+    const int fields = sscanf(line, "%7s %d %d", type, &pitch, &velocity);
+    if (fields < 2 || pitch < 0 || pitch > 127) {
+        return -1;
+    }
+    event->pitch = pitch;
+    if (strcmp(type, "on") == 0 && fields == 3 && velocity > 0 && velocity <= 127) {
+        event->type = LIVE_NOTE_ON;
+        event->velocity = velocity;
+        return 0;
+    }
+    // A note-on with velocity 0 is a note-off, as in MIDI
+    if (strcmp(type, "off") == 0 || (strcmp(type, "on") == 0 && fields == 3 && velocity == 0)) {
+        event->type = LIVE_NOTE_OFF;
+        event->velocity = 0;
+        return 0;
+    }
+    return -1;
+}
+
+void apply_live_event(VoiceScheduler* scheduler, const LiveEvent* event) {
+    if (event->type == LIVE_NOTE_ON) {
+        voice_note_on(scheduler, event->pitch, event->velocity);
+    } else {
+        voice_note_off(scheduler, event->pitch);
+    }
+}
+
+// Take the next complete line from the input without blocking: 1 = line, 0 = none yet
+static int next_line(LiveInput* input, char* line, LiveStats* stats) {
+    for (;;) {
+        char* newline = memchr(input->buffer, '\n', input->length);
+        if (newline) {
+            const size_t size = newline - input->buffer;
+            memcpy(line, input->buffer, size);
+            line[size] = '\0';
+            input->length -= size + 1;
+            memmove(input->buffer, newline + 1, input->length);
+            return 1;
+        }
+        if (input->length == LIVE_BUFFER_SIZE) {
+            stats->invalid_events++;  // overlong line
+            input->length = 0;
+        }
+        if (input->closed) {
+            if (input->length == 0) {
+                return 0;
+            }
+            memcpy(line, input->buffer, input->length);  // last line without a newline
+            line[input->length] = '\0';
+            input->length = 0;
+            return 1;
+        }
+
+        const ssize_t count = read(input->fd, input->buffer + input->length, LIVE_BUFFER_SIZE - input->length);
+        if (count > 0) {
+            input->length += count;
+        } else if (count == 0 || (errno != EAGAIN && errno != EWOULDBLOCK && errno != EINTR)) {
+            input->closed = 1;
+        } else {
+            return 0;
+        }
+    }
+}
+
+// Apply every event that has arrived and is due before the end of the next block
+static void read_events(LiveInput* input, VoiceScheduler* scheduler, double block_end, LiveStats* stats) {
+    char line[LIVE_BUFFER_SIZE + 1];
+    for (;;) {
+        if (!input->has_pending) {
+            if (!next_line(input, line, stats)) {
+                return;
+            }
+            const char* text = line;
+            while (isspace((unsigned char)*text)) {
+                text++;
+            }
+            if (*text == '\0' || *text == '#') {
+                continue;
+            }
+            if (parse_live_event(text, &input->pending) != 0) {
+                stats->invalid_events++;
+                continue;
+            }
+            input->has_pending = 1;
+        }
+        if (input->pending.time >= block_end) {
+            return;
+        }
+        apply_live_event(scheduler, &input->pending);
+        input->has_pending = 0;
+        stats->events++;
+    }
+}
+
+static uint32_t next_random(LoadGenerator* generator) {
+    generator->state = generator->state * 1664525u + 1013904223u;
+    return generator->state >> 8;
+}
+
+// Random notes at a steady rate, each held for a random time
+static void generate_events(LoadGenerator* generator, VoiceScheduler* scheduler, double block_seconds) {
+    const int sample_rate = current_render_settings()->sample_rate;
+    const size_t position = scheduler->position;
+    for (int pitch = 0; pitch < 128; pitch++) {
+        if (generator->release[pitch] && generator->release[pitch] <= position) {
+            voice_note_off(scheduler, pitch);
+            generator->release[pitch] = 0;
+        }
+    }
+
+    generator->due += generator->rate * block_seconds;
+    while (generator->due >= 1.0f) {
+        const int pitch = 36 + next_random(generator) % 61;
+        const int velocity = 40 + next_random(generator) % 81;
+        const float hold = LIVE_LOAD_MIN_HOLD
+            + (LIVE_LOAD_MAX_HOLD - LIVE_LOAD_MIN_HOLD) * (next_random(generator) % 1000) / 1000.0f;
+        voice_note_on(scheduler, pitch, velocity);
+        generator->release[pitch] = position + (size_t)(hold * sample_rate) + 1;
+        generator->due -= 1.0f;
+    }
+}
+
+static int write_block(FILE* output, const float* block, int16_t* pcm, size_t size) {
+    for (size_t i = 0; i < size; i++) {
+        const float sample = block[i] < -1.0f ? -1.0f : (block[i] > 1.0f ? 1.0f : block[i]);
+        pcm[i] = (int16_t)(sample * 32767.0f);
+    }
+    if (fwrite(pcm, sizeof(int16_t), size, output) != size) {
+        return -1;
+    }
+    return fflush(output) == 0 ? 0 : -1;
+}
+
+// Render blocks of live audio from text events on input (-1 for none) to output as
+// 16-bit mono PCM (NULL to discard). Every block has a deadline one block after it starts.
+int run_live(int input, FILE* output, const LiveConfig* config, LiveStats* stats) {
+    const int sample_rate = current_render_settings()->sample_rate;
+    VoiceConfig voices = config->voices;
+    voices.block_size = (size_t)(config->latency * sample_rate);
+    if (voices.block_size == 0 || (input < 0 && config->duration <= 0.0)) {
+        return -1;
+    }
+
+    VoiceScheduler* scheduler = create_voice_scheduler(NULL, &voices);
+    LiveInput* live_input = calloc(1, sizeof(LiveInput));
+    LoadGenerator* generator = calloc(1, sizeof(LoadGenerator));
+    float* block = malloc(voices.block_size * sizeof(float));
+    int16_t* pcm = malloc(voices.block_size * sizeof(int16_t));
+    int result = -1;
+    if (!scheduler || !live_input || !generator || !block || !pcm) {
+        goto done;
+    }
+
+    live_input->fd = input;
+    live_input->closed = input < 0;
+    if (input >= 0) {
+        fcntl(input, F_SETFL, fcntl(input, F_GETFL) | O_NONBLOCK);
+    }
+    generator->rate = config->load;
+    generator->state = config->seed;
+
+    memset(stats, 0, sizeof(LiveStats));
+    stats->block_seconds = (double)voices.block_size / sample_rate;
+    const size_t end = (size_t)(config->duration * sample_rate);
+    const double start = now_seconds();
+
+    for (;;) {
+        const size_t position = scheduler->position;
+        if (end ? position >= end
+                : live_input->closed && !live_input->has_pending && sounding_voices(scheduler) == 0) {
+            break;
+        }
+        const double release = config->realtime ? start + stats->blocks * stats->block_seconds : now_seconds();
+        const double deadline = release + stats->block_seconds;
+
+        read_events(live_input, scheduler, (double)(position + voices.block_size) / sample_rate, stats);
+        if (generator->rate > 0.0f) {
+            generate_events(generator, scheduler, stats->block_seconds);
+        }
+
+        const double render_start = now_seconds();
+        render_voice_block(scheduler, block);
+        const double render = now_seconds() - render_start;
+        if (output && write_block(output, block, pcm, voices.block_size) != 0) {
+            goto done;
+        }
+
+        const double finished = now_seconds();
+        stats->blocks++;
+        stats->render_seconds += render;
+        if (render > stats->max_render_seconds) {
+            stats->max_render_seconds = render;
+        }
+        if (finished > deadline) {
+            stats->missed_deadlines++;
+            if (finished - deadline > stats->max_lateness) {
+                stats->max_lateness = finished - deadline;
+            }
+        }
+        if (config->realtime) {
+            sleep_until(deadline);
+        }
+    }
+    stats->voices = scheduler->stats;
+    result = 0;
+
+done:
+    free(pcm);
+    free(block);
+    free(generator);
+    free(live_input);
+    free_voice_scheduler(scheduler);
+    return result;
+}
@@ -0,0 +1,52 @@
+#pragma once
+
+#include <stddef.h>
+#include <stdint.h>
+#include <stdio.h>
+
+#include "voice.h"
+
+#define LIVE_DEFAULT_LATENCY 0.005f  // seconds of audio per block
+#define LIVE_BUFFER_SIZE 4096
+#define LIVE_LOAD_MIN_HOLD 0.1f
+#define LIVE_LOAD_MAX_HOLD 1.0f
+
+typedef enum {
+  LIVE_NOTE_ON,
+  LIVE_NOTE_OFF
+} LiveEventType;
+
+// One text line: "[@seconds] on <pitch> <velocity>" or "[@seconds] off <pitch>".
+// Without a time the event applies at the next block.
+typedef struct {
+  LiveEventType type;
+  uint8_t pitch;
+  uint8_t velocity;
+  double time;  // seconds of output audio, negative = as soon as it arrives
+} LiveEvent;
+
+typedef struct {
+  VoiceConfig voices;  // block_size is derived from latency
+  float latency;       // target seconds of audio per block
+  int realtime;        // pace blocks against the wall clock; otherwise render as fast as possible
+  double duration;     // stop after this many seconds of audio, 0 = when the input closes and voices finish
+  float load;          // generated notes per second on top of the input, for load tests
+  unsigned seed;
+} LiveConfig;
+
+typedef struct {
+  uint64_t events;
+  uint64_t invalid_events;
+  uint64_t blocks;
+  uint64_t missed_deadlines;  // blocks whose audio was not ready when it was due
+  double block_seconds;
+  double render_seconds;      // total time spent rendering blocks
+  double max_render_seconds;
+  double max_lateness;        // worst time a block was written after its deadline
+  VoiceStats voices;
+} LiveStats;
+
+LiveConfig default_live_config(void);
+int parse_live_event(const char *line, LiveEvent *event);
+void apply_live_event(VoiceScheduler *scheduler, const LiveEvent *event);
+int run_live(int input, FILE *output, const LiveConfig *config, LiveStats *stats);
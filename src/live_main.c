@@ -0,0 +1,148 @@
+#define _POSIX_C_SOURCE 200809L
+
+#include <fcntl.h>
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <sys/socket.h>
+#include <sys/un.h>
+#include <unistd.h>
+
+#include "live.h"
+#include "weights_blob.h"
+
+static void usage(const char* program) {
+    fprintf(stderr,
+            "Usage: %s [options]\n"
+            "Reads note events, one per line, and writes 16-bit mono PCM:\n"
+            "  [@seconds] on <pitch> <velocity>\n"
+            "  [@seconds] off <pitch>\n"
+            "Options:\n"
+            "  --input PATH       events from a file or FIFO (default: stdin, '-' for stdin)\n"
+            "  --listen PATH      accept one client on a Unix socket and read its events\n"
+            "  --output PATH      PCM output (default: stdout, 'none' to discard)\n"
+            "  --latency MS       audio per block (default: %.0f)\n"
+            "  --voices N         maximum polyphony (default: %d)\n"
+            "  --steal POLICY     quietest or oldest (default: quietest)\n"
+            "  --budget N         oscillator samples per block, 0 = unlimited (default: 0)\n"
+            "  --duration S       stop after S seconds of audio (default: when input closes)\n"
+            "  --load N           add N generated notes per second, for load tests\n"
+            "  --free-run         render as fast as possible instead of in real time\n"
+            "Play with: %s | aplay -f S16_LE -c 1 -r <sample rate>\n",
+            program, LIVE_DEFAULT_LATENCY * 1e3, DEFAULT_MAX_VOICES, program);
+}
+
+static int listen_unix(const char* path) {
+    const int server = socket(AF_UNIX, SOCK_STREAM, 0);
+    struct sockaddr_un address;
+    memset(&address, 0, sizeof(address));
+    address.sun_family = AF_UNIX;
+    if (server < 0 || strlen(path) >= sizeof(address.sun_path)) {
+        return -1;
+    }
+    strcpy(address.sun_path, path);
+    unlink(path);
+    if (bind(server, (struct sockaddr*)&address, sizeof(address)) != 0 || listen(server, 1) != 0) {
+        close(server);
+        return -1;
+    }
+    fprintf(stderr, "Waiting for a client on %s\n", path);
+    const int client = accept(server, NULL, NULL);
+    close(server);
+    unlink(path);
+    return client;
+}
+
+int main(int argc, char** argv) {
+    init_weights();
+    init_render_settings();
+
+    LiveConfig config = default_live_config();
+    const char* input_path = "-";
+    const char* listen_path = NULL;
+    const char* output_path = "-";
+    for (int i = 1; i < argc; i++) {
+        const char* option = argv[i];
+        const char* value = i + 1 < argc ? argv[i + 1] : NULL;
+        if (strcmp(option, "--free-run") == 0) {
+            config.realtime = 0;
+            continue;
+        }
+        if (!value) {
+            usage(argv[0]);
+            return 1;
+        }
+        i++;
+        if (strcmp(option, "--input") == 0) {
+            input_path = value;
+        } else if (strcmp(option, "--listen") == 0) {
+            listen_path = value;
+        } else if (strcmp(option, "--output") == 0) {
+            output_path = value;
+        } else if (strcmp(option, "--latency") == 0) {
+            config.latency = atof(value) * 1e-3f;
+        } else if (strcmp(option, "--voices") == 0) {
+            config.voices.max_voices = atoi(value);
+        } else if (strcmp(option, "--steal") == 0) {
+            config.voices.steal = strcmp(value, "oldest") == 0 ? STEAL_OLDEST : STEAL_QUIETEST;
+        } else if (strcmp(option, "--budget") == 0) {
+            config.voices.budget = strtoull(value, NULL, 10);
+        } else if (strcmp(option, "--duration") == 0) {
+            config.duration = atof(value);
+        } else if (strcmp(option, "--load") == 0) {
+            config.load = atof(value);
+        } else {
+            usage(argv[0]);
+            return 1;
+        }
+    }
+
+    int input = -1;
+    if (listen_path) {
+        input = listen_unix(listen_path);
+    } else if (strcmp(input_path, "none") != 0) {
+        input = strcmp(input_path, "-") == 0 ? STDIN_FILENO : open(input_path, O_RDONLY);
+    }
+    if (input < 0 && (listen_path || strcmp(input_path, "none") != 0)) {
+        fprintf(stderr, "Could not open the event input\n");
+        return 1;
+    }
+
+    FILE* output = NULL;
+    if (strcmp(output_path, "-") == 0) {
+        output = stdout;
+    } else if (strcmp(output_path, "none") != 0) {
+        output = fopen(output_path, "wb");
+        if (!output) {
+            fprintf(stderr, "Could not open %s\n", output_path);
+            return 1;
+        }
+    }
+
+    const RenderSettings* settings = current_render_settings();
+    fprintf(stderr, "Live: %s quality, %d Hz, %.1f ms blocks, %zu voices%s\n", settings->name,
+            settings->sample_rate, config.latency * 1e3, config.voices.max_voices,
+            config.realtime ? "" : ", free-running");
+
+    LiveStats stats;
+    if (run_live(input, output, &config, &stats) != 0) {
+        fprintf(stderr, "Live rendering failed (check --latency, and --duration without input)\n");
+        return 1;
+    }
+    if (output && output != stdout) {
+        fclose(output);
+    }
+
+    const double audio = stats.blocks * stats.block_seconds;
+    fprintf(stderr, "Events: %llu (%llu invalid), notes: %llu, steals: %llu, peak polyphony: %zu\n",
+            (unsigned long long)stats.events, (unsigned long long)stats.invalid_events,
+            (unsigned long long)stats.voices.notes, (unsigned long long)stats.voices.steals,
+            stats.voices.peak_polyphony);
+    fprintf(stderr, "Blocks: %llu (%.2f s of audio), render load %.1f%%, worst block %.2f ms of %.2f ms\n",
+            (unsigned long long)stats.blocks, audio, audio > 0.0 ? 100.0 * stats.render_seconds / audio : 0.0,
+            stats.max_render_seconds * 1e3, stats.block_seconds * 1e3);
+    fprintf(stderr, "Missed deadlines: %llu, worst lateness %.2f ms, worst input latency %.2f ms\n",
+            (unsigned long long)stats.missed_deadlines, stats.max_lateness * 1e3,
+            (stats.block_seconds + stats.max_render_seconds) * 1e3);
+    return stats.missed_deadlines ? 2 : 0;
+}
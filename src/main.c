@@ -8,6 +8,10 @@
 #include "song.h"
 #include "synth.h"
 
+#ifndef TINYHEADER
+#include "weights_blob.h"
+#endif
+
 #define FRAME_SIZE 1024
 
 
@@ -18,8 +22,8 @@ void play_audio(float* buffer, size_t samples) {
     WAVEFORMATEX wfx = {
         1,
         2,
-        SAMPLE_RATE,
-        SAMPLE_RATE * 2 * 2,
+        current_render_settings()->sample_rate,
+        current_render_settings()->sample_rate * 2 * 2,
         4,
         16,
         0
@@ -65,9 +69,13 @@ void play_audio(float* buffer, size_t samples) {
 
 
 int main() {
+#ifndef TINYHEADER
+    init_weights();
+    init_render_settings();
+#endif
     Song* song = create_midi_song();
     const float song_duration = song->total_ticks * UNIT(song->bpm) + FADE_OUT_DURATION;
-    const size_t total_samples = (size_t)(song_duration * SAMPLE_RATE);
+    const size_t total_samples = (size_t)(song_duration * current_render_settings()->sample_rate);
     float* buffer = malloc(total_samples * sizeof(float));
 
 #ifdef PRINT
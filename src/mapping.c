@@ -0,0 +1,61 @@
+#ifdef _WIN32
+#include <windows.h>
+#else
+#include <fcntl.h>
+#include <sys/mman.h>
+#include <sys/stat.h>
+#include <unistd.h>
+#endif
+
+#include "mapping.h"
+
+#ifdef _WIN32
+void* map_file(const char* path, size_t* size) {
+    HANDLE file = CreateFileA(path, GENERIC_READ, FILE_SHARE_READ, NULL, OPEN_EXISTING, FILE_ATTRIBUTE_NORMAL, NULL);
+    if (file == INVALID_HANDLE_VALUE) return NULL;
+
+    LARGE_INTEGER file_size;
+    if (!GetFileSizeEx(file, &file_size) || file_size.QuadPart == 0) {
+        CloseHandle(file);
+        return NULL;
+    }
+
+    HANDLE mapping = CreateFileMappingA(file, NULL, PAGE_READONLY, 0, 0, NULL);
+    CloseHandle(file);
+    if (!mapping) return NULL;
+
+    void* data = MapViewOfFile(mapping, FILE_MAP_READ, 0, 0, 0);
+    CloseHandle(mapping);
+    if (!data) return NULL;
+
+    *size = (size_t)file_size.QuadPart;
+    return data;
+}
+
+void unmap_file(void* data, size_t size) {
+    (void)size;
+    UnmapViewOfFile(data);
+}
+#else
+void* map_file(const char* path, size_t* size) {
+    int fd = open(path, O_RDONLY);
+    if (fd < 0) return NULL;
+
+    struct stat st;
+    if (fstat(fd, &st) != 0 || st.st_size == 0) {
+        close(fd);
+        return NULL;
+    }
+
+    void* data = mmap(NULL, (size_t)st.st_size, PROT_READ, MAP_PRIVATE, fd, 0);
+    close(fd);
+    if (data == MAP_FAILED) return NULL;
+
+    *size = (size_t)st.st_size;
+    return data;
+}
+
+void unmap_file(void* data, size_t size) {
+    munmap(data, size);
+}
+#endif
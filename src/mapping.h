@@ -0,0 +1,6 @@
+#pragma once
+
+#include <stddef.h>
+
+void *map_file(const char *path, size_t *size);
+void unmap_file(void *data, size_t size);
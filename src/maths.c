@@ -61,3 +61,60 @@ float tiny_pow(float base, float exp) {
     if (exp == 0.0f) return 1.0f;
     return tiny_exp(exp * tiny_ln(base));
 }
+
+#define EXP_MIN -87.0f
+#define EXP_MAX 88.0f
+#define LOG2E 1.44269504f
+#define LN2 0.69314718f
+
+typedef union {
+    float f;
+    int i;
+} FloatBits;
+
+static float clamp_exp_input(float x) {
+    return tiny_fmin(tiny_fmax(x, EXP_MIN), EXP_MAX);
+}
+
+static int round_to_int(float x) {
+    return (int)(x + ((x >= 0.0f) ? 0.5f : -0.5f));
+}
+
+static float exp2_int(int n) {
+    FloatBits bits;
+    bits.i = (n + 127) << 23;
+    return bits.f;
+}
+
+float tiny_exp_poly(float x) {
+    const float y = clamp_exp_input(x) * LOG2E;
+    const int n = round_to_int(y);
+    const float f = (y - n) * LN2;
+    const float p = 1.0f + f * (1.0f + f * (0.5f + f * (1.0f / 6.0f + f * (1.0f / 24.0f + f * (1.0f / 120.0f)))));
+    return p * exp2_int(n);
+}
+
+float tiny_exp_bits(float x) {
+    FloatBits bits;
+    bits.i = (int)(12102203.0f * clamp_exp_input(x)) + 1064866805;
+    return bits.f;
+}
+
+static const float exp2_table[32] = {
+    1.00000000f, 1.02189715f, 1.04427378f, 1.06714040f,
+    1.09050773f, 1.11438674f, 1.13878863f, 1.16372486f,
+    1.18920712f, 1.21524736f, 1.24185781f, 1.26905096f,
+    1.29683955f, 1.32523664f, 1.35425555f, 1.38390988f,
+    1.41421356f, 1.44518081f, 1.47682615f, 1.50916443f,
+    1.54221083f, 1.57598085f, 1.61049033f, 1.64575548f,
+    1.68179283f, 1.71861930f, 1.75625216f, 1.79470908f,
+    1.83400809f, 1.87416763f, 1.91520656f, 1.95714412f,
+};
+
+float tiny_exp_table(float x) {
+    const float y = clamp_exp_input(x) * LOG2E * 32.0f;
+    const int m = round_to_int(y);
+    const int j = m & 31;
+    const float r = (y - m) * (LN2 / 32.0f);
+    return exp2_table[j] * (1.0f + r * (1.0f + 0.5f * r)) * exp2_int((m - j) / 32);
+}
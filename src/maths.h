@@ -1,5 +1,14 @@
 #pragma once
 
+#define EXP_X87 0
+#define EXP_POLY 1
+#define EXP_BITS 2
+#define EXP_TABLE 3
+
+#ifndef EXP_APPROX
+#define EXP_APPROX EXP_X87
+#endif
+
 float tiny_fmin(float a, float b);
 float tiny_fmax(float a, float b);
 float tiny_sin(float x);
@@ -8,6 +17,20 @@ float tiny_ln(float x);
 float tiny_pow(float base, float exp);
 float tiny_fabs(float x);
 
+float tiny_exp_poly(float x);
+float tiny_exp_bits(float x);
+float tiny_exp_table(float x);
+
+#if EXP_APPROX == EXP_POLY
+#define fast_expf tiny_exp_poly
+#elif EXP_APPROX == EXP_BITS
+#define fast_expf tiny_exp_bits
+#elif EXP_APPROX == EXP_TABLE
+#define fast_expf tiny_exp_table
+#else
+#define fast_expf tiny_exp
+#endif
+
 #define fminf tiny_fmin
 #define fmaxf tiny_fmax
 #define sinf tiny_sin
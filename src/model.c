@@ -2,9 +2,14 @@
 
 #include "maths.h"
 #include "model.h"
+#include "profile.h"
+
+#ifdef FIXED_POINT
+#include "model_fixed.h"
+#endif
 
 float silu(float x) {
-    return x / (1.0f + expf(-x));
+    return x / (1.0f + fast_expf(-x));
 }
 
 void linear_layer(const float* input, const unsigned char* weights_q, const unsigned char* biases_q,
@@ -28,27 +33,63 @@ void apply_silu(float* array, int size) {
 }
 
 
-float predict_amplitude(float pitch, float velocity, float harmonic, float time) {
-    float input[INPUT_SIZE] = {pitch, velocity, harmonic, time};
+static ModelWeights builtin_weights;
+static const ModelWeights* active_weights = NULL;
 
-    float hidden1[HIDDEN1_SIZE];
-    float hidden2[HIDDEN2_SIZE];
-    float hidden3[HIDDEN3_SIZE];
-    float output[OUTPUT_SIZE];
+void use_builtin_weights(void) {
+    ModelLayer* layers = builtin_weights.layers;
+    layers[0] = (ModelLayer){weights1_q, biases1_q, weights1_min, weights1_max,
+                             biases1_min, biases1_max, INPUT_SIZE, HIDDEN1_SIZE};
+    layers[1] = (ModelLayer){weights2_q, biases2_q, weights2_min, weights2_max,
+                             biases2_min, biases2_max, HIDDEN1_SIZE, HIDDEN2_SIZE};
+    layers[2] = (ModelLayer){weights3_q, biases3_q, weights3_min, weights3_max,
+                             biases3_min, biases3_max, HIDDEN2_SIZE, HIDDEN3_SIZE};
+    layers[3] = (ModelLayer){weights_out_q, biases_out_q, weights_out_min, weights_out_max,
+                             biases_out_min, biases_out_max, HIDDEN3_SIZE, OUTPUT_SIZE};
+    active_weights = &builtin_weights;
+}
 
-    linear_layer(input, weights1_q, biases1_q, weights1_min, weights1_max, biases1_min, biases1_max,
-                 hidden1, INPUT_SIZE, HIDDEN1_SIZE);
-    apply_silu(hidden1, HIDDEN1_SIZE);
+void use_weights(const ModelWeights* weights) {
+    if (weights) {
+        active_weights = weights;
+    } else {
+        use_builtin_weights();
+    }
+}
 
-    linear_layer(hidden1, weights2_q, biases2_q, weights2_min, weights2_max, biases2_min, biases2_max,
-                 hidden2, HIDDEN1_SIZE, HIDDEN2_SIZE);
-    apply_silu(hidden2, HIDDEN2_SIZE);
+const ModelWeights* current_weights(void) {
+    if (!active_weights) {
+        use_builtin_weights();
+    }
+    return active_weights;
+}
 
-    linear_layer(hidden2, weights3_q, biases3_q, weights3_min, weights3_max, biases3_min, biases3_max,
-                 hidden3, HIDDEN2_SIZE, HIDDEN3_SIZE);
-    apply_silu(hidden3, HIDDEN3_SIZE);
+float predict_log_amplitude(const ModelWeights* weights, const float* input) {
+    float buffers[2][MAX_LAYER_SIZE];
+    const float* x = input;
 
-    linear_layer(hidden3, weights_out_q, biases_out_q, weights_out_min, weights_out_max,
-                 biases_out_min, biases_out_max, output, HIDDEN3_SIZE, OUTPUT_SIZE);
-    return expf(output[0]);
+    for (int i = 0; i < LAYER_COUNT; i++) {
+        const ModelLayer* layer = &weights->layers[i];
+        float* y = buffers[i & 1];
+        linear_layer(x, layer->weights_q, layer->biases_q, layer->weights_min, layer->weights_max,
+                     layer->biases_min, layer->biases_max, y, layer->input_size, layer->output_size);
+        if (i < LAYER_COUNT - 1) {
+            apply_silu(y, layer->output_size);
+        }
+        x = y;
+    }
+
+    return x[0];
+}
+
+float predict_amplitude(float pitch, float velocity, float harmonic, float time) {
+    PROFILE_BEGIN(timer);
+#ifdef FIXED_POINT
+    const float amplitude = predict_amplitude_fixed(pitch, velocity, harmonic, time);
+#else
+    const float input[INPUT_SIZE] = {pitch, velocity, harmonic, time};
+    const float amplitude = fast_expf(predict_log_amplitude(current_weights(), input));
+#endif
+    PROFILE_END(timer, PROFILE_MODEL, 1);
+    return amplitude;
 }
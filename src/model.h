@@ -2,6 +2,22 @@
 
 #include "weights.h"
 
+#define LAYER_COUNT 4
+#define MAX_LAYER_SIZE 64
+
+typedef struct {
+    const unsigned char *weights_q;
+    const unsigned char *biases_q;
+    float weights_min, weights_max;
+    float biases_min, biases_max;
+    int input_size;
+    int output_size;
+} ModelLayer;
+
+typedef struct {
+    ModelLayer layers[LAYER_COUNT];
+} ModelWeights;
+
 float silu(float x);
 
 void linear_layer(const float *input, const unsigned char *weights_q, const unsigned char *biases_q,
@@ -10,5 +26,11 @@ void linear_layer(const float *input, const unsigned char *weights_q, const unsi
 
 void apply_silu(float *array, int size);
 
+void use_builtin_weights(void);
+void use_weights(const ModelWeights *weights);
+const ModelWeights *current_weights(void);
+
+float predict_log_amplitude(const ModelWeights *weights, const float *input);
+
 float predict_amplitude(float pitch, float velocity, float harmonic,
                         float time);
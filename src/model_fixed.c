@@ -0,0 +1,76 @@
+#include "maths.h"
+#include "model_fixed.h"
+
+#define FIXED_ONE (1 << FIXED_ACTIVATION_SHIFT)
+#define SILU_FRACTION_MASK ((1 << SILU_TABLE_SHIFT) - 1)
+
+static int16_t saturate_int16(int64_t x) {
+    return (x > 32767) ? 32767 : (x < -32768) ? -32768 : (int16_t)x;
+}
+
+static int16_t to_fixed(float x) {
+    return saturate_int16((int64_t)(x * FIXED_ONE + 0.5f));
+}
+
+int16_t silu_fixed(int32_t x) {
+    const int32_t offset = x + 32768;
+    const int32_t index = offset >> SILU_TABLE_SHIFT;
+    const int32_t fraction = offset & SILU_FRACTION_MASK;
+    const int32_t low = silu_table[index];
+    const int32_t high = silu_table[index + 1];
+    return (int16_t)(low + (((high - low) * fraction) >> SILU_TABLE_SHIFT));
+}
+
+void linear_layer_fixed(const int16_t* input, const int8_t* weights, const int32_t* biases,
+                        int32_t multiplier, int32_t offset,
+                        int16_t* output, int input_size, int output_size) {
+    int32_t input_sum = 0;
+    for (int j = 0; j < input_size; j++) {
+        input_sum += input[j];
+    }
+
+    const int64_t shift = (int64_t)input_sum * offset + ((int64_t)1 << (FIXED_MULTIPLIER_SHIFT - 1));
+    for (int i = 0; i < output_size; i++) {
+        int32_t sum = biases[i];
+        for (int j = 0; j < input_size; j++) {
+            sum += (int32_t)input[j] * weights[i * input_size + j];
+        }
+        output[i] = saturate_int16(((int64_t)sum * multiplier + shift) >> FIXED_MULTIPLIER_SHIFT);
+    }
+}
+
+void apply_silu_fixed(int16_t* array, int size) {
+    for (int i = 0; i < size; i++) {
+        array[i] = silu_fixed(array[i]);
+    }
+}
+
+int16_t predict_log_amplitude_fixed(const int16_t* input) {
+    int16_t hidden1[HIDDEN1_SIZE];
+    int16_t hidden2[HIDDEN2_SIZE];
+    int16_t hidden3[HIDDEN3_SIZE];
+    int16_t output[OUTPUT_SIZE];
+
+    linear_layer_fixed(input, weights1_i8, biases1_i32, weights1_multiplier, weights1_offset,
+                       hidden1, INPUT_SIZE, HIDDEN1_SIZE);
+    apply_silu_fixed(hidden1, HIDDEN1_SIZE);
+
+    linear_layer_fixed(hidden1, weights2_i8, biases2_i32, weights2_multiplier, weights2_offset,
+                       hidden2, HIDDEN1_SIZE, HIDDEN2_SIZE);
+    apply_silu_fixed(hidden2, HIDDEN2_SIZE);
+
+    linear_layer_fixed(hidden2, weights3_i8, biases3_i32, weights3_multiplier, weights3_offset,
+                       hidden3, HIDDEN2_SIZE, HIDDEN3_SIZE);
+    apply_silu_fixed(hidden3, HIDDEN3_SIZE);
+
+    linear_layer_fixed(hidden3, weights_out_i8, biases_out_i32, weights_out_multiplier, weights_out_offset,
+                       output, HIDDEN3_SIZE, OUTPUT_SIZE);
+    return output[0];
+}
+
+float predict_amplitude_fixed(float pitch, float velocity, float harmonic, float time) {
+    const int16_t input[INPUT_SIZE] = {
+        to_fixed(pitch), to_fixed(velocity), to_fixed(harmonic), to_fixed(time)
+    };
+    return fast_expf((float)predict_log_amplitude_fixed(input) / FIXED_ONE);
+}
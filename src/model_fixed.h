@@ -0,0 +1,19 @@
+#pragma once
+
+#include <stdint.h>
+
+#include "weights.h"
+#include "weights_fixed.h"
+
+int16_t silu_fixed(int32_t x);
+
+void linear_layer_fixed(const int16_t *input, const int8_t *weights, const int32_t *biases,
+                        int32_t multiplier, int32_t offset,
+                        int16_t *output, int input_size, int output_size);
+
+void apply_silu_fixed(int16_t *array, int size);
+
+int16_t predict_log_amplitude_fixed(const int16_t *input);
+
+float predict_amplitude_fixed(float pitch, float velocity, float harmonic,
+                              float time);
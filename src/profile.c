@@ -0,0 +1,139 @@
+#if defined(PROFILE) && !defined(TINYHEADER)
+
+#ifndef _WIN32
+#define _POSIX_C_SOURCE 199309L
+#endif
+
+#include <stdio.h>
+#include <stdlib.h>
+
+#ifdef _WIN32
+#include <windows.h>
+#else
+#include <time.h>
+#endif
+
+#include "profile.h"
+
+#define DEFAULT_PROFILE_PATH "profile.json"
+
+typedef struct {
+    uint64_t count[PROFILE_SECTION_COUNT];
+    uint64_t ns[PROFILE_SECTION_COUNT];
+} ProfileTotals;
+
+typedef struct {
+    int pitch;
+    int velocity;
+    float duration;
+    uint64_t ns;
+    ProfileTotals totals;
+} ProfileNote;
+
+static const char* section_names[PROFILE_SECTION_COUNT] = {
+    "model", "oscillator", "alloc", "mix", "normalize"
+};
+
+static ProfileTotals totals;
+static uint64_t recorded_ns;
+static ProfileNote* notes;
+static size_t note_count;
+static size_t note_capacity;
+static ProfileTotals note_start_totals;
+static uint64_t note_start_ns;
+static int registered;
+
+uint64_t profile_now(void) {
+#ifdef _WIN32
+    static LARGE_INTEGER frequency;
+    LARGE_INTEGER counter;
+    if (!frequency.QuadPart) QueryPerformanceFrequency(&frequency);
+    QueryPerformanceCounter(&counter);
+    return (uint64_t)(counter.QuadPart / frequency.QuadPart) * 1000000000ull +
+           (uint64_t)(counter.QuadPart % frequency.QuadPart) * 1000000000ull / frequency.QuadPart;
+#else
+    struct timespec now;
+    clock_gettime(CLOCK_MONOTONIC, &now);
+    return (uint64_t)now.tv_sec * 1000000000ull + (uint64_t)now.tv_nsec;
+#endif
+}
+
+static void register_dump(void) {
+    if (!registered) {
+        registered = 1;
+        atexit(profile_dump);
+    }
+}
+
+ProfileTimer profile_begin(void) {
+    ProfileTimer timer = {profile_now(), recorded_ns};
+    return timer;
+}
+
+void profile_end(const ProfileTimer* timer, ProfileSection section, uint64_t count) {
+    // Time already recorded by nested sections is excluded, so every section reports self time
+    const uint64_t elapsed = profile_now() - timer->start - (recorded_ns - timer->nested);
+    totals.count[section] += count;
+    totals.ns[section] += elapsed;
+    recorded_ns += elapsed;
+    register_dump();
+}
+
+void profile_begin_note(int pitch, int velocity, float duration) {
+    if (note_count == note_capacity) {
+        size_t capacity = note_capacity ? note_capacity * 2 : 256;
+        ProfileNote* grown = realloc(notes, capacity * sizeof(ProfileNote));
+        if (!grown) return;
+        notes = grown;
+        note_capacity = capacity;
+    }
+    notes[note_count].pitch = pitch;
+    notes[note_count].velocity = velocity;
+    notes[note_count].duration = duration;
+    note_start_totals = totals;
+    note_start_ns = profile_now();
+    register_dump();
+}
+
+void profile_end_note(void) {
+    if (note_count == note_capacity) return;
+    ProfileNote* note = &notes[note_count++];
+    note->ns = profile_now() - note_start_ns;
+    for (int i = 0; i < PROFILE_SECTION_COUNT; i++) {
+        note->totals.count[i] = totals.count[i] - note_start_totals.count[i];
+        note->totals.ns[i] = totals.ns[i] - note_start_totals.ns[i];
+    }
+}
+
+static void write_sections(FILE* file, const ProfileTotals* sections) {
+    for (int i = 0; i < PROFILE_SECTION_COUNT; i++) {
+        fprintf(file, "%s\"%s\": {\"count\": %llu, \"ns\": %llu}", i ? ", " : "", section_names[i],
+                (unsigned long long)sections->count[i], (unsigned long long)sections->ns[i]);
+    }
+}
+
+void profile_dump(void) {
+    const char* path = getenv("TINYPIANO_PROFILE");
+    FILE* file = fopen(path ? path : DEFAULT_PROFILE_PATH, "w");
+    if (!file) return;
+
+    uint64_t notes_ns = 0;
+    for (size_t i = 0; i < note_count; i++) notes_ns += notes[i].ns;
+
+    fprintf(file, "{\n  \"clock\": \"monotonic\",\n  \"unit\": \"ns\",\n");
+    fprintf(file, "  \"total\": {\"notes\": %zu, \"ns\": %llu, \"sections\": {", note_count,
+            (unsigned long long)notes_ns);
+    write_sections(file, &totals);
+    fprintf(file, "}},\n  \"notes\": [");
+    for (size_t i = 0; i < note_count; i++) {
+        const ProfileNote* note = &notes[i];
+        fprintf(file, "%s\n    {\"pitch\": %d, \"velocity\": %d, \"duration\": %.6f, \"ns\": %llu, \"sections\": {",
+                i ? "," : "", note->pitch, note->velocity, note->duration, (unsigned long long)note->ns);
+        write_sections(file, &note->totals);
+        fprintf(file, "}}");
+    }
+    fprintf(file, "\n  ]\n}\n");
+    fclose(file);
+}
+
+#endif
@@ -0,0 +1,40 @@
+#pragma once
+
+#if defined(PROFILE) && !defined(TINYHEADER)
+
+#include <stdint.h>
+
+typedef enum {
+    PROFILE_MODEL,
+    PROFILE_OSCILLATOR,
+    PROFILE_ALLOC,
+    PROFILE_MIX,
+    PROFILE_NORMALIZE,
+    PROFILE_SECTION_COUNT
+} ProfileSection;
+
+typedef struct {
+    uint64_t start;
+    uint64_t nested;
+} ProfileTimer;
+
+uint64_t profile_now(void);
+ProfileTimer profile_begin(void);
+void profile_end(const ProfileTimer* timer, ProfileSection section, uint64_t count);
+void profile_begin_note(int pitch, int velocity, float duration);
+void profile_end_note(void);
+void profile_dump(void);
+
+#define PROFILE_BEGIN(timer) ProfileTimer timer = profile_begin()
+#define PROFILE_END(timer, section, count) profile_end(&timer, section, count)
+#define PROFILE_BEGIN_NOTE(pitch, velocity, duration) profile_begin_note(pitch, velocity, duration)
+#define PROFILE_END_NOTE() profile_end_note()
+
+#else
+
+#define PROFILE_BEGIN(timer)
+#define PROFILE_END(timer, section, count)
+#define PROFILE_BEGIN_NOTE(pitch, velocity, duration)
+#define PROFILE_END_NOTE()
+
+#endif
@@ -0,0 +1,241 @@
+#include <stdlib.h>
+#include <string.h>
+
+#include "render_cache.h"
+#include "synth.h"
+
+typedef struct {
+    size_t begin;
+    size_t end;
+} Range;
+
+typedef struct {
+    Range *ranges;
+    size_t count;
+    size_t capacity;
+} RangeList;
+
+RenderCache* create_render_cache(void) {
+    return calloc(1, sizeof(RenderCache));
+}
+
+void free_render_cache(RenderCache* cache) {
+    if (!cache) {
+        return;
+    }
+    for (size_t i = 0; i < cache->note_count; i++) {
+        free(cache->notes[i].waveform);
+    }
+    free(cache->notes);
+    free(cache->buffer);
+    free(cache);
+}
+
+static int add_range(RangeList* list, size_t begin, size_t end) {
+    if (list->count == list->capacity) {
+        size_t capacity = list->capacity ? list->capacity * 2 : 16;
+        Range* ranges = realloc(list->ranges, capacity * sizeof(Range));
+        if (!ranges) {
+            return -1;
+        }
+        list->ranges = ranges;
+        list->capacity = capacity;
+    }
+    list->ranges[list->count].begin = begin;
+    list->ranges[list->count].end = end;
+    list->count++;
+    return 0;
+}
+
+static int compare_ranges(const void* a, const void* b) {
+    const Range* x = a;
+    const Range* y = b;
+    return (x->begin > y->begin) - (x->begin < y->begin);
+}
+
+static int same_note(const CachedNote* a, const CachedNote* b) {
+    return a->pitch == b->pitch && a->velocity == b->velocity && a->duration == b->duration;
+}
+
+// Sort and merge overlapping ranges in place
+static void merge_ranges(RangeList* list) {
+    if (list->count == 0) {
+        return;
+    }
+    qsort(list->ranges, list->count, sizeof(Range), compare_ranges);
+    size_t merged = 0;
+    for (size_t i = 1; i < list->count; i++) {
+        Range* last = &list->ranges[merged];
+        if (list->ranges[i].begin <= last->end) {
+            if (list->ranges[i].end > last->end) {
+                last->end = list->ranges[i].end;
+            }
+        } else {
+            list->ranges[++merged] = list->ranges[i];
+        }
+    }
+    list->count = merged + 1;
+}
+
+static int reserve_buffer(RenderCache* cache, size_t length) {
+    if (length > cache->capacity) {
+        size_t capacity = cache->capacity ? cache->capacity : 1024;
+        while (capacity < length) {
+            capacity *= 2;
+        }
+        float* buffer = realloc(cache->buffer, capacity * sizeof(float));
+        if (!buffer) {
+            return -1;
+        }
+        memset(buffer + cache->capacity, 0, (capacity - cache->capacity) * sizeof(float));
+        cache->buffer = buffer;
+        cache->capacity = capacity;
+    }
+    return 0;
+}
+
+// Zero each dirty range and mix back every cached note overlapping it, in song order,
+// so the result is bit-identical to render_song
+static void remix_ranges(RenderCache* cache, const RangeList* dirty) {
+    for (size_t r = 0; r < dirty->count; r++) {
+        const size_t begin = dirty->ranges[r].begin;
+        const size_t end = dirty->ranges[r].end;
+        memset(cache->buffer + begin, 0, (end - begin) * sizeof(float));
+
+        for (size_t i = 0; i < cache->note_count && cache->notes[i].start < end; i++) {
+            const CachedNote* note = &cache->notes[i];
+            const size_t note_end = note->start + note->size;
+            if (note_end <= begin) {
+                continue;
+            }
+            const size_t from = note->start > begin ? note->start : begin;
+            const size_t to = note_end < end ? note_end : end;
+            for (size_t sample = from; sample < to; sample++) {
+                cache->buffer[sample] += note->waveform[sample - note->start];
+            }
+        }
+    }
+}
+
+long update_render_cache(RenderCache* cache, const Song* song) {
+    const double unit = UNIT(song->bpm);
+    const RenderSettings* settings = current_render_settings();
+    CachedNote* notes = calloc(song->note_count ? song->note_count : 1, sizeof(CachedNote));
+    RangeList dirty = {0};
+    if (!notes) {
+        return -1;
+    }
+
+    uint32_t ticks = 0;
+    size_t length = 0;
+    for (size_t i = 0; i < song->note_count; i++) {
+        const Note* note = &song->notes[i];
+        ticks += note->delta;
+        notes[i].tick = ticks;
+        notes[i].pitch = note->pitch;
+        notes[i].velocity = note->velocity;
+        notes[i].duration = note->duration;
+        notes[i].start = (size_t)(ticks * unit * settings->sample_rate);
+        notes[i].size = note_size(note->duration * unit);
+        if (notes[i].start + notes[i].size > length) {
+            length = notes[i].start + notes[i].size;
+        }
+    }
+
+    // A tempo change moves every note and new render settings change every waveform,
+    // so nothing can be reused
+    const int reuse = cache->bpm == song->bpm &&
+                      cache->settings.sample_rate == settings->sample_rate &&
+                      cache->settings.harmonics == settings->harmonics &&
+                      cache->settings.control_tolerance == settings->control_tolerance &&
+                      cache->settings.gain_mode == settings->gain_mode;
+
+    // Both note lists are in start order; match identical notes tick by tick
+    size_t i = 0;
+    size_t j = 0;
+    while (reuse && i < cache->note_count && j < song->note_count) {
+        if (cache->notes[i].tick != notes[j].tick) {
+            if (cache->notes[i].tick < notes[j].tick) {
+                i++;
+            } else {
+                j++;
+            }
+            continue;
+        }
+
+        const uint32_t tick = notes[j].tick;
+        size_t old_end = i;
+        while (old_end < cache->note_count && cache->notes[old_end].tick == tick) {
+            old_end++;
+        }
+        for (; j < song->note_count && notes[j].tick == tick; j++) {
+            for (size_t k = i; k < old_end; k++) {
+                CachedNote* old = &cache->notes[k];
+                if (old->waveform && same_note(old, &notes[j])) {
+                    notes[j].waveform = old->waveform;
+                    old->waveform = NULL;
+                    break;
+                }
+            }
+        }
+        i = old_end;
+    }
+
+    long rendered = 0;
+    int failed = reserve_buffer(cache, length);
+
+    // Notes left in the old list were removed or changed
+    for (size_t k = 0; k < cache->note_count; k++) {
+        CachedNote* old = &cache->notes[k];
+        if (old->waveform) {
+            failed |= add_range(&dirty, old->start, old->start + old->size);
+            free(old->waveform);
+        }
+    }
+
+    for (size_t k = 0; k < song->note_count && !failed; k++) {
+        CachedNote* note = &notes[k];
+        if (note->waveform) {
+            continue;
+        }
+        note->waveform = calloc(note->size, sizeof(float));
+        if (!note->waveform || add_range(&dirty, note->start, note->start + note->size)) {
+            failed = 1;
+            break;
+        }
+        render_note(note->waveform, note->pitch, note->velocity, note->duration * unit);
+        rendered++;
+    }
+
+    free(cache->notes);
+    cache->notes = notes;
+    cache->note_count = song->note_count;
+    cache->bpm = song->bpm;
+    cache->settings = *settings;
+
+    if (failed) {
+        // Leave an empty cache that re-renders everything next time
+        for (size_t k = 0; k < cache->note_count; k++) {
+            free(cache->notes[k].waveform);
+        }
+        cache->note_count = 0;
+        cache->length = 0;
+        if (cache->buffer) {
+            memset(cache->buffer, 0, cache->capacity * sizeof(float));
+        }
+        free(dirty.ranges);
+        return -1;
+    }
+
+    // The tail of a song that got shorter is cleared as part of the removed notes' ranges
+    merge_ranges(&dirty);
+    remix_ranges(cache, &dirty);
+    cache->length = length;
+    free(dirty.ranges);
+    return rendered;
+}
+
+const float* render_cache_buffer(const RenderCache* cache, size_t* length) {
+    *length = cache->length;
+    return cache->buffer;
+}
@@ -0,0 +1,32 @@
+#pragma once
+
+#include <stddef.h>
+#include <stdint.h>
+
+#include "song.h"
+
+typedef struct {
+  uint32_t tick;
+  uint8_t pitch;
+  uint8_t velocity;
+  uint32_t duration;
+  size_t start;
+  size_t size;
+  float *waveform;
+} CachedNote;
+
+typedef struct {
+  CachedNote *notes;
+  size_t note_count;
+  uint16_t bpm;
+  RenderSettings settings;
+  float *buffer;
+  size_t length;
+  size_t capacity;
+} RenderCache;
+
+RenderCache *create_render_cache(void);
+void free_render_cache(RenderCache *cache);
+long update_render_cache(RenderCache *cache, const Song *song);
+// The mixed song and its length in samples, for hosts that cannot read the struct
+const float *render_cache_buffer(const RenderCache *cache, size_t *length);
@@ -6,45 +6,71 @@
 #include "song.h"
 #include "synth.h"
 
+uint32_t song_total_ticks(const Note* notes, size_t note_count) {
+    uint32_t start = 0;
+    uint32_t total_ticks = 0;
+    for (size_t i = 0; i < note_count; i++) {
+        start += notes[i].delta;
+        uint32_t note_end = start + notes[i].duration;
+        if (note_end > total_ticks) {
+            total_ticks = note_end;
+        }
+    }
+    return total_ticks;
+}
+
 Song* create_song(const Note* notes, size_t note_count, uint16_t bpm) {
     Song* song = malloc(sizeof(Song));
-    song->notes = malloc(note_count * sizeof(Note));
-    if (!song->notes) {
-        free(song);
+    if (!song) {
         return NULL;
     }
 
-    for (size_t i = 0; i < note_count; i++) {
-        song->notes[i] = notes[i];
-    }
-
+    song->notes = notes;
     song->note_count = note_count;
     song->bpm = bpm;
-
-    song->total_ticks = 0;
-    for (size_t i = 0; i < note_count; i++) {
-        uint16_t note_end = notes[i].start + notes[i].duration;
-        if (note_end > song->total_ticks) {
-            song->total_ticks = note_end;
-        }
-    }
-
+    song->total_ticks = song_total_ticks(notes, note_count);
     return song;
 }
 
 void free_song(Song* song) {
-    if (song) {
-        free(song->notes);
-        free(song);
+    free(song);
+}
+
+// Samples render_song writes: up to the end of the latest note's fade-out
+size_t song_size(const Song *song) {
+    const double unit = UNIT(song->bpm);
+    const int sample_rate = current_render_settings()->sample_rate;
+    uint32_t ticks = 0;
+    size_t size = 0;
+    for (size_t i = 0; i < song->note_count; i++) {
+        ticks += song->notes[i].delta;
+        const size_t end = (size_t)(ticks * unit * sample_rate) + note_size(song->notes[i].duration * unit);
+        if (end > size) {
+            size = end;
+        }
     }
+    return size;
 }
 
 void render_song(const Song *song, float *buffer) {
-    const float unit = UNIT(song->bpm);
+    render_song_range(song, 0, song_size(song), buffer);
+}
+
+// Render song samples [first, last) into buffer, which holds last - first zeroed samples.
+// Notes that started earlier are picked up mid-note, and notes still sounding at last are
+// cut there, so consecutive ranges concatenate to exactly what render_song writes.
+void render_song_range(const Song *song, size_t first, size_t last, float *buffer) {
+    const double unit = UNIT(song->bpm);
+    const int sample_rate = current_render_settings()->sample_rate;
+    uint32_t ticks = 0;
     for (size_t i = 0; i < song->note_count; i++) {
         const Note *note = &song->notes[i];
-        const size_t start = note->start * unit * SAMPLE_RATE;
+        ticks += note->delta;
+        const size_t start = (size_t)(ticks * unit * sample_rate);
+        if (start >= last) {
+            break;
+        }
         const float duration = note->duration * unit;
-        synthesize_note(buffer, start, note->pitch, note->velocity, duration);
+        synthesize_note_range(buffer, first, last, start, note->pitch, note->velocity, duration);
     }
 }
@@ -3,7 +3,8 @@
 #include <stddef.h>
 #include <stdint.h>
 
-#define SAMPLE_RATE 48000
+#include "synth.h"
+
 #define TICKS_PER_QUARTER 480
 #define DEFAULT_BPM 120
 #define UNIT(bpm) (60.0f / ((bpm) * TICKS_PER_QUARTER))
@@ -11,18 +12,21 @@
 typedef struct {
   uint8_t pitch;
   uint8_t velocity;
-  uint16_t start;
-  uint16_t duration;
   uint16_t _padding;
+  uint32_t delta;
+  uint32_t duration;
 } Note;
 
 typedef struct {
-  Note *notes;
+  const Note *notes;
   size_t note_count;
   uint16_t bpm;
-  uint16_t total_ticks;
+  uint32_t total_ticks;
 } Song;
 
+uint32_t song_total_ticks(const Note *notes, size_t note_count);
 Song *create_song(const Note *notes, size_t note_count, uint16_t bpm);
 void free_song(Song *song);
+size_t song_size(const Song *song);
 void render_song(const Song *song, float *buffer);
+void render_song_range(const Song *song, size_t first, size_t last, float *buffer);
@@ -0,0 +1,67 @@
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+
+#include "mapping.h"
+#include "song_file.h"
+
+typedef struct {
+    Song song;
+    void* data;
+    size_t size;
+} MappedSong;
+
+static int validate_header(const SongFileHeader* header, size_t size) {
+    if (size < sizeof(SongFileHeader)) return 0;
+    if (memcmp(header->magic, SONG_FILE_MAGIC, 4) != 0) return 0;
+    if (header->version != SONG_FILE_VERSION) return 0;
+    if (header->ticks_per_quarter != TICKS_PER_QUARTER || header->bpm == 0) return 0;
+    return (size - sizeof(SongFileHeader)) / sizeof(Note) >= header->note_count;
+}
+
+Song* load_song(const char* path) {
+    size_t size = 0;
+    void* data = map_file(path, &size);
+    if (!data) return NULL;
+
+    const SongFileHeader* header = (const SongFileHeader*)data;
+    MappedSong* mapped = validate_header(header, size) ? malloc(sizeof(MappedSong)) : NULL;
+    if (!mapped) {
+        unmap_file(data, size);
+        return NULL;
+    }
+
+    mapped->song.notes = (const Note*)((const char*)data + sizeof(SongFileHeader));
+    mapped->song.note_count = header->note_count;
+    mapped->song.bpm = header->bpm;
+    mapped->song.total_ticks = header->total_ticks;
+    mapped->data = data;
+    mapped->size = size;
+    return &mapped->song;
+}
+
+void unload_song(Song* song) {
+    if (!song) return;
+
+    MappedSong* mapped = (MappedSong*)song;
+    unmap_file(mapped->data, mapped->size);
+    free(mapped);
+}
+
+int save_song(const char* path, const Song* song) {
+    FILE* file = fopen(path, "wb");
+    if (!file) return -1;
+
+    SongFileHeader header;
+    memset(&header, 0, sizeof(header));
+    memcpy(header.magic, SONG_FILE_MAGIC, 4);
+    header.version = SONG_FILE_VERSION;
+    header.note_count = (uint32_t)song->note_count;
+    header.total_ticks = song->total_ticks;
+    header.bpm = song->bpm;
+    header.ticks_per_quarter = TICKS_PER_QUARTER;
+
+    fwrite(&header, sizeof(header), 1, file);
+    fwrite(song->notes, sizeof(Note), song->note_count, file);
+    return fclose(file) == 0 ? 0 : -1;
+}
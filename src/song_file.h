@@ -0,0 +1,21 @@
+#pragma once
+
+#include <stdint.h>
+
+#include "song.h"
+
+#define SONG_FILE_MAGIC "TPSG"
+#define SONG_FILE_VERSION 1
+
+typedef struct {
+    char magic[4];
+    uint32_t version;
+    uint32_t note_count;
+    uint32_t total_ticks;
+    uint16_t bpm;
+    uint16_t ticks_per_quarter;
+} SongFileHeader;
+
+Song *load_song(const char *path);
+void unload_song(Song *song);
+int save_song(const char *path, const Song *song);
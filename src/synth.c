@@ -4,65 +4,380 @@
 
 #include "maths.h"
 #include "model.h"
+#include "profile.h"
 #include "synth.h"
 
 #ifndef M_PI
 #define M_PI 3.14159265358979323846
 #endif
 
+const RenderSettings quality_tiers[QUALITY_TIER_COUNT] = {
+    {"draft", 22050, 12, 0.08f, GAIN_ESTIMATE},
+    {"preview", 32000, 20, 0.04f, GAIN_ESTIMATE},
+    {"final", SAMPLE_RATE, MAX_HARMONICS, CONTROL_TOLERANCE, GAIN_ESTIMATE},
+};
+
+static const RenderSettings* settings = &quality_tiers[QUALITY_FINAL];
+
+void use_render_settings(const RenderSettings* render_settings) {
+    settings = render_settings;
+}
+
+const RenderSettings* current_render_settings(void) {
+    return settings;
+}
+
+const RenderSettings* find_quality_tier(const char* name) {
+    for (int tier = 0; tier < QUALITY_TIER_COUNT; tier++) {
+        if (strcmp(quality_tiers[tier].name, name) == 0) {
+            return &quality_tiers[tier];
+        }
+    }
+    return NULL;
+}
+
+int init_render_settings(void) {
+    const char* name = getenv(QUALITY_ENV);
+    const RenderSettings* tier = name ? find_quality_tier(name) : NULL;
+    if (tier) {
+        use_render_settings(tier);
+        return 1;
+    }
+    return 0;
+}
+
 float calculate_frequency(int pitch) {
     return 440.0f * powf(2.0f, (pitch - 69) / 12.0f);
 }
 
-void synthesize_note(
-    float* buffer, size_t start,
-    int pitch, int velocity, float duration
-) {
-    const float p = pitch / 127.0f;
-    const float v = velocity / 127.0f;
+// Harmonics rendered for a pitch: the tier's count, without any above Nyquist
+int note_harmonics(int pitch) {
+    const int below_nyquist = (int)(0.5f * settings->sample_rate / calculate_frequency(pitch));
+    return below_nyquist < settings->harmonics ? below_nyquist : settings->harmonics;
+}
 
-    const float fundamental = calculate_frequency(pitch);
-    const float e = 1.0f / ESTIMATION_FREQUENCY;
-    const size_t estimation_samples = e * SAMPLE_RATE;
-    const size_t size = (duration + FADE_OUT_DURATION) * SAMPLE_RATE;
+float note_envelope(float t, float duration) {
+    const float fade_in = t / FADE_IN_DURATION;
+    const float fade_out = (duration + FADE_OUT_DURATION - t) / FADE_OUT_DURATION;
+    return fminf(1.0f, fminf(fade_in, fade_out));
+}
 
-    float* waveform = (float*)calloc(size, sizeof(float));
-    for (uint8_t harmonic = 0; harmonic < MAX_HARMONICS; ++harmonic) {
+static float evaluate_control(ControlSchedule* control, float t, float* amplitude) {
+    const float envelope = note_envelope(t, control->duration);
+    if (envelope <= 0.0f) {
+        memset(amplitude, 0, MAX_HARMONICS * sizeof(float));
+        return 0.0f;
+    }
+
+    float sum = 0.0f;
+    for (int harmonic = 0; harmonic < control->harmonics; ++harmonic) {
         const float h = harmonic / (MAX_HARMONICS - 1.0f);
-        const float f = 2.0f * M_PI * fundamental * (harmonic + 1);
+        amplitude[harmonic] = predict_amplitude(control->pitch, control->velocity, h, t) * envelope;
+        sum += amplitude[harmonic];
+    }
+    control->evaluations++;
+    return sum;
+}
 
-        float amplitude = 0.0f;
-        float next_amplitude = 0.0f;
-        for (size_t sample = 0; sample < size; ++sample) {
-            const float t = (float)sample / SAMPLE_RATE;
-            const size_t m = sample % estimation_samples;
-
-            if (m == 0) {
-                amplitude = next_amplitude;
-                next_amplitude = predict_amplitude(p, v, h, t + e);
-                const float fade_in = t / FADE_IN_DURATION;
-                const float fade_out = (duration + FADE_OUT_DURATION - t) / FADE_OUT_DURATION;
-                const float envelope = fminf(fade_in, fade_out);
-                next_amplitude *= fminf(1.0f, envelope);
-            }
+void begin_control(ControlSchedule* control, int pitch, int velocity, float duration) {
+    control->pitch = pitch / 127.0f;
+    control->velocity = velocity / 127.0f;
+    control->duration = duration;
+    control->harmonics = note_harmonics(pitch);
+    control->tolerance = settings->control_tolerance;
+    control->time = 0.0f;
+    control->step = CONTROL_MIN_STEP;
+    control->peak = 0.0f;
+    control->pending = 0;
+    control->evaluations = 0;
+    memset(control->amplitude, 0, sizeof(control->amplitude));
+}
+
+// Advance to the next control point. Each candidate step is checked at its midpoint:
+// if the midpoint is within the tolerance (of the note's peak) of the straight line,
+// both the midpoint and the end are kept and the step grows; otherwise the step halves.
+int next_control_point(ControlSchedule* control) {
+    const float end = control->duration + FADE_OUT_DURATION;
+    if (control->time >= end) {
+        return 0;
+    }
+    if (control->pending) {
+        control->time = control->pending_time;
+        memcpy(control->amplitude, control->pending_amplitude, sizeof(control->amplitude));
+        control->pending = 0;
+        return 1;
+    }
+
+    // The envelope bends at the end of the fade-in and the start of the fade-out
+    float limit = end;
+    if (control->time < FADE_IN_DURATION && FADE_IN_DURATION < limit) {
+        limit = FADE_IN_DURATION;
+    } else if (control->time < control->duration) {
+        limit = control->duration;
+    }
+
+    float sum = 0.0f;
+    for (int harmonic = 0; harmonic < control->harmonics; ++harmonic) {
+        sum += control->amplitude[harmonic];
+    }
+
+    float step = fminf(control->step, limit - control->time);
+    float target[MAX_HARMONICS] = {0};
+    float middle[MAX_HARMONICS] = {0};
+    float target_sum = evaluate_control(control, control->time + step, target);
+    int split = 0;
+    while (step > CONTROL_MIN_STEP) {
+        const float middle_sum = evaluate_control(control, control->time + 0.5f * step, middle);
+        float error = 0.0f;
+        for (int harmonic = 0; harmonic < control->harmonics; ++harmonic) {
+            error += fabsf(middle[harmonic] - 0.5f * (control->amplitude[harmonic] + target[harmonic]));
+        }
+        const float scale = fmaxf(control->peak, fmaxf(sum, target_sum));
+        if (error <= control->tolerance * scale) {
+            split = 1;
+            break;
+        }
+        step *= 0.5f;
+        memcpy(target, middle, sizeof(target));
+        target_sum = middle_sum;
+    }
+
+    control->peak = fmaxf(control->peak, target_sum);
+    control->step = fminf(step * CONTROL_GROWTH, CONTROL_MAX_STEP);
+    if (split) {
+        control->pending = 1;
+        control->pending_time = control->time + step;
+        memcpy(control->pending_amplitude, target, sizeof(target));
+        control->time += 0.5f * step;
+        memcpy(control->amplitude, middle, sizeof(middle));
+    } else {
+        control->time += step;
+        memcpy(control->amplitude, target, sizeof(target));
+    }
+    if (limit - control->time < 1e-4f) {
+        control->time = limit;
+    }
+    return 1;
+}
+
+size_t note_size(float duration) {
+    return (duration + FADE_OUT_DURATION) * settings->sample_rate;
+}
+
+// The peak of sum_h a_h sin((h + 1) theta) over one period, sampled on PEAK_GRID phases
+float harmonic_peak(const float* amplitude, int harmonics) {
+    static float sine[PEAK_GRID];
+    static int ready;
+    if (!ready) {
+        for (int g = 0; g < PEAK_GRID; g++) {
+            sine[g] = sinf(2.0f * M_PI * g / PEAK_GRID);
+        }
+        ready = 1;
+    }
+
+    float peak = 0.0f;
+    for (int g = 0; g < PEAK_GRID / 2; g++) {
+        // Odd in theta, so half a period covers both signs
+        float y = 0.0f;
+        for (int harmonic = 0; harmonic < harmonics; ++harmonic) {
+            y += amplitude[harmonic] * sine[(g * (harmonic + 1)) % PEAK_GRID];
+        }
+        peak = fmaxf(peak, fabsf(y));
+    }
+    return peak;
+}
+
+typedef struct {
+    size_t count;
+    size_t* points;
+    float* amplitudes;
+    int harmonics;
+    int evaluations;
+} ControlPoints;
 
-            const float m_f = (float)m / estimation_samples;
-            const float a = (m_f * next_amplitude + (1.0f - m_f) * amplitude);
-            const float y = a * sinf(f * t);
-            waveform[sample] += y;
+static int collect_control_points(ControlPoints* out, int pitch, int velocity, float duration) {
+    const size_t size = note_size(duration);
+    ControlSchedule control;
+    begin_control(&control, pitch, velocity, duration);
+
+    size_t capacity = 64;
+    out->count = 1;
+    out->points = malloc(capacity * sizeof(size_t));
+    out->amplitudes = malloc(capacity * MAX_HARMONICS * sizeof(float));
+    if (!out->points || !out->amplitudes) {
+        return -1;
+    }
+    out->points[0] = 0;
+    memcpy(out->amplitudes, control.amplitude, sizeof(control.amplitude));
+    while (next_control_point(&control)) {
+        if (out->count == capacity) {
+            capacity *= 2;
+            size_t* points = realloc(out->points, capacity * sizeof(size_t));
+            float* amplitudes = realloc(out->amplitudes, capacity * MAX_HARMONICS * sizeof(float));
+            if (points) out->points = points;
+            if (amplitudes) out->amplitudes = amplitudes;
+            if (!points || !amplitudes) {
+                return -1;
+            }
         }
+        const size_t sample = (size_t)(control.time * settings->sample_rate);
+        out->points[out->count] = sample < size ? sample : size;
+        memcpy(out->amplitudes + out->count * MAX_HARMONICS, control.amplitude, sizeof(control.amplitude));
+        out->count++;
     }
+    out->points[out->count - 1] = size;
+    out->harmonics = control.harmonics;
+    out->evaluations = control.evaluations;
+    return 0;
+}
 
+static void free_control_points(ControlPoints* control) {
+    free(control->points);
+    free(control->amplitudes);
+}
+
+static float estimate_gain(const ControlPoints* control) {
     float peak = 0.0f;
-    for (size_t sample = 0; sample < size; ++sample) {
-        peak = fmaxf(peak, fabsf(waveform[sample]));
+    for (size_t k = 0; k < control->count; ++k) {
+        peak = fmaxf(peak, harmonic_peak(control->amplitudes + k * MAX_HARMONICS, control->harmonics));
+    }
+    return peak > 0.0f ? MASTER_GAINER / peak : 0.0f;
+}
+
+// Add gain * samples [first, last) of the waveform to output in one pass, all harmonics per sample.
+// Ramps are stepped through the samples before first without oscillating, so a range
+// adds exactly what the whole note adds there.
+static void oscillate(float* output, const ControlPoints* control, float fundamental, float gain,
+                      size_t first, size_t last) {
+    const int sample_rate = settings->sample_rate;
+    const int harmonics = control->harmonics;
+    float f[MAX_HARMONICS];
+    float a[MAX_HARMONICS];
+    float da[MAX_HARMONICS];
+    for (int harmonic = 0; harmonic < harmonics; ++harmonic) {
+        f[harmonic] = 2.0f * M_PI * fundamental * (harmonic + 1);
+    }
+
+    PROFILE_BEGIN(oscillator_timer);
+    for (size_t k = 0; k + 1 < control->count; ++k) {
+        const size_t from = control->points[k];
+        const size_t to = control->points[k + 1] < last ? control->points[k + 1] : last;
+        if (to <= from || to <= first) {
+            continue;
+        }
+        const float* start = control->amplitudes + k * MAX_HARMONICS;
+        const float* end = start + MAX_HARMONICS;
+        for (int harmonic = 0; harmonic < harmonics; ++harmonic) {
+            a[harmonic] = start[harmonic];
+            da[harmonic] = (end[harmonic] - start[harmonic]) / (control->points[k + 1] - from);
+        }
+        for (size_t sample = from; sample < first; ++sample) {
+            for (int harmonic = 0; harmonic < harmonics; ++harmonic) {
+                a[harmonic] += da[harmonic];
+            }
+        }
+        for (size_t sample = from > first ? from : first; sample < to; ++sample) {
+            const float t = (float)sample / sample_rate;
+            float y = 0.0f;
+            for (int harmonic = 0; harmonic < harmonics; ++harmonic) {
+                y += a[harmonic] * sinf(f[harmonic] * t);
+                a[harmonic] += da[harmonic];
+            }
+            output[sample - first] += gain * y;
+        }
     }
+    PROFILE_END(oscillator_timer, PROFILE_OSCILLATOR, (uint64_t)(last - first) * harmonics);
+}
+
+// Fills a zeroed waveform of note_size(duration) samples with the normalized note.
+// Returns the number of control-point evaluations (one model call per rendered harmonic each).
+int render_note(float* waveform, int pitch, int velocity, float duration) {
+    const size_t size = note_size(duration);
+
+    PROFILE_BEGIN_NOTE(pitch, velocity, duration);
+    ControlPoints control;
+    if (collect_control_points(&control, pitch, velocity, duration) != 0) {
+        free_control_points(&control);
+        PROFILE_END_NOTE();
+        return -1;
+    }
+
+    if (settings->gain_mode == GAIN_ESTIMATE) {
+        oscillate(waveform, &control, calculate_frequency(pitch), estimate_gain(&control), 0, size);
+    } else {
+        oscillate(waveform, &control, calculate_frequency(pitch), 1.0f, 0, size);
+
+        PROFILE_BEGIN(normalize_timer);
+        float peak = 0.0f;
+        for (size_t sample = 0; sample < size; ++sample) {
+            peak = fmaxf(peak, fabsf(waveform[sample]));
+        }
+
+        float gain = MASTER_GAINER / peak;
+        for (size_t sample = 0; sample < size; ++sample) {
+            waveform[sample] *= gain;
+        }
+        PROFILE_END(normalize_timer, PROFILE_NORMALIZE, size);
+    }
+
+    free_control_points(&control);
+    PROFILE_END_NOTE();
+    return control.evaluations;
+}
+
+void synthesize_note(
+    float* buffer, size_t start,
+    int pitch, int velocity, float duration
+) {
+    synthesize_note_range(buffer, 0, start + note_size(duration), start, pitch, velocity, duration);
+}
+
+// Mix the part of a note starting at song sample start that falls in [first, last) into
+// window, which holds song samples from first. Adds the same values as synthesize_note.
+void synthesize_note_range(
+    float* window, size_t first, size_t last, size_t start,
+    int pitch, int velocity, float duration
+) {
+    if (last <= start) {
+        return;
+    }
+    const size_t size = note_size(duration);
+    const size_t from = first > start ? first - start : 0;
+    const size_t to = last - start < size ? last - start : size;
+    if (to <= from) {
+        return;
+    }
+    float* output = window + (start + from - first);
+
+    if (settings->gain_mode == GAIN_ESTIMATE) {
+        // The gain is known before the first sample, so the note goes straight into the buffer
+        PROFILE_BEGIN_NOTE(pitch, velocity, duration);
+        ControlPoints control;
+        if (collect_control_points(&control, pitch, velocity, duration) == 0) {
+            oscillate(output, &control, calculate_frequency(pitch), estimate_gain(&control), from, to);
+        }
+        free_control_points(&control);
+        PROFILE_END_NOTE();
+        return;
+    }
+
+    // The peak gain needs the whole note
+    PROFILE_BEGIN(alloc_timer);
+    float* waveform = (float*)calloc(size, sizeof(float));
+    PROFILE_END(alloc_timer, PROFILE_ALLOC, 1);
+    if (!waveform) {
+        return;
+    }
+
+    render_note(waveform, pitch, velocity, duration);
 
-    float gain = MASTER_GAINER / peak;
-    for (size_t sample = 0; sample < size; ++sample) {
-        waveform[sample] *= gain;
-        buffer[start + sample] += waveform[sample];
+    PROFILE_BEGIN(mix_timer);
+    for (size_t sample = from; sample < to; ++sample) {
+        output[sample - from] += waveform[sample];
     }
+    PROFILE_END(mix_timer, PROFILE_MIX, to - from);
 
+    PROFILE_BEGIN(free_timer);
     free(waveform);
+    PROFILE_END(free_timer, PROFILE_ALLOC, 0);
 }
@@ -3,12 +3,73 @@
 #include <stddef.h>
 #include <stdint.h>
 
-#define MAX_HARMONICS 32
-#define SAMPLE_RATE 48000
+#define MAX_HARMONICS 32  // harmonics the model predicts; render settings may use fewer
+#define SAMPLE_RATE 48000  // final-quality rate
 #define FADE_IN_DURATION 0.1f
 #define FADE_OUT_DURATION 1.0f
-#define ESTIMATION_FREQUENCY 10.0f
 #define MASTER_GAINER 0.1f
 
+// Adaptive control rate: the model is evaluated densely where the envelope bends and
+// with geometrically growing steps where linear interpolation stays within tolerance
+#define CONTROL_TOLERANCE 0.02f
+#define CONTROL_MIN_STEP 0.005f
+#define CONTROL_MAX_STEP 2.0f
+#define CONTROL_GROWTH 2.0f
+
+#define QUALITY_ENV "TINYPIANO_QUALITY"
+#define PEAK_GRID 512  // phases per period when estimating a note's peak
+
+typedef enum {
+  GAIN_ESTIMATE,  // from the predicted harmonic amplitudes, before rendering
+  GAIN_PEAK       // from the rendered note's peak, which needs a temporary buffer
+} GainMode;
+
+typedef struct {
+  const char *name;
+  int sample_rate;
+  int harmonics;
+  float control_tolerance;
+  GainMode gain_mode;
+} RenderSettings;
+
+typedef enum {
+  QUALITY_DRAFT,
+  QUALITY_PREVIEW,
+  QUALITY_FINAL,
+  QUALITY_TIER_COUNT
+} QualityTier;
+
+extern const RenderSettings quality_tiers[QUALITY_TIER_COUNT];
+
+typedef struct {
+  float pitch;
+  float velocity;
+  float duration;
+  int harmonics;
+  float tolerance;
+  float time;
+  float step;
+  float peak;
+  float amplitude[MAX_HARMONICS];
+  int pending;
+  float pending_time;
+  float pending_amplitude[MAX_HARMONICS];
+  int evaluations;
+} ControlSchedule;
+
+void use_render_settings(const RenderSettings* settings);
+const RenderSettings* current_render_settings(void);
+const RenderSettings* find_quality_tier(const char* name);
+int init_render_settings(void);
+
 float calculate_frequency(int pitch);
-void synthesize_note(float* buffer, size_t buffer_size, int pitch, int velocity, float duration);
+int note_harmonics(int pitch);
+float note_envelope(float t, float duration);
+void begin_control(ControlSchedule* control, int pitch, int velocity, float duration);
+int next_control_point(ControlSchedule* control);
+size_t note_size(float duration);
+float harmonic_peak(const float* amplitude, int harmonics);
+int render_note(float* waveform, int pitch, int velocity, float duration);
+void synthesize_note(float* buffer, size_t start, int pitch, int velocity, float duration);
+void synthesize_note_range(float* window, size_t first, size_t last, size_t start,
+                           int pitch, int velocity, float duration);
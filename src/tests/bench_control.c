@@ -0,0 +1,103 @@
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+
+#include "../maths.h"
+#include "../model.h"
+#include "../synth.h"
+
+#define FIXED_RATE 10.0f
+#define REFERENCE_STEP 0.001f
+#define MAX_POINTS 4096
+
+typedef struct {
+    int count;
+    float time[MAX_POINTS];
+    float amplitude[MAX_POINTS][MAX_HARMONICS];
+} Schedule;
+
+static void evaluate(int pitch, int velocity, float duration, float t, float* amplitude) {
+    const float envelope = fmaxf(0.0f, note_envelope(t, duration));
+    for (int harmonic = 0; harmonic < MAX_HARMONICS; harmonic++) {
+        amplitude[harmonic] = predict_amplitude(pitch / 127.0f, velocity / 127.0f,
+                                                harmonic / (MAX_HARMONICS - 1.0f), t) * envelope;
+    }
+}
+
+static void fixed_schedule(Schedule* schedule, int pitch, int velocity, float duration) {
+    const float end = duration + FADE_OUT_DURATION;
+    schedule->count = 0;
+    for (int k = 0; k / FIXED_RATE < end && schedule->count < MAX_POINTS - 1; k++) {
+        schedule->time[schedule->count] = k / FIXED_RATE;
+        evaluate(pitch, velocity, duration, k / FIXED_RATE, schedule->amplitude[schedule->count++]);
+    }
+    schedule->time[schedule->count] = end;
+    evaluate(pitch, velocity, duration, end, schedule->amplitude[schedule->count++]);
+}
+
+static int adaptive_schedule(Schedule* schedule, int pitch, int velocity, float duration) {
+    ControlSchedule control;
+    begin_control(&control, pitch, velocity, duration);
+    schedule->count = 0;
+    do {
+        schedule->time[schedule->count] = control.time;
+        memcpy(schedule->amplitude[schedule->count++], control.amplitude, sizeof(control.amplitude));
+    } while (schedule->count < MAX_POINTS && next_control_point(&control));
+    return control.evaluations;
+}
+
+// Largest summed-harmonic deviation of the interpolated envelope from the model, relative to its peak
+static float schedule_error(const Schedule* schedule, int pitch, int velocity, float duration) {
+    float reference[MAX_HARMONICS];
+    float peak = 0.0f;
+    float worst = 0.0f;
+    int k = 0;
+    for (float t = 0.0f; t < duration + FADE_OUT_DURATION; t += REFERENCE_STEP) {
+        while (k + 2 < schedule->count && schedule->time[k + 1] <= t) {
+            k++;
+        }
+        const float span = schedule->time[k + 1] - schedule->time[k];
+        const float w = span > 0.0f ? (t - schedule->time[k]) / span : 0.0f;
+
+        evaluate(pitch, velocity, duration, t, reference);
+        float error = 0.0f;
+        float sum = 0.0f;
+        for (int harmonic = 0; harmonic < MAX_HARMONICS; harmonic++) {
+            const float a = (1.0f - w) * schedule->amplitude[k][harmonic] + w * schedule->amplitude[k + 1][harmonic];
+            error += fabsf(a - reference[harmonic]);
+            sum += reference[harmonic];
+        }
+        peak = fmaxf(peak, sum);
+        worst = fmaxf(worst, error);
+    }
+    return peak > 0.0f ? worst / peak : 0.0f;
+}
+
+int main(void) {
+    static const int pitches[] = {36, 60, 84};
+    static const float durations[] = {0.25f, 1.0f, 4.0f, 10.0f};
+    static Schedule fixed;
+    static Schedule adaptive;
+    const int velocity = 80;
+
+    printf("Control points per note: fixed %.0f Hz vs adaptive (tolerance %.3f)\n", FIXED_RATE, CONTROL_TOLERANCE);
+    printf("%6s %9s %7s %9s %9s %9s\n", "pitch", "duration", "fixed", "adaptive", "fixed err", "adapt err");
+    long fixed_total = 0;
+    long adaptive_total = 0;
+    for (size_t i = 0; i < sizeof(pitches) / sizeof(pitches[0]); i++) {
+        for (size_t j = 0; j < sizeof(durations) / sizeof(durations[0]); j++) {
+            const int pitch = pitches[i];
+            const float duration = durations[j];
+            fixed_schedule(&fixed, pitch, velocity, duration);
+            const int evaluations = adaptive_schedule(&adaptive, pitch, velocity, duration);
+            printf("%6d %8.2fs %7d %9d %8.2f%% %8.2f%%\n", pitch, duration, fixed.count, evaluations,
+                   100.0f * schedule_error(&fixed, pitch, velocity, duration),
+                   100.0f * schedule_error(&adaptive, pitch, velocity, duration));
+            fixed_total += fixed.count;
+            adaptive_total += evaluations;
+        }
+    }
+    printf("Total evaluations: fixed %ld, adaptive %ld (%.1fx fewer)\n",
+           fixed_total, adaptive_total, (double)fixed_total / adaptive_total);
+    return 0;
+}
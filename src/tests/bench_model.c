@@ -0,0 +1,44 @@
+#define _POSIX_C_SOURCE 199309L
+
+#include <stdio.h>
+#include <stdlib.h>
+#include <time.h>
+
+#include "../model.h"
+#include "../weights_blob.h"
+
+#define DEFAULT_ITERATIONS 200000
+
+static double elapsed_ns(const struct timespec* start, const struct timespec* end) {
+    return (end->tv_sec - start->tv_sec) * 1e9 + (end->tv_nsec - start->tv_nsec);
+}
+
+int main(int argc, char** argv) {
+    const char* blob_path = argc > 1 ? argv[1] : NULL;
+    const int iterations = argc > 2 ? atoi(argv[2]) : DEFAULT_ITERATIONS;
+
+    if (blob_path && load_weights_blob(blob_path) != 0) {
+        fprintf(stderr, "Error: Could not load weights blob %s\n", blob_path);
+        return 1;
+    }
+
+    volatile float sink = 0.0f;
+    for (int i = 0; i < iterations / 10; i++) {
+        sink += predict_amplitude(0.5f, 0.5f, (i % 32) / 31.0f, 0.1f);
+    }
+
+    struct timespec start, end;
+    clock_gettime(CLOCK_MONOTONIC, &start);
+    for (int i = 0; i < iterations; i++) {
+        const float p = (i % 88 + 21) / 127.0f;
+        const float h = (i % 32) / 31.0f;
+        const float t = (i % 400) * 0.01f;
+        sink += predict_amplitude(p, 0.6f, h, t);
+    }
+    clock_gettime(CLOCK_MONOTONIC, &end);
+
+    printf("Weights: %s\n", blob_path ? blob_path : "compiled-in");
+    printf("Iterations: %d\n", iterations);
+    printf("ns/call: %.2f\n", elapsed_ns(&start, &end) / iterations);
+    return 0;
+}
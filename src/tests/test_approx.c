@@ -0,0 +1,144 @@
+#include <stdio.h>
+#include <math.h>
+
+
+float std_expf(float x) { return expf(x); }
+
+#include "../maths.h"
+#include "../model.h"
+
+#define GRID_STEPS 12
+#define RANGE_STEPS 100000
+#define ABS(x) ((x) < 0 ? -(x) : (x))
+
+typedef float (*ExpFunction)(float);
+
+typedef struct {
+    const char* name;
+    ExpFunction function;
+    float tolerance;
+} ExpApproximation;
+
+typedef struct {
+    float min;
+    float max;
+} Range;
+
+int test_failures = 0;
+
+static void extend_range(Range* range, const float* values, int size) {
+    for (int i = 0; i < size; i++) {
+        range->min = (values[i] < range->min) ? values[i] : range->min;
+        range->max = (values[i] > range->max) ? values[i] : range->max;
+    }
+}
+
+void measure_activation_ranges(Range* silu_range, Range* output_range) {
+    silu_range->min = silu_range->max = 0.0f;
+    output_range->min = 1e9f;
+    output_range->max = -1e9f;
+
+    for (int a = 0; a <= GRID_STEPS; a++)
+    for (int b = 0; b <= GRID_STEPS; b++)
+    for (int c = 0; c <= GRID_STEPS; c++)
+    for (int d = 0; d <= GRID_STEPS; d++) {
+        float input[INPUT_SIZE] = {
+            (float)a / GRID_STEPS, (float)b / GRID_STEPS,
+            (float)c / GRID_STEPS, (float)d / GRID_STEPS
+        };
+        float hidden1[HIDDEN1_SIZE];
+        float hidden2[HIDDEN2_SIZE];
+        float hidden3[HIDDEN3_SIZE];
+        float output[OUTPUT_SIZE];
+
+        linear_layer(input, weights1_q, biases1_q, weights1_min, weights1_max, biases1_min, biases1_max,
+                     hidden1, INPUT_SIZE, HIDDEN1_SIZE);
+        extend_range(silu_range, hidden1, HIDDEN1_SIZE);
+        apply_silu(hidden1, HIDDEN1_SIZE);
+
+        linear_layer(hidden1, weights2_q, biases2_q, weights2_min, weights2_max, biases2_min, biases2_max,
+                     hidden2, HIDDEN1_SIZE, HIDDEN2_SIZE);
+        extend_range(silu_range, hidden2, HIDDEN2_SIZE);
+        apply_silu(hidden2, HIDDEN2_SIZE);
+
+        linear_layer(hidden2, weights3_q, biases3_q, weights3_min, weights3_max, biases3_min, biases3_max,
+                     hidden3, HIDDEN2_SIZE, HIDDEN3_SIZE);
+        extend_range(silu_range, hidden3, HIDDEN3_SIZE);
+        apply_silu(hidden3, HIDDEN3_SIZE);
+
+        linear_layer(hidden3, weights_out_q, biases_out_q, weights_out_min, weights_out_max,
+                     biases_out_min, biases_out_max, output, HIDDEN3_SIZE, OUTPUT_SIZE);
+        extend_range(output_range, output, OUTPUT_SIZE);
+    }
+}
+
+float max_relative_error(ExpFunction function, Range range) {
+    float max_error = 0.0f;
+    for (int i = 0; i <= RANGE_STEPS; i++) {
+        float x = range.min + (range.max - range.min) * i / RANGE_STEPS;
+        float expected = std_expf(x);
+        float error = ABS(function(x) - expected) / expected;
+        max_error = (error > max_error) ? error : max_error;
+    }
+    return max_error;
+}
+
+float max_silu_error(ExpFunction function, Range range) {
+    float max_error = 0.0f;
+    for (int i = 0; i <= RANGE_STEPS; i++) {
+        float x = range.min + (range.max - range.min) * i / RANGE_STEPS;
+        float expected = x / (1.0f + std_expf(-x));
+        float error = ABS(x / (1.0f + function(-x)) - expected);
+        max_error = (error > max_error) ? error : max_error;
+    }
+    return max_error;
+}
+
+void test_approximation(const ExpApproximation* approximation, Range silu_range, Range output_range) {
+    Range exp_range = {-silu_range.max, -silu_range.min};
+    float silu_exp_error = max_relative_error(approximation->function, exp_range);
+    float silu_error = max_silu_error(approximation->function, silu_range);
+    float output_error = max_relative_error(approximation->function, output_range);
+
+    printf("Testing %s:\n", approximation->name);
+    printf("  SiLU exp relative error: %.3e\n", silu_exp_error);
+    printf("  SiLU absolute error:     %.3e\n", silu_error);
+    printf("  Output relative error:   %.3e\n", output_error);
+
+    float worst = (silu_exp_error > output_error) ? silu_exp_error : output_error;
+    if (worst > approximation->tolerance) {
+        printf("  FAIL: max relative error %.3e exceeds %.3e\n", worst, approximation->tolerance);
+        test_failures++;
+    } else {
+        printf("  PASS: max relative error within %.3e\n", approximation->tolerance);
+    }
+}
+
+int main() {
+    const ExpApproximation approximations[] = {
+        {"tiny_exp (x87)", tiny_exp, 1e-6f},
+        {"tiny_exp_poly", tiny_exp_poly, 1e-5f},
+        {"tiny_exp_bits", tiny_exp_bits, 5e-2f},
+        {"tiny_exp_table", tiny_exp_table, 1e-5f},
+    };
+
+    Range silu_range, output_range;
+    measure_activation_ranges(&silu_range, &output_range);
+
+    printf("Testing exp approximations (EXP_APPROX=%d):\n\n", EXP_APPROX);
+    printf("SiLU input range:  [%.4f, %.4f]\n", silu_range.min, silu_range.max);
+    printf("Output log range:  [%.4f, %.4f]\n\n", output_range.min, output_range.max);
+
+    for (size_t i = 0; i < sizeof(approximations) / sizeof(approximations[0]); i++) {
+        test_approximation(&approximations[i], silu_range, output_range);
+        printf("\n");
+    }
+
+    if (test_failures == 0) {
+        printf("All approximation tests PASSED!\n");
+        return 0;
+    } else {
+        printf("%d approximation test(s) FAILED!\n", test_failures);
+        return 1;
+    }
+}
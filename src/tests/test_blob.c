@@ -0,0 +1,73 @@
+#include <stdio.h>
+#include <string.h>
+
+#include "../model.h"
+#include "../weights_blob.h"
+
+#define BLOB_PATH "test_weights.bin"
+#define CORRUPT_PATH "test_weights_corrupt.bin"
+
+int test_failures = 0;
+
+void check(int condition, const char* description) {
+    if (condition) {
+        printf("  PASS: %s\n", description);
+    } else {
+        printf("  FAIL: %s\n", description);
+        test_failures++;
+    }
+}
+
+int same_predictions(void) {
+    const float inputs[][4] = {
+        {0.5f, 0.5f, 0.0f, 0.0f},
+        {0.5f, 0.8f, 0.1f, 0.3f},
+        {0.0f, 0.5f, 0.0f, 0.0f},
+        {1.0f, 1.0f, 1.0f, 1.0f},
+    };
+
+    for (size_t i = 0; i < sizeof(inputs) / sizeof(inputs[0]); i++) {
+        float builtin, blob;
+        use_builtin_weights();
+        builtin = predict_amplitude(inputs[i][0], inputs[i][1], inputs[i][2], inputs[i][3]);
+        if (load_weights_blob(BLOB_PATH) != 0) return 0;
+        blob = predict_amplitude(inputs[i][0], inputs[i][1], inputs[i][2], inputs[i][3]);
+        unload_weights_blob();
+        if (builtin != blob) return 0;
+    }
+    return 1;
+}
+
+int main() {
+    printf("Testing weights blob:\n");
+
+    use_builtin_weights();
+    const ModelWeights* builtin = current_weights();
+
+    check(save_weights_blob(BLOB_PATH, builtin) == 0, "save builtin weights to blob");
+    check(load_weights_blob(BLOB_PATH) == 0, "load blob");
+    check(current_weights() != builtin, "blob weights are active");
+    check(current_weights()->layers[1].input_size == HIDDEN1_SIZE, "architecture read from header");
+
+    unload_weights_blob();
+    check(current_weights() == builtin, "unload restores builtin weights");
+    check(same_predictions(), "blob predictions match builtin");
+
+    FILE* file = fopen(CORRUPT_PATH, "wb");
+    fwrite("XXXX", 1, 4, file);
+    fclose(file);
+    check(load_weights_blob(CORRUPT_PATH) != 0, "reject blob with bad header");
+    check(load_weights_blob("missing_weights.bin") != 0, "reject missing blob");
+    check(current_weights() == builtin, "builtin weights remain after failed load");
+
+    remove(BLOB_PATH);
+    remove(CORRUPT_PATH);
+
+    if (test_failures == 0) {
+        printf("All blob tests PASSED!\n");
+        return 0;
+    } else {
+        printf("%d blob test(s) FAILED!\n", test_failures);
+        return 1;
+    }
+}
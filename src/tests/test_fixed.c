@@ -0,0 +1,74 @@
+#include <stdio.h>
+#include <math.h>
+
+#include "../model.h"
+#include "../model_fixed.h"
+
+#define GRID_STEPS 10
+#define TIME_STEPS 40
+#define MAX_TIME 4.0f
+#define MAX_LOG_ERROR 0.2f
+#define MEAN_LOG_ERROR 0.01f
+#define ABS(x) ((x) < 0 ? -(x) : (x))
+
+float predict_log_amplitude_float(const float* input) {
+    float hidden1[HIDDEN1_SIZE];
+    float hidden2[HIDDEN2_SIZE];
+    float hidden3[HIDDEN3_SIZE];
+    float output[OUTPUT_SIZE];
+
+    linear_layer(input, weights1_q, biases1_q, weights1_min, weights1_max, biases1_min, biases1_max,
+                 hidden1, INPUT_SIZE, HIDDEN1_SIZE);
+    apply_silu(hidden1, HIDDEN1_SIZE);
+
+    linear_layer(hidden1, weights2_q, biases2_q, weights2_min, weights2_max, biases2_min, biases2_max,
+                 hidden2, HIDDEN1_SIZE, HIDDEN2_SIZE);
+    apply_silu(hidden2, HIDDEN2_SIZE);
+
+    linear_layer(hidden2, weights3_q, biases3_q, weights3_min, weights3_max, biases3_min, biases3_max,
+                 hidden3, HIDDEN2_SIZE, HIDDEN3_SIZE);
+    apply_silu(hidden3, HIDDEN3_SIZE);
+
+    linear_layer(hidden3, weights_out_q, biases_out_q, weights_out_min, weights_out_max,
+                 biases_out_min, biases_out_max, output, HIDDEN3_SIZE, OUTPUT_SIZE);
+    return output[0];
+}
+
+int main() {
+    printf("Fixed-point vs float model:\n");
+
+    float max_error = 0.0f;
+    double total_error = 0.0;
+    size_t count = 0;
+
+    for (int a = 0; a <= GRID_STEPS; a++)
+    for (int b = 0; b <= GRID_STEPS; b++)
+    for (int c = 0; c <= GRID_STEPS; c++)
+    for (int d = 0; d <= TIME_STEPS; d++) {
+        float input[INPUT_SIZE] = {
+            (float)a / GRID_STEPS, (float)b / GRID_STEPS,
+            (float)c / GRID_STEPS, MAX_TIME * d / TIME_STEPS
+        };
+
+        float expected = predict_log_amplitude_float(input);
+        float got = logf(predict_amplitude_fixed(input[0], input[1], input[2], input[3]));
+        float error = ABS(got - expected);
+
+        max_error = (error > max_error) ? error : max_error;
+        total_error += error;
+        count++;
+    }
+
+    float mean_error = (float)(total_error / count);
+    printf("  Points: %zu\n", count);
+    printf("  Max log-amplitude error:  %.6f (limit %.3f)\n", max_error, MAX_LOG_ERROR);
+    printf("  Mean log-amplitude error: %.6f (limit %.3f)\n", mean_error, MEAN_LOG_ERROR);
+
+    if (max_error > MAX_LOG_ERROR || mean_error > MEAN_LOG_ERROR) {
+        printf("Fixed-point test FAILED!\n");
+        return 1;
+    }
+
+    printf("Fixed-point test PASSED!\n");
+    return 0;
+}
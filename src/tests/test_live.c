@@ -0,0 +1,163 @@
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <math.h>
+#include <unistd.h>
+
+#include "../live.h"
+
+#define HOLD_SECONDS 0.5f
+#define TAIL_SECONDS 1.2f
+
+int test_failures = 0;
+
+void check(int condition, const char* description) {
+    if (condition) {
+        printf("  PASS: %s\n", description);
+    } else {
+        printf("  FAIL: %s\n", description);
+        test_failures++;
+    }
+}
+
+float rms(const float* buffer, size_t size) {
+    double sum = 0.0;
+    for (size_t i = 0; i < size; i++) {
+        sum += buffer[i] * buffer[i];
+    }
+    return sqrt(sum / size);
+}
+
+void test_parse(void) {
+    LiveEvent event;
+    check(parse_live_event("on 60 100", &event) == 0 && event.type == LIVE_NOTE_ON && event.pitch == 60
+          && event.velocity == 100 && event.time < 0.0, "note-on");
+    check(parse_live_event("  off 61", &event) == 0 && event.type == LIVE_NOTE_OFF && event.pitch == 61,
+          "note-off");
+    check(parse_live_event("@1.25 on 62 80", &event) == 0 && fabs(event.time - 1.25) < 1e-9, "timed note-on");
+    check(parse_live_event("on 63 0", &event) == 0 && event.type == LIVE_NOTE_OFF, "velocity 0 is a note-off");
+    check(parse_live_event("on 128 80", &event) != 0, "pitch out of range rejected");
+    check(parse_live_event("on 60", &event) != 0, "note-on without velocity rejected");
+    check(parse_live_event("hold 60 80", &event) != 0, "unknown event rejected");
+    check(parse_live_event("@-1 on 60 80", &event) != 0, "negative time rejected");
+}
+
+void test_held_note(void) {
+    const int sample_rate = current_render_settings()->sample_rate;
+    VoiceConfig config = default_voice_config();
+    VoiceScheduler* scheduler = create_voice_scheduler(NULL, &config);
+    const size_t hold_blocks = (size_t)(HOLD_SECONDS * sample_rate) / config.block_size;
+    const size_t total_blocks = hold_blocks + (size_t)(TAIL_SECONDS * sample_rate) / config.block_size;
+    float* buffer = calloc(total_blocks * config.block_size, sizeof(float));
+
+    voice_note_on(scheduler, 60, 100);
+    check(sounding_voices(scheduler) == 1, "note-on takes a voice");
+    for (size_t b = 0; b < total_blocks; b++) {
+        if (b == hold_blocks) {
+            voice_note_off(scheduler, 60);
+        }
+        render_voice_block(scheduler, buffer + b * config.block_size);
+    }
+    check(sounding_voices(scheduler) == 0, "voice freed after the release");
+
+    const size_t release = hold_blocks * config.block_size;
+    float jump = 0.0f;
+    for (size_t i = release - 8; i < release + 8; i++) {
+        jump = fmaxf(jump, fabsf(buffer[i + 1] - buffer[i]));
+    }
+    float before = 0.0f;
+    for (size_t i = release / 2; i < release; i++) {
+        before = fmaxf(before, fabsf(buffer[i + 1] - buffer[i]));
+    }
+    printf("  largest step around the release %.5f, while held %.5f\n", jump, before);
+    check(jump <= 1.5f * before, "no click at the note-off");
+
+    // The same note with its duration known in advance
+    const float duration = (float)release / sample_rate;
+    float* reference = calloc(note_size(duration), sizeof(float));
+    render_note(reference, 60, 100, duration);
+    const float level_db = 20.0f * log10f(rms(buffer, note_size(duration)) / rms(reference, note_size(duration)));
+    printf("  live note level %+.2f dB against render_note\n", level_db);
+    check(fabsf(level_db) < 1.0f, "released note matches a note of the same duration");
+    check(rms(buffer + note_size(duration), total_blocks * config.block_size - note_size(duration)) == 0.0f,
+          "silent after the fade-out");
+
+    // A key struck again while held releases the first note
+    voice_note_on(scheduler, 64, 90);
+    render_voice_block(scheduler, buffer);
+    voice_note_on(scheduler, 64, 90);
+    render_voice_block(scheduler, buffer);
+    check(scheduler->stats.notes == 3 && sounding_voices(scheduler) == 2, "re-struck key takes a new voice");
+
+    free(reference);
+    free(buffer);
+    free_voice_scheduler(scheduler);
+}
+
+void test_stream(void) {
+    const char* events =
+        "# timed events from a pipe\n"
+        "@0.0 on 60 90\n"
+        "@0.1 on 64 80\n"
+        "bogus line\n"
+        "@0.3 off 60\n"
+        "@0.4 off 64";
+    int pipe_fds[2];
+    check(pipe(pipe_fds) == 0, "pipe created");
+    check(write(pipe_fds[1], events, strlen(events)) == (ssize_t)strlen(events), "events written");
+    close(pipe_fds[1]);
+
+    FILE* output = tmpfile();
+    LiveConfig config = default_live_config();
+    config.realtime = 0;
+    LiveStats stats;
+    check(run_live(pipe_fds[0], output, &config, &stats) == 0, "run_live from a pipe");
+    close(pipe_fds[0]);
+
+    const int sample_rate = current_render_settings()->sample_rate;
+    const double audio = stats.blocks * stats.block_seconds;
+    printf("  %llu events, %.2f s of audio, worst block %.3f ms of %.3f ms\n", (unsigned long long)stats.events,
+           audio, stats.max_render_seconds * 1e3, stats.block_seconds * 1e3);
+    check(stats.events == 4 && stats.invalid_events == 1, "events applied and bad line counted");
+    check(stats.voices.notes == 2, "two notes played");
+    check(fabs(stats.block_seconds - LIVE_DEFAULT_LATENCY) < 1.0 / sample_rate, "block size from latency");
+    check(audio >= 0.4 + FADE_OUT_DURATION && audio < 0.4 + FADE_OUT_DURATION + 0.1, "stops after the last release");
+    check(ftell(output) == (long)(stats.blocks * (size_t)(stats.block_seconds * sample_rate + 0.5) * 2),
+          "16-bit PCM written for every block");
+    fclose(output);
+}
+
+void test_load(void) {
+    LiveConfig config = default_live_config();
+    config.realtime = 0;
+    config.duration = 2.0;
+    config.load = 20.0f;
+    LiveStats stats;
+    check(run_live(-1, NULL, &config, &stats) == 0, "generated load without input");
+    const double audio = stats.blocks * stats.block_seconds;
+    printf("  %llu notes, peak polyphony %zu, render load %.1f%%, missed %llu deadlines\n",
+           (unsigned long long)stats.voices.notes, stats.voices.peak_polyphony,
+           100.0 * stats.render_seconds / audio, (unsigned long long)stats.missed_deadlines);
+    check(stats.voices.notes >= 35 && stats.voices.notes <= 40, "notes at the requested rate");
+    check(audio >= 2.0 && audio < 2.0 + stats.block_seconds, "stops at the duration");
+    check(stats.missed_deadlines <= stats.blocks, "deadlines counted");
+
+    check(run_live(-1, NULL, &config, &stats) == 0 && stats.voices.notes >= 35, "repeatable load");
+    config.duration = 0.0;
+    check(run_live(-1, NULL, &config, &stats) != 0, "no input and no duration rejected");
+}
+
+int main() {
+    printf("Testing live rendering:\n");
+    test_parse();
+    test_held_note();
+    test_stream();
+    test_load();
+
+    if (test_failures == 0) {
+        printf("All live tests PASSED!\n");
+        return 0;
+    }
+    printf("%d live test(s) FAILED!\n", test_failures);
+    return 1;
+}
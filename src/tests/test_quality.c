@@ -0,0 +1,80 @@
+#include <stdio.h>
+#include <stdlib.h>
+#include <math.h>
+#include <time.h>
+
+#include "../song.h"
+#include "../synth.h"
+#include "test_data.h"
+
+int test_failures = 0;
+
+void check(int condition, const char* description) {
+    if (condition) {
+        printf("  PASS: %s\n", description);
+    } else {
+        printf("  FAIL: %s\n", description);
+        test_failures++;
+    }
+}
+
+float render_rms(const Song* song, size_t* size, double* seconds) {
+    const float duration = song->total_ticks * UNIT(song->bpm) + FADE_OUT_DURATION;
+    *size = (size_t)(duration * current_render_settings()->sample_rate) + 1000;
+    float* buffer = calloc(*size, sizeof(float));
+
+    clock_t start = clock();
+    render_song(song, buffer);
+    *seconds = (double)(clock() - start) / CLOCKS_PER_SEC;
+
+    double sum = 0.0;
+    for (size_t i = 0; i < *size; i++) {
+        sum += buffer[i] * buffer[i];
+    }
+    free(buffer);
+    return sqrt(sum / *size);
+}
+
+int main() {
+    printf("Testing render quality tiers:\n");
+
+    check(current_render_settings() == &quality_tiers[QUALITY_FINAL], "final quality by default");
+    check(current_render_settings()->sample_rate == SAMPLE_RATE, "final tier keeps the sample rate");
+    check(current_render_settings()->harmonics == MAX_HARMONICS, "final tier keeps every harmonic");
+    check(find_quality_tier("draft") == &quality_tiers[QUALITY_DRAFT], "find draft tier");
+    check(find_quality_tier("studio") == NULL, "reject unknown tier");
+
+    use_render_settings(&quality_tiers[QUALITY_DRAFT]);
+    check(note_harmonics(48) == quality_tiers[QUALITY_DRAFT].harmonics, "low notes use the tier's harmonics");
+    check(note_harmonics(84) == 10, "harmonics above Nyquist are skipped");
+
+    Song* song = create_test_song();
+    float rms[QUALITY_TIER_COUNT];
+    double seconds[QUALITY_TIER_COUNT];
+    size_t size[QUALITY_TIER_COUNT];
+    for (int tier = 0; tier < QUALITY_TIER_COUNT; tier++) {
+        use_render_settings(&quality_tiers[tier]);
+        rms[tier] = render_rms(song, &size[tier], &seconds[tier]);
+        printf("  %-8s %5d Hz %2d harmonics: %7.1f ms, %zu samples, RMS %.4f\n",
+               quality_tiers[tier].name, quality_tiers[tier].sample_rate, quality_tiers[tier].harmonics,
+               seconds[tier] * 1e3, size[tier], rms[tier]);
+    }
+    use_render_settings(&quality_tiers[QUALITY_FINAL]);
+
+    check(size[QUALITY_DRAFT] < size[QUALITY_FINAL] / 2, "draft renders fewer samples");
+    check(seconds[QUALITY_DRAFT] < seconds[QUALITY_FINAL], "draft renders faster");
+    for (int tier = 0; tier < QUALITY_FINAL; tier++) {
+        const float difference = 20.0f * log10f(rms[tier] / rms[QUALITY_FINAL]);
+        check(fabsf(difference) < 1.0f, "tier level within 1 dB of final");
+    }
+
+    free_song(song);
+
+    if (test_failures == 0) {
+        printf("All quality tier tests PASSED!\n");
+        return 0;
+    } else {
+        printf("%d quality tier test(s) FAILED!\n", test_failures);
+        return 1;
+    }
+}
@@ -0,0 +1,109 @@
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <time.h>
+
+#include "../render_cache.h"
+#include "../song.h"
+#include "../synth.h"
+#include "test_data.h"
+
+int test_failures = 0;
+
+void check(int condition, const char* description) {
+    if (condition) {
+        printf("  PASS: %s\n", description);
+    } else {
+        printf("  FAIL: %s\n", description);
+        test_failures++;
+    }
+}
+
+// The incremental buffer must match a full render sample for sample
+int matches_full_render(const RenderCache* cache, const Note* notes, size_t note_count, uint16_t bpm) {
+    Song* song = create_song(notes, note_count, bpm);
+    float* buffer = calloc(cache->length + 1, sizeof(float));
+    render_song(song, buffer);
+    int same = memcmp(buffer, cache->buffer, cache->length * sizeof(float)) == 0;
+    free(buffer);
+    free_song(song);
+    return same;
+}
+
+long update(RenderCache* cache, const Note* notes, size_t note_count, uint16_t bpm, double* seconds) {
+    Song* song = create_song(notes, note_count, bpm);
+    clock_t start = clock();
+    long rendered = update_render_cache(cache, song);
+    *seconds = (double)(clock() - start) / CLOCKS_PER_SEC;
+    free_song(song);
+    return rendered;
+}
+
+int main() {
+    printf("Testing incremental song rendering:\n");
+
+    Song* test_song = create_test_song();
+    const size_t count = test_song->note_count;
+    Note* notes = malloc((count + 1) * sizeof(Note));
+    memcpy(notes, test_song->notes, count * sizeof(Note));
+    free_song(test_song);
+
+    RenderCache* cache = create_render_cache();
+    double full_seconds, seconds;
+
+    check(update(cache, notes, count, DEFAULT_BPM, &full_seconds) == (long)count, "first update renders every note");
+    check(matches_full_render(cache, notes, count, DEFAULT_BPM), "first update matches render_song");
+
+    check(update(cache, notes, count, DEFAULT_BPM, &seconds) == 0, "unchanged song renders nothing");
+    check(matches_full_render(cache, notes, count, DEFAULT_BPM), "unchanged song matches render_song");
+
+    notes[3].velocity = 110;
+    check(update(cache, notes, count, DEFAULT_BPM, &seconds) == 1, "changed velocity renders one note");
+    check(matches_full_render(cache, notes, count, DEFAULT_BPM), "changed velocity matches render_song");
+    printf("  Full render: %.1f ms, one-note edit: %.1f ms\n", full_seconds * 1e3, seconds * 1e3);
+
+    // Moving a note shifts the start of every following note by the same delta
+    notes[4].delta += TICKS_PER_QUARTER / 4;
+    check(update(cache, notes, count, DEFAULT_BPM, &seconds) == 4, "moved note re-renders it and the notes after it");
+    notes[4].delta -= TICKS_PER_QUARTER / 4;
+    check(update(cache, notes, count, DEFAULT_BPM, &seconds) == 4, "moving it back re-renders the same notes");
+    check(matches_full_render(cache, notes, count, DEFAULT_BPM), "moved note matches render_song");
+
+    check(update(cache, notes, count - 1, DEFAULT_BPM, &seconds) == 0, "removing the last note renders nothing");
+    check(matches_full_render(cache, notes, count - 1, DEFAULT_BPM), "removed note matches render_song");
+
+    memmove(&notes[3], &notes[2], (count - 2) * sizeof(Note));
+    notes[2].pitch = 48;
+    notes[2].delta = 0;
+    check(update(cache, notes, count + 1, DEFAULT_BPM, &seconds) == 2, "inserting a chord note and restoring the last note renders two");
+    check(matches_full_render(cache, notes, count + 1, DEFAULT_BPM), "inserted note matches render_song");
+
+    check(update(cache, notes, count + 1, DEFAULT_BPM * 2, &seconds) == (long)count + 1, "tempo change renders every note");
+    check(matches_full_render(cache, notes, count + 1, DEFAULT_BPM * 2), "tempo change matches render_song");
+
+    // The gain mode scales every waveform, so switching it in either direction re-renders everything
+    const RenderSettings* estimate = current_render_settings();
+    RenderSettings peak = *estimate;
+    peak.gain_mode = GAIN_PEAK;
+    use_render_settings(&peak);
+    check(update(cache, notes, count + 1, DEFAULT_BPM * 2, &seconds) == (long)count + 1, "peak gain renders every note");
+    check(matches_full_render(cache, notes, count + 1, DEFAULT_BPM * 2), "peak gain matches render_song");
+    use_render_settings(estimate);
+    check(update(cache, notes, count + 1, DEFAULT_BPM * 2, &seconds) == (long)count + 1,
+          "estimated gain renders every note again");
+    check(matches_full_render(cache, notes, count + 1, DEFAULT_BPM * 2), "estimated gain matches render_song");
+
+    check(update(cache, notes, 0, DEFAULT_BPM * 2, &seconds) == 0, "empty song");
+    check(cache->length == 0, "empty song has no samples");
+
+    free_render_cache(cache);
+    free(notes);
+
+    if (test_failures == 0) {
+        printf("All render cache tests PASSED!\n");
+        return 0;
+    } else {
+        printf("%d render cache test(s) FAILED!\n", test_failures);
+        return 1;
+    }
+}
@@ -0,0 +1,85 @@
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+
+#include "../song.h"
+#include "../synth.h"
+#include "test_data.h"
+
+int test_failures = 0;
+
+void check(int condition, const char* description) {
+    if (condition) {
+        printf("  PASS: %s\n", description);
+    } else {
+        printf("  FAIL: %s\n", description);
+        test_failures++;
+    }
+}
+
+// Render the song as consecutive ranges of segment samples and compare with render_song bit for bit
+int segments_match(const Song* song, const float* reference, size_t size, size_t segment) {
+    float* buffer = calloc(size, sizeof(float));
+    for (size_t first = 0; first < size; first += segment) {
+        const size_t last = first + segment < size ? first + segment : size;
+        render_song_range(song, first, last, buffer + first);
+    }
+    const int same = memcmp(buffer, reference, size * sizeof(float)) == 0;
+    free(buffer);
+    return same;
+}
+
+void test_settings(const Song* song, const RenderSettings* settings) {
+    use_render_settings(settings);
+    const size_t size = song_size(song);
+    float* reference = calloc(size, sizeof(float));
+    render_song(song, reference);
+
+    char description[96];
+    const size_t segments[] = {size, size / 2, 12345, settings->sample_rate / 4};
+    for (size_t i = 0; i < sizeof(segments) / sizeof(segments[0]); i++) {
+        snprintf(description, sizeof(description), "%s quality, %zu-sample segments match render_song",
+                 settings->name, segments[i]);
+        check(segments_match(song, reference, size, segments[i]), description);
+    }
+
+    // Segments are independent, so they can be rendered in any order
+    const size_t half = size / 2;
+    float* buffer = calloc(size, sizeof(float));
+    render_song_range(song, half, size, buffer + half);
+    render_song_range(song, 0, half, buffer);
+    check(memcmp(buffer, reference, size * sizeof(float)) == 0, "segments rendered out of order");
+
+    memset(buffer, 0, size * sizeof(float));
+    render_song_range(song, size, size + 1000, buffer);
+    render_song_range(song, half, half, buffer);
+    int silent = 1;
+    for (size_t i = 0; i < size; i++) {
+        silent &= buffer[i] == 0.0f;
+    }
+    check(silent, "ranges past the end and empty ranges write nothing");
+
+    free(buffer);
+    free(reference);
+}
+
+int main() {
+    printf("Testing segmented song rendering:\n");
+    Song* song = create_test_song();
+
+    test_settings(song, find_quality_tier("draft"));
+    test_settings(song, find_quality_tier("preview"));
+
+    RenderSettings peak = *find_quality_tier("draft");
+    peak.gain_mode = GAIN_PEAK;
+    test_settings(song, &peak);
+
+    free_song(song);
+
+    if (test_failures == 0) {
+        printf("All segment tests PASSED!\n");
+        return 0;
+    }
+    printf("%d segment test(s) FAILED!\n", test_failures);
+    return 1;
+}
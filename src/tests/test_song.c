@@ -5,12 +5,15 @@
 #include "../song.h"
 #include "../synth.h"
 #include "../io.h"
+#include "../weights_blob.h"
 #include "test_data.h"
 
 int main() {
     printf("Piano Song Player Test\n");
     printf("======================\n\n");
 
+    printf("Weights: %s\n\n", init_weights() ? "runtime blob" : "compiled-in");
+
     Song* song = create_test_song();
     if (!song) {
         printf("Error: Could not create test song\n");
@@ -19,27 +22,29 @@ int main() {
 
     printf("Test song created:\n");
     printf("  BPM: %d\n", song->bpm);
-    printf("  Total ticks: %d\n", song->total_ticks);
+    printf("  Total ticks: %u\n", (unsigned)song->total_ticks);
     printf("  Duration: %.2f seconds\n", song->total_ticks * UNIT(song->bpm));
     printf("  Notes: %zu\n", song->note_count);
 
     printf("\nNote details:\n");
+    uint32_t ticks = 0;
     for (size_t i = 0; i < song->note_count; i++) {
         const Note* note = &song->notes[i];
-        float start_time = note->start * UNIT(song->bpm);
+        ticks += note->delta;
+        float start_time = ticks * UNIT(song->bpm);
         float duration = note->duration * UNIT(song->bpm);
         printf("  Note %zu: Pitch=%d, Vel=%d, Start=%.3fs, Dur=%.3fs\n",
                i, note->pitch, note->velocity, start_time, duration);
     }
 
-    float song_duration = song->total_ticks * UNIT(song->bpm);
+    float song_duration = song->total_ticks * UNIT(song->bpm) + FADE_OUT_DURATION;
     size_t buffer_size = (size_t)(song_duration * SAMPLE_RATE) + 1000;
 
     printf("\nRendering audio:\n");
     printf("  Sample rate: %d Hz\n", SAMPLE_RATE);
     printf("  Buffer size: %zu samples\n", buffer_size);
 
-    float* buffer = malloc(buffer_size * sizeof(float));
+    float* buffer = calloc(buffer_size, sizeof(float));
     if (!buffer) {
         printf("Error: Could not allocate audio buffer\n");
         free_song(song);
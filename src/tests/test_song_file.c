@@ -0,0 +1,66 @@
+#include <stdio.h>
+#include <string.h>
+
+#include "../song.h"
+#include "../song_file.h"
+#include "test_data.h"
+
+#define SONG_PATH "test_song.bin"
+#define CORRUPT_PATH "test_song_corrupt.bin"
+
+int test_failures = 0;
+
+void check(int condition, const char* description) {
+    if (condition) {
+        printf("  PASS: %s\n", description);
+    } else {
+        printf("  FAIL: %s\n", description);
+        test_failures++;
+    }
+}
+
+int main() {
+    printf("Testing binary song files:\n");
+
+    Song* song = create_test_song();
+    check(song->total_ticks == TICKS_PER_QUARTER * 4, "total ticks from delta-encoded notes");
+
+    static const Note long_notes[] = {
+        {60, 80, 0, 0, 100000},
+        {64, 80, 0, 200000, 70000},
+    };
+    Song* long_song = create_song(long_notes, 2, DEFAULT_BPM);
+    check(long_song->total_ticks == 270000, "32-bit times beyond 65535 ticks");
+    free_song(long_song);
+
+    check(save_song(SONG_PATH, song) == 0, "save song");
+
+    Song* loaded = load_song(SONG_PATH);
+    check(loaded != NULL, "load song");
+    if (loaded) {
+        check(loaded->note_count == song->note_count, "note count");
+        check(loaded->bpm == song->bpm, "bpm");
+        check(loaded->total_ticks == song->total_ticks, "total ticks");
+        check(memcmp(loaded->notes, song->notes, song->note_count * sizeof(Note)) == 0, "note records");
+        check((const void*)loaded->notes != (const void*)song->notes, "notes point into the mapped file");
+        unload_song(loaded);
+    }
+
+    FILE* file = fopen(CORRUPT_PATH, "wb");
+    fwrite("XXXXXXXXXXXXXXXXXXXXXXXX", 1, 24, file);
+    fclose(file);
+    check(load_song(CORRUPT_PATH) == NULL, "reject file with bad header");
+    check(load_song("missing_song.bin") == NULL, "reject missing file");
+
+    remove(SONG_PATH);
+    remove(CORRUPT_PATH);
+    free_song(song);
+
+    if (test_failures == 0) {
+        printf("All song file tests PASSED!\n");
+        return 0;
+    } else {
+        printf("%d song file test(s) FAILED!\n", test_failures);
+        return 1;
+    }
+}
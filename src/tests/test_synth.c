@@ -1,17 +1,56 @@
 #include <stdio.h>
 #include <stdlib.h>
 #include <math.h>
+#include <time.h>
 
 #include "../synth.h"
 
+#define GAIN_TOLERANCE_DB 0.25f
+
+// Largest level difference between estimated gain and peak normalization over a grid of notes
+float worst_gain_error_db(const RenderSettings* tier, double* estimate_seconds, double* peak_seconds) {
+    RenderSettings peak_tier = *tier;
+    peak_tier.gain_mode = GAIN_PEAK;
+    float worst = 0.0f;
+    *estimate_seconds = 0.0;
+    *peak_seconds = 0.0;
+
+    for (int pitch = 21; pitch <= 108; pitch += 11) {
+        for (int velocity = 30; velocity <= 127; velocity += 48) {
+            const float duration = 0.5f;
+            use_render_settings(tier);
+            const size_t size = note_size(duration);
+            float* buffer = calloc(size, sizeof(float));
+
+            clock_t start = clock();
+            synthesize_note(buffer, 0, pitch, velocity, duration);
+            *estimate_seconds += (double)(clock() - start) / CLOCKS_PER_SEC;
+
+            float peak = 0.0f;
+            for (size_t i = 0; i < size; i++) {
+                peak = fmaxf(peak, fabsf(buffer[i]));
+            }
+            worst = fmaxf(worst, fabsf(20.0f * log10f(peak / MASTER_GAINER)));
+
+            use_render_settings(&peak_tier);
+            start = clock();
+            synthesize_note(buffer, 0, pitch, velocity, duration);
+            *peak_seconds += (double)(clock() - start) / CLOCKS_PER_SEC;
+            free(buffer);
+        }
+    }
+    use_render_settings(&quality_tiers[QUALITY_FINAL]);
+    return worst;
+}
+
 int main() {
     int pitch = 69;
     int velocity = 100;
     float duration = 1.0f;
 
-    size_t buffer_size = (size_t)(duration * SAMPLE_RATE);
+    size_t buffer_size = note_size(duration);
 
-    float* buffer = malloc(buffer_size * sizeof(float));
+    float* buffer = calloc(buffer_size, sizeof(float));
     if (!buffer) {
         fprintf(stderr, "Error: Could not allocate buffer\n");
         return 1;
@@ -24,7 +63,7 @@ int main() {
     printf("  Sample rate: %d Hz\n", SAMPLE_RATE);
     printf("  Buffer size: %zu samples\n", buffer_size);
 
-    synthesize_note(buffer, buffer_size, pitch, velocity, duration);
+    synthesize_note(buffer, 0, pitch, velocity, duration);
     size_t samples_written = buffer_size;
 
     printf("Generated %zu samples\n", samples_written);
@@ -47,7 +86,22 @@ int main() {
         if (abs_val > peak) peak = abs_val;
     }
     printf("Peak level: %.6f\n", peak);
-
     free(buffer);
+
+    int failures = 0;
+    printf("\nEstimated gain vs peak normalization (tolerance %.2f dB):\n", GAIN_TOLERANCE_DB);
+    for (int tier = 0; tier < QUALITY_TIER_COUNT; tier++) {
+        double estimate_seconds, peak_seconds;
+        const float error = worst_gain_error_db(&quality_tiers[tier], &estimate_seconds, &peak_seconds);
+        printf("  %-8s worst %.3f dB, single pass %.0f ms, peak scan %.0f ms\n",
+               quality_tiers[tier].name, error, estimate_seconds * 1e3, peak_seconds * 1e3);
+        failures += error > GAIN_TOLERANCE_DB;
+    }
+
+    if (failures) {
+        printf("%d tier(s) outside the gain tolerance FAILED!\n", failures);
+        return 1;
+    }
+    printf("Gain estimation PASSED!\n");
     return 0;
 }
@@ -0,0 +1,97 @@
+#include <stdio.h>
+#include <stdlib.h>
+#include <math.h>
+#include <time.h>
+
+#include "../song.h"
+#include "../voice.h"
+#include "test_data.h"
+
+int test_failures = 0;
+
+void check(int condition, const char* description) {
+    if (condition) {
+        printf("  PASS: %s\n", description);
+    } else {
+        printf("  FAIL: %s\n", description);
+        test_failures++;
+    }
+}
+
+float rms(const float* buffer, size_t size) {
+    double sum = 0.0;
+    for (size_t i = 0; i < size; i++) {
+        sum += buffer[i] * buffer[i];
+    }
+    return sqrt(sum / size);
+}
+
+int finite_buffer(const float* buffer, size_t size) {
+    for (size_t i = 0; i < size; i++) {
+        if (!isfinite(buffer[i])) {
+            return 0;
+        }
+    }
+    return 1;
+}
+
+int main() {
+    printf("Testing the voice scheduler:\n");
+
+    Song* song = create_test_song();
+    const size_t size = (size_t)((song->total_ticks * UNIT(song->bpm) + FADE_OUT_DURATION) * SAMPLE_RATE) + 1000;
+    float* reference = calloc(size, sizeof(float));
+    float* buffer = calloc(size, sizeof(float));
+
+    clock_t start = clock();
+    render_song(song, reference);
+    const double full_seconds = (double)(clock() - start) / CLOCKS_PER_SEC;
+
+    VoiceConfig config = default_voice_config();
+    VoiceStats stats;
+    start = clock();
+    check(render_song_voices(song, &config, buffer, size, &stats) == 0, "render with default voices");
+    const double voice_seconds = (double)(clock() - start) / CLOCKS_PER_SEC;
+    const float level_db = 20.0f * log10f(rms(buffer, size) / rms(reference, size));
+    printf("  render_song %.0f ms, voices %.0f ms, level %+.2f dB\n", full_seconds * 1e3, voice_seconds * 1e3, level_db);
+    check(stats.notes == song->note_count, "every note scheduled");
+    check(stats.steals == 0, "no steals below the voice limit");
+    check(stats.peak_polyphony >= 2 && stats.peak_polyphony <= song->note_count, "peak polyphony");
+    check(fabsf(level_db) < 0.5f, "level within 0.5 dB of render_song");
+
+    config.max_voices = 2;
+    for (size_t i = 0; i < size; i++) buffer[i] = 0.0f;
+    check(render_song_voices(song, &config, buffer, size, &stats) == 0, "render with 2 voices");
+    printf("  2 voices: %llu steals, %llu dropped, peak polyphony %zu\n",
+           (unsigned long long)stats.steals, (unsigned long long)stats.dropped, stats.peak_polyphony);
+    check(stats.steals > 0, "quietest voices stolen");
+    check(stats.peak_polyphony <= 2, "polyphony capped");
+    check(finite_buffer(buffer, size), "stolen voices render finite samples");
+
+    config.steal = STEAL_OLDEST;
+    for (size_t i = 0; i < size; i++) buffer[i] = 0.0f;
+    check(render_song_voices(song, &config, buffer, size, &stats) == 0, "render stealing the oldest voice");
+    check(stats.steals > 0 && stats.peak_polyphony <= 2, "oldest voices stolen");
+
+    config = default_voice_config();
+    config.budget = 3 * MAX_HARMONICS * config.block_size;
+    for (size_t i = 0; i < size; i++) buffer[i] = 0.0f;
+    check(render_song_voices(song, &config, buffer, size, &stats) == 0, "render within a compute budget");
+    printf("  budget: %llu of %llu blocks limited\n",
+           (unsigned long long)stats.limited_blocks, (unsigned long long)stats.blocks);
+    check(stats.limited_blocks > 0 && stats.limited_blocks < stats.blocks, "only dense blocks drop harmonics");
+    check(stats.oscillator_samples <= stats.blocks * config.budget, "oscillator work within budget");
+    check(finite_buffer(buffer, size), "budgeted render finite");
+
+    free(buffer);
+    free(reference);
+    free_song(song);
+
+    if (test_failures == 0) {
+        printf("All voice scheduler tests PASSED!\n");
+        return 0;
+    } else {
+        printf("%d voice scheduler test(s) FAILED!\n", test_failures);
+        return 1;
+    }
+}
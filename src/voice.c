@@ -0,0 +1,339 @@
+#include <stdint.h>
+#include <stdlib.h>
+#include <string.h>
+
+#include "maths.h"
+#include "model.h"
+#include "voice.h"
+
+#ifndef M_PI
+#define M_PI 3.14159265358979323846
+#endif
+
+VoiceConfig default_voice_config(void) {
+    VoiceConfig config;
+    config.max_voices = DEFAULT_MAX_VOICES;
+    config.block_size = DEFAULT_BLOCK_SIZE;
+    config.budget = 0;
+    config.steal = STEAL_QUIETEST;
+    config.release = DEFAULT_STEAL_RELEASE;
+    return config;
+}
+
+VoiceScheduler* create_voice_scheduler(const Song* song, const VoiceConfig* config) {
+    if (config->max_voices == 0 || config->block_size == 0) {
+        return NULL;
+    }
+
+    VoiceScheduler* scheduler = calloc(1, sizeof(VoiceScheduler));
+    if (!scheduler) {
+        return NULL;
+    }
+    scheduler->voices = calloc(config->max_voices, sizeof(Voice));
+    if (!scheduler->voices) {
+        free(scheduler);
+        return NULL;
+    }
+    scheduler->config = *config;
+    scheduler->song = song;
+    return scheduler;
+}
+
+void free_voice_scheduler(VoiceScheduler* scheduler) {
+    if (scheduler) {
+        free(scheduler->voices);
+        free(scheduler);
+    }
+}
+
+// A voice cannot see its whole note before playing it, but a decaying piano note is
+// loudest right after its attack, so the first control points set its gain
+static float estimate_gain(const VoiceNote* note) {
+    const float p = note->pitch / 127.0f;
+    const float v = note->velocity / 127.0f;
+    const int harmonics = note_harmonics(note->pitch);
+    float amplitude[MAX_HARMONICS];
+
+    float peak = 0.0f;
+    for (int k = 1; k <= GAIN_CONTROL_POINTS && k * GAIN_CONTROL_STEP < note->duration + FADE_OUT_DURATION; k++) {
+        const float t = k * GAIN_CONTROL_STEP;
+        const float envelope = note_envelope(t, note->duration);
+        for (int harmonic = 0; harmonic < harmonics; harmonic++) {
+            amplitude[harmonic] = predict_amplitude(p, v, harmonic / (MAX_HARMONICS - 1.0f), t) * envelope;
+        }
+        peak = fmaxf(peak, harmonic_peak(amplitude, harmonics));
+    }
+    return peak > 0.0f ? MASTER_GAINER / peak : 0.0f;
+}
+
+static void start_voice(Voice* voice) {
+    voice->active = 1;
+    voice->pending = 0;
+    voice->note = voice->next;
+    voice->end = voice->note.start + note_size(voice->note.duration);
+    voice->release_start = voice->end;
+    voice->release_end = voice->end;
+    voice->frequency = 2.0f * M_PI * calculate_frequency(voice->note.pitch);
+    voice->gain = estimate_gain(&voice->note);
+    voice->level = 0.0f;
+    begin_control(&voice->control, voice->note.pitch, voice->note.velocity, voice->note.duration);
+    voice->segment_end = 0;
+    memset(voice->next_amplitude, 0, sizeof(voice->next_amplitude));
+}
+
+// Move to the control segment containing sample (relative to the note start)
+static void advance_control(Voice* voice, size_t sample) {
+    while (sample >= voice->segment_end) {
+        memcpy(voice->amplitude, voice->next_amplitude, sizeof(voice->amplitude));
+        voice->segment_start = voice->segment_end;
+        if (next_control_point(&voice->control)) {
+            voice->segment_end = (size_t)(voice->control.time * current_render_settings()->sample_rate);
+            memcpy(voice->next_amplitude, voice->control.amplitude, sizeof(voice->next_amplitude));
+        } else {
+            voice->segment_end = SIZE_MAX;
+        }
+
+        float level = 0.0f;
+        for (int harmonic = 0; harmonic < voice->control.harmonics; harmonic++) {
+            level += voice->next_amplitude[harmonic];
+        }
+        voice->level = voice->gain * level;
+    }
+}
+
+static int quieter(const Voice* a, const Voice* b, StealPolicy policy) {
+    if (policy == STEAL_OLDEST) {
+        return a->note.start < b->note.start;
+    }
+    return a->level < b->level;
+}
+
+static void allocate_voice(VoiceScheduler* scheduler, const VoiceNote* note) {
+    Voice* voices = scheduler->voices;
+    const size_t count = scheduler->config.max_voices;
+    Voice* victim = NULL;
+
+    scheduler->stats.notes++;
+    for (size_t i = 0; i < count; i++) {
+        Voice* voice = &voices[i];
+        if (voice->pending) {
+            continue;
+        }
+        // Free, or finished before the new note starts
+        if (!voice->active || voice->end <= note->start) {
+            voice->next = *note;
+            voice->pending = 1;
+            return;
+        }
+        if (!victim || quieter(voice, victim, scheduler->config.steal)) {
+            victim = voice;
+        }
+    }
+
+    scheduler->stats.steals++;
+    if (!victim) {
+        // Every voice already has a note waiting; the new note replaces one of them
+        for (size_t i = 0; i < count; i++) {
+            if (!victim || quieter(&voices[i], victim, scheduler->config.steal)) {
+                victim = &voices[i];
+            }
+        }
+        scheduler->stats.dropped++;
+        const size_t start = victim->next.start;
+        victim->next = *note;
+        victim->next.start = start > note->start ? start : note->start;
+        return;
+    }
+
+    const size_t release = (size_t)(scheduler->config.release * current_render_settings()->sample_rate);
+    if (victim->release_start > note->start) {
+        victim->release_start = note->start;
+        victim->release_end = note->start + release < victim->end ? note->start + release : victim->end;
+        victim->end = victim->release_end;
+    }
+    victim->next = *note;
+    victim->next.start = victim->end;
+    victim->pending = 1;
+}
+
+// A live note-off fixes the note's duration. The control segment in flight was planned
+// for a held note, so the schedule restarts from the amplitudes sounding right now.
+static void release_voice(Voice* voice, size_t position) {
+    const int sample_rate = current_render_settings()->sample_rate;
+    const size_t sample = position - voice->note.start;
+    voice->note.duration = fmaxf((float)sample / sample_rate, LIVE_MIN_DURATION);
+    voice->note.held = 0;
+
+    const size_t end = voice->note.start + note_size(voice->note.duration);
+    if (voice->release_start == voice->end && end < voice->end) {  // not already being stolen
+        voice->end = end;
+        voice->release_start = end;
+        voice->release_end = end;
+    }
+
+    float current[MAX_HARMONICS];
+    const float m_f = (float)(sample - voice->segment_start) / (voice->segment_end - voice->segment_start);
+    for (int harmonic = 0; harmonic < MAX_HARMONICS; harmonic++) {
+        current[harmonic] = m_f * voice->next_amplitude[harmonic] + (1.0f - m_f) * voice->amplitude[harmonic];
+    }
+    memcpy(voice->next_amplitude, current, sizeof(current));
+    memcpy(voice->control.amplitude, current, sizeof(current));
+    voice->segment_end = sample;
+    voice->control.duration = voice->note.duration;
+    voice->control.time = (float)sample / sample_rate;
+    voice->control.step = CONTROL_MIN_STEP;
+    voice->control.pending = 0;
+}
+
+void voice_note_on(VoiceScheduler* scheduler, int pitch, int velocity) {
+    // Striking a key that is still held releases the previous note first
+    voice_note_off(scheduler, pitch);
+    VoiceNote note = {pitch, velocity, LIVE_HOLD_DURATION, scheduler->position, 1};
+    allocate_voice(scheduler, &note);
+}
+
+void voice_note_off(VoiceScheduler* scheduler, int pitch) {
+    const size_t position = scheduler->position;
+    for (size_t i = 0; i < scheduler->config.max_voices; i++) {
+        Voice* voice = &scheduler->voices[i];
+        if (voice->active && voice->note.held && voice->note.pitch == pitch) {
+            release_voice(voice, position);
+        }
+        // Still waiting for a stolen voice to finish its release
+        if (voice->pending && voice->next.held && voice->next.pitch == pitch) {
+            const float elapsed = position > voice->next.start ? (float)(position - voice->next.start) : 0.0f;
+            voice->next.duration = fmaxf(elapsed / current_render_settings()->sample_rate, LIVE_MIN_DURATION);
+            voice->next.held = 0;
+        }
+    }
+}
+
+size_t sounding_voices(const VoiceScheduler* scheduler) {
+    size_t count = 0;
+    for (size_t i = 0; i < scheduler->config.max_voices; i++) {
+        count += scheduler->voices[i].active || scheduler->voices[i].pending;
+    }
+    return count;
+}
+
+static void render_voice(Voice* voice, float* block, size_t position, size_t block_size, int harmonics) {
+    const int sample_rate = current_render_settings()->sample_rate;
+    const size_t from = voice->note.start > position ? voice->note.start : position;
+    const size_t to = voice->end < position + block_size ? voice->end : position + block_size;
+
+    for (size_t n = from; n < to; n++) {
+        const size_t sample = n - voice->note.start;
+        advance_control(voice, sample);
+
+        // The fundamental's phase is wrapped in double precision. A float time loses the
+        // upper partials' phase within minutes, and live notes are held for up to an hour.
+        const double turns = voice->frequency / (2.0 * M_PI) * sample / sample_rate;
+        const float phase = (float)(2.0 * M_PI * (turns - (double)(uint64_t)turns));
+
+        const float m_f = (float)(sample - voice->segment_start) / (voice->segment_end - voice->segment_start);
+        float y = 0.0f;
+        const int count = harmonics < voice->control.harmonics ? harmonics : voice->control.harmonics;
+        for (int harmonic = 0; harmonic < count; harmonic++) {
+            const float a = m_f * voice->next_amplitude[harmonic] + (1.0f - m_f) * voice->amplitude[harmonic];
+            y += a * sinf(phase * (harmonic + 1));
+        }
+        if (n >= voice->release_start) {
+            y *= (float)(voice->release_end - n) / (voice->release_end - voice->release_start);
+        }
+        block[n - position] += voice->gain * y;
+    }
+}
+
+size_t render_voice_block(VoiceScheduler* scheduler, float* block) {
+    const Song* song = scheduler->song;
+    const size_t block_size = scheduler->config.block_size;
+    const size_t position = scheduler->position;
+    const double unit = song ? UNIT(song->bpm) : 0.0;
+    const RenderSettings* settings = current_render_settings();
+
+    while (song && scheduler->next_note < song->note_count) {
+        const Note* note = &song->notes[scheduler->next_note];
+        const uint32_t ticks = scheduler->ticks + note->delta;
+        const size_t start = (size_t)(ticks * unit * settings->sample_rate);
+        if (start >= position + block_size) {
+            break;
+        }
+        VoiceNote voice_note = {note->pitch, note->velocity, note->duration * unit, start, 0};
+        allocate_voice(scheduler, &voice_note);
+        scheduler->ticks = ticks;
+        scheduler->next_note++;
+    }
+
+    size_t sounding = 0;
+    for (size_t i = 0; i < scheduler->config.max_voices; i++) {
+        const Voice* voice = &scheduler->voices[i];
+        sounding += voice->active || (voice->pending && voice->next.start < position + block_size);
+    }
+    if (sounding == 0 && song && scheduler->next_note == song->note_count) {
+        return 0;
+    }
+
+    // Over budget, every voice drops its upper (quietest) harmonics for this block
+    int harmonics = settings->harmonics;
+    const uint64_t budget = scheduler->config.budget;
+    if (budget && sounding * settings->harmonics * block_size > budget) {
+        const uint64_t fit = budget / (sounding * block_size);
+        harmonics = fit > 0 ? (int)fit : 1;
+        scheduler->stats.limited_blocks++;
+    }
+
+    memset(block, 0, block_size * sizeof(float));
+    for (size_t i = 0; i < scheduler->config.max_voices; i++) {
+        Voice* voice = &scheduler->voices[i];
+        while (voice->active || (voice->pending && voice->next.start < position + block_size)) {
+            if (!voice->active) {
+                start_voice(voice);
+            }
+            render_voice(voice, block, position, block_size, harmonics);
+            const size_t from = voice->note.start > position ? voice->note.start : position;
+            const size_t to = voice->end < position + block_size ? voice->end : position + block_size;
+            const int rendered = harmonics < voice->control.harmonics ? harmonics : voice->control.harmonics;
+            scheduler->stats.oscillator_samples += (uint64_t)(to - from) * rendered;
+            if (voice->end > position + block_size) {
+                break;
+            }
+            voice->active = 0;
+        }
+    }
+
+    if (sounding > scheduler->stats.peak_polyphony) {
+        scheduler->stats.peak_polyphony = sounding;
+    }
+    scheduler->stats.blocks++;
+    scheduler->position += block_size;
+    return block_size;
+}
+
+int render_song_voices(const Song* song, const VoiceConfig* config, float* buffer, size_t buffer_size,
+                       VoiceStats* stats) {
+    VoiceScheduler* scheduler = create_voice_scheduler(song, config);
+    float* block = scheduler ? malloc(config->block_size * sizeof(float)) : NULL;
+    if (!block) {
+        free_voice_scheduler(scheduler);
+        return -1;
+    }
+
+    while (scheduler->position < buffer_size) {
+        const size_t rendered = render_voice_block(scheduler, block);
+        if (rendered == 0) {
+            break;
+        }
+        const size_t position = scheduler->position - rendered;
+        const size_t count = buffer_size - position < rendered ? buffer_size - position : rendered;
+        for (size_t i = 0; i < count; i++) {
+            buffer[position + i] += block[i];
+        }
+    }
+
+    if (stats) {
+        *stats = scheduler->stats;
+    }
+    free(block);
+    free_voice_scheduler(scheduler);
+    return 0;
+}
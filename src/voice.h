@@ -0,0 +1,84 @@
+#pragma once
+
+#include <stddef.h>
+#include <stdint.h>
+
+#include "song.h"
+#include "synth.h"
+
+#define DEFAULT_MAX_VOICES 16
+#define DEFAULT_BLOCK_SIZE 256
+#define DEFAULT_STEAL_RELEASE 0.005f
+#define GAIN_CONTROL_POINTS 3
+#define GAIN_CONTROL_STEP 0.1f
+#define LIVE_HOLD_DURATION 3600.0f  // duration of a live note until its note-off arrives
+#define LIVE_MIN_DURATION 0.05f     // a live note released sooner still sounds this long
+
+typedef enum {
+  STEAL_QUIETEST,
+  STEAL_OLDEST
+} StealPolicy;
+
+typedef struct {
+  size_t max_voices;
+  size_t block_size;
+  uint64_t budget;  // oscillator samples (voices x harmonics x samples) per block, 0 = unlimited
+  StealPolicy steal;
+  float release;    // seconds a stolen voice fades out before its slot is reused
+} VoiceConfig;
+
+typedef struct {
+  uint64_t notes;
+  uint64_t steals;
+  uint64_t dropped;         // notes stolen before they started sounding
+  size_t peak_polyphony;
+  uint64_t blocks;
+  uint64_t limited_blocks;  // blocks rendered with fewer harmonics to stay within budget
+  uint64_t oscillator_samples;
+} VoiceStats;
+
+typedef struct {
+  uint8_t pitch;
+  uint8_t velocity;
+  float duration;
+  size_t start;
+  uint8_t held;  // live note whose duration ends at its note-off
+} VoiceNote;
+
+typedef struct {
+  int active;
+  int pending;
+  VoiceNote note;
+  VoiceNote next;  // note waiting for a stolen voice to finish its release
+  size_t end;
+  size_t release_start;
+  size_t release_end;
+  float frequency;
+  float gain;
+  float level;
+  ControlSchedule control;
+  size_t segment_start;
+  size_t segment_end;
+  float amplitude[MAX_HARMONICS];
+  float next_amplitude[MAX_HARMONICS];
+} Voice;
+
+typedef struct {
+  VoiceConfig config;
+  VoiceStats stats;
+  const Song *song;  // NULL for live schedulers, which take notes from voice_note_on/off
+  size_t next_note;
+  uint32_t ticks;
+  size_t position;
+  Voice *voices;
+} VoiceScheduler;
+
+VoiceConfig default_voice_config(void);
+VoiceScheduler *create_voice_scheduler(const Song *song, const VoiceConfig *config);
+void free_voice_scheduler(VoiceScheduler *scheduler);
+size_t render_voice_block(VoiceScheduler *scheduler, float *block);
+void voice_note_on(VoiceScheduler *scheduler, int pitch, int velocity);
+void voice_note_off(VoiceScheduler *scheduler, int pitch);
+size_t sounding_voices(const VoiceScheduler *scheduler);
+int render_song_voices(const Song *song, const VoiceConfig *config, float *buffer, size_t buffer_size,
+                       VoiceStats *stats);
@@ -0,0 +1,121 @@
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+
+#include "mapping.h"
+#include "weights_blob.h"
+
+#define ALIGN4(x) (((x) + 3) & ~(size_t)3)
+
+static ModelWeights blob_weights;
+static void* blob_data = NULL;
+static size_t blob_size = 0;
+
+static size_t blob_payload_size(const WeightsBlobHeader* header) {
+    size_t size = 0;
+    for (int i = 0; i < LAYER_COUNT; i++) {
+        size += ALIGN4((size_t)header->sizes[i] * header->sizes[i + 1]);
+        size += ALIGN4(header->sizes[i + 1]);
+    }
+    return size;
+}
+
+static int validate_header(const WeightsBlobHeader* header, size_t size) {
+    if (size < sizeof(WeightsBlobHeader)) return 0;
+    if (memcmp(header->magic, WEIGHTS_BLOB_MAGIC, 4) != 0) return 0;
+    if (header->version != WEIGHTS_BLOB_VERSION) return 0;
+    if (header->layer_count != LAYER_COUNT) return 0;
+    if (header->sizes[0] != INPUT_SIZE || header->sizes[LAYER_COUNT] != OUTPUT_SIZE) return 0;
+    for (int i = 0; i <= LAYER_COUNT; i++) {
+        if (header->sizes[i] == 0 || header->sizes[i] > MAX_LAYER_SIZE) return 0;
+    }
+    return size >= sizeof(WeightsBlobHeader) + blob_payload_size(header);
+}
+
+int load_weights_blob(const char* path) {
+    size_t size = 0;
+    void* data = map_file(path, &size);
+    if (!data) return -1;
+
+    const WeightsBlobHeader* header = (const WeightsBlobHeader*)data;
+    if (!validate_header(header, size)) {
+        unmap_file(data, size);
+        return -1;
+    }
+
+    unload_weights_blob();
+
+    const unsigned char* tensor = (const unsigned char*)data + sizeof(WeightsBlobHeader);
+    for (int i = 0; i < LAYER_COUNT; i++) {
+        ModelLayer* layer = &blob_weights.layers[i];
+        layer->input_size = (int)header->sizes[i];
+        layer->output_size = (int)header->sizes[i + 1];
+        layer->weights_min = header->ranges[i][0];
+        layer->weights_max = header->ranges[i][1];
+        layer->biases_min = header->ranges[i][2];
+        layer->biases_max = header->ranges[i][3];
+
+        layer->weights_q = tensor;
+        tensor += ALIGN4((size_t)layer->input_size * layer->output_size);
+        layer->biases_q = tensor;
+        tensor += ALIGN4((size_t)layer->output_size);
+    }
+
+    blob_data = data;
+    blob_size = size;
+    use_weights(&blob_weights);
+    return 0;
+}
+
+void unload_weights_blob(void) {
+    if (!blob_data) return;
+
+    use_builtin_weights();
+    unmap_file(blob_data, blob_size);
+    blob_data = NULL;
+    blob_size = 0;
+}
+
+int save_weights_blob(const char* path, const ModelWeights* weights) {
+    FILE* file = fopen(path, "wb");
+    if (!file) return -1;
+
+    WeightsBlobHeader header;
+    memset(&header, 0, sizeof(header));
+    memcpy(header.magic, WEIGHTS_BLOB_MAGIC, 4);
+    header.version = WEIGHTS_BLOB_VERSION;
+    header.layer_count = LAYER_COUNT;
+    header.sizes[0] = (uint32_t)weights->layers[0].input_size;
+    for (int i = 0; i < LAYER_COUNT; i++) {
+        const ModelLayer* layer = &weights->layers[i];
+        header.sizes[i + 1] = (uint32_t)layer->output_size;
+        header.ranges[i][0] = layer->weights_min;
+        header.ranges[i][1] = layer->weights_max;
+        header.ranges[i][2] = layer->biases_min;
+        header.ranges[i][3] = layer->biases_max;
+    }
+    fwrite(&header, sizeof(header), 1, file);
+
+    const unsigned char padding[4] = {0};
+    for (int i = 0; i < LAYER_COUNT; i++) {
+        const ModelLayer* layer = &weights->layers[i];
+        const size_t weights_size = (size_t)layer->input_size * layer->output_size;
+        const size_t biases_size = (size_t)layer->output_size;
+        fwrite(layer->weights_q, 1, weights_size, file);
+        fwrite(padding, 1, ALIGN4(weights_size) - weights_size, file);
+        fwrite(layer->biases_q, 1, biases_size, file);
+        fwrite(padding, 1, ALIGN4(biases_size) - biases_size, file);
+    }
+
+    return fclose(file) == 0 ? 0 : -1;
+}
+
+int init_weights(void) {
+    const char* path = getenv(WEIGHTS_BLOB_ENV);
+    if (load_weights_blob(path ? path : WEIGHTS_BLOB_PATH) == 0) {
+        return 1;
+    }
+
+    use_builtin_weights();
+    return 0;
+}
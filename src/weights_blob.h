@@ -0,0 +1,23 @@
+#pragma once
+
+#include <stdint.h>
+
+#include "model.h"
+
+#define WEIGHTS_BLOB_MAGIC "TPWB"
+#define WEIGHTS_BLOB_VERSION 1
+#define WEIGHTS_BLOB_PATH "models/tiny.bin"
+#define WEIGHTS_BLOB_ENV "TINYPIANO_WEIGHTS"
+
+typedef struct {
+    char magic[4];
+    uint32_t version;
+    uint32_t layer_count;
+    uint32_t sizes[LAYER_COUNT + 1];
+    float ranges[LAYER_COUNT][4];
+} WeightsBlobHeader;
+
+int load_weights_blob(const char *path);
+void unload_weights_blob(void);
+int save_weights_blob(const char *path, const ModelWeights *weights);
+int init_weights(void);
@@ -0,0 +1,157 @@
+#include "weights_fixed.h"
+
+int32_t weights1_multiplier = 620582;
+int32_t weights1_offset = -35437728;
+int32_t weights2_multiplier = 925426;
+int32_t weights2_offset = -8623296;
+int32_t weights3_multiplier = 467950;
+int32_t weights3_offset = -24357812;
+int32_t weights_out_multiplier = 148519;
+int32_t weights_out_offset = 6833654;
+
+int8_t weights1_i8[] = {
+    -117, 32, 90, 61, 33, 70, 89, 51, 
+    127, 54, 30, 58, 84, 37, 69, 54, 
+    70, 42, -97, 48, -62, 64, 13, 56, 
+    77, 15, 75, 61, 58, 57, 58, 57, 
+    32, 5, 97, 57, 15, 58, -128, 58, 
+    -82, 72, 93, 55, -12, 77, -15, 21, 
+    -69, -67, 62, 31, 101, 91, 70, 58, 
+    20, 70, 14, -14, 23, 80, 22, 43
+};
+int32_t biases1_i32[] = {
+    15909, -10474, -30802, -526, 19802, 75163, 4232, -35127, 
+    5529, 40130, 7692, 10719, -13069, -34262, 44022, 25425
+};
+int8_t weights2_i8[] = {
+    59, 20, 1, -9, 46, -7, -13, 36, 
+    41, 127, 109, 35, 32, 2, -1, -9, 
+    5, -4, 4, 12, 14, 7, -6, 24, 
+    -8, 7, -9, 15, -2, 1, -6, 29, 
+    -4, 24, 22, 12, 14, 22, 4, 14, 
+    2, 30, -9, 11, 89, 24, 21, 13, 
+    17, -1, 4, -20, 12, -64, -10, 23, 
+    26, -17, 19, 13, -17, -16, 40, 21, 
+    7, 5, 32, 11, 40, -68, 6, 10, 
+    34, 118, 70, 8, 59, 11, 4, 4, 
+    24, 36, -52, -20, 60, -67, -36, 26, 
+    36, -35, 6, -37, -22, -25, 55, 50, 
+    -11, 4, -5, 18, 11, -42, 19, 3, 
+    20, -20, -12, 14, 15, -32, 10, 9, 
+    -7, 5, 7, 1, -6, -22, -3, 39, 
+    11, 38, -48, 15, 20, 1, 18, 25, 
+    -4, 16, 6, 10, -2, -9, 1, 23, 
+    -2, 39, 32, 1, 0, -9, 8, -3, 
+    -37, 20, -4, 13, 20, -128, 4, 16, 
+    20, -95, 10, 39, 38, 25, 2, 19, 
+    2, 5, 17, 17, -12, -10, 18, -7, 
+    17, -9, -19, 4, -8, 24, 7, -8, 
+    8, 12, 17, 12, 8, -28, 20, -5, 
+    4, -12, -2, 8, 40, 14, -9, -10, 
+    27, 18, -6, 7, -6, 11, 19, 11, 
+    24, 28, 16, 15, -11, -10, 7, 8, 
+    12, 20, 26, 10, -17, -107, 14, 24, 
+    16, -38, -5, 32, -11, 20, -5, -25, 
+    30, 12, 18, 9, 8, 19, 8, 11, 
+    17, 28, 34, 30, -1, 15, 3, -1, 
+    -8, 11, 31, 1, 26, -43, 8, 38, 
+    -20, -81, -26, 46, 27, 19, 3, 11
+};
+int32_t biases2_i32[] = {
+    -13127, -16747, 4246, -14937, -9870, -9870, -98, -16385, 
+    -11679, 4607, 16008, 19085, 8227, -27062, 4607, -10956
+};
+int8_t weights3_i8[] = {
+    78, 7, 67, -5, 48, 0, 55, 6, 
+    -2, 48, 69, 80, 59, 29, 68, 62, 
+    83, 17, 62, -5, 61, 5, 56, 8, 
+    7, 46, 64, 67, 65, 45, 66, 48, 
+    35, 43, 100, 67, 97, -20, -25, 39, 
+    86, 85, 28, 41, 36, -128, 68, -71, 
+    121, 71, 43, 60, 54, -2, -6, 106, 
+    59, -71, 79, 37, 29, -41, 43, 84, 
+    48, 80, 57, 100, 6, 102, 117, 127, 
+    89, 52, 78, 55, 34, 49, 26, 50, 
+    90, 5, 58, -4, 42, 2, 45, 9, 
+    -4, 63, 69, 80, 61, 41, 61, 46, 
+    86, 15, 45, 4, 65, 9, 55, 14, 
+    13, 49, 71, 66, 64, 43, 64, 56, 
+    74, 25, 47, 2, 62, 2, 48, 22, 
+    4, 46, 63, 71, 55, 28, 66, 53
+};
+int32_t biases3_i32[] = {
+    56343, 55390, -398, 1986, -61907, 59681, 55866, 51098
+};
+int8_t weights_out_i8[] = {
+    -118, -94, 82, 127, -33, -128, -92, -75
+};
+int32_t biases_out_i32[] = {
+    -220962
+};
+int16_t silu_table[] = {
+    0, 0, 0, 0, 0, 0, 0, 0, 
+    0, 0, 0, 0, 0, 0, 0, 0, 
+    0, 0, 0, 0, 0, 0, 0, 0, 
+    0, 0, 0, 0, 0, 0, 0, 0, 
+    0, 0, 0, 0, 0, 0, 0, 0, 
+    0, 0, 0, 0, 0, 0, 0, 0, 
+    0, 0, 0, 0, 0, 0, 0, 0, 
+    0, 0, 0, 0, 0, 0, 0, 0, 
+    0, 0, 0, 0, 0, 0, 0, 0, 
+    0, 0, 0, 0, 0, 0, 0, 0, 
+    0, 0, 0, 0, 0, 0, 0, 0, 
+    0, 0, 0, 0, 0, 0, 0, 0, 
+    0, 0, 0, 0, 0, 0, 0, 0, 
+    0, 0, 0, 0, 0, 0, 0, 0, 
+    0, 0, 0, 0, 0, 0, 0, 0, 
+    0, 0, 0, 0, 0, 0, 0, 0, 
+    0, 0, 0, 0, 0, 0, 0, 0, 
+    0, 0, 0, 0, 0, 0, 0, 0, 
+    0, 0, 0, 0, 0, 0, 0, 0, 
+    0, 0, 0, 0, 0, 0, 0, 0, 
+    0, 0, 0, 0, 0, 0, 0, 0, 
+    0, 0, 0, 0, 0, 0, 0, 0, 
+    0, -1, -1, -1, -1, -1, -1, -1, 
+    -1, -1, -1, -2, -2, -2, -2, -2, 
+    -3, -3, -3, -4, -4, -5, -5, -6, 
+    -7, -7, -8, -9, -10, -11, -12, -14, 
+    -15, -17, -19, -21, -23, -25, -28, -31, 
+    -34, -38, -42, -46, -51, -56, -61, -67, 
+    -74, -81, -88, -96, -105, -114, -124, -135, 
+    -146, -157, -169, -182, -194, -207, -220, -232, 
+    -244, -255, -265, -274, -280, -284, -285, -282, 
+    -275, -264, -246, -223, -193, -156, -112, -60, 
+    0, 68, 144, 228, 319, 417, 522, 632, 
+    749, 870, 995, 1124, 1256, 1390, 1527, 1665, 
+    1804, 1944, 2084, 2225, 2366, 2506, 2647, 2787, 
+    2926, 3065, 3204, 3342, 3479, 3616, 3752, 3887, 
+    4022, 4157, 4291, 4424, 4557, 4690, 4822, 4954, 
+    5086, 5217, 5348, 5479, 5609, 5739, 5869, 5999, 
+    6129, 6258, 6388, 6517, 6646, 6775, 6904, 7033, 
+    7161, 7290, 7419, 7547, 7676, 7804, 7933, 8061, 
+    8189, 8318, 8446, 8574, 8702, 8830, 8959, 9087, 
+    9215, 9343, 9471, 9599, 9727, 9855, 9983, 10111, 
+    10240, 10368, 10496, 10624, 10752, 10880, 11008, 11136, 
+    11264, 11392, 11520, 11648, 11776, 11904, 12032, 12160, 
+    12288, 12416, 12544, 12672, 12800, 12928, 13056, 13184, 
+    13312, 13440, 13568, 13696, 13824, 13952, 14080, 14208, 
+    14336, 14464, 14592, 14720, 14848, 14976, 15104, 15232, 
+    15360, 15488, 15616, 15744, 15872, 16000, 16128, 16256, 
+    16384, 16512, 16640, 16768, 16896, 17024, 17152, 17280, 
+    17408, 17536, 17664, 17792, 17920, 18048, 18176, 18304, 
+    18432, 18560, 18688, 18816, 18944, 19072, 19200, 19328, 
+    19456, 19584, 19712, 19840, 19968, 20096, 20224, 20352, 
+    20480, 20608, 20736, 20864, 20992, 21120, 21248, 21376, 
+    21504, 21632, 21760, 21888, 22016, 22144, 22272, 22400, 
+    22528, 22656, 22784, 22912, 23040, 23168, 23296, 23424, 
+    23552, 23680, 23808, 23936, 24064, 24192, 24320, 24448, 
+    24576, 24704, 24832, 24960, 25088, 25216, 25344, 25472, 
+    25600, 25728, 25856, 25984, 26112, 26240, 26368, 26496, 
+    26624, 26752, 26880, 27008, 27136, 27264, 27392, 27520, 
+    27648, 27776, 27904, 28032, 28160, 28288, 28416, 28544, 
+    28672, 28800, 28928, 29056, 29184, 29312, 29440, 29568, 
+    29696, 29824, 29952, 30080, 30208, 30336, 30464, 30592, 
+    30720, 30848, 30976, 31104, 31232, 31360, 31488, 31616, 
+    31744, 31872, 32000, 32128, 32256, 32384, 32512, 32640, 
+    32767
+};
@@ -0,0 +1,22 @@
+#pragma once
+
+#include <stdint.h>
+
+#define FIXED_ACTIVATION_SHIFT 10
+#define FIXED_MULTIPLIER_SHIFT 24
+#define SILU_TABLE_SHIFT 7
+#define SILU_TABLE_SIZE 513
+
+extern int8_t weights1_i8[];
+extern int32_t biases1_i32[];
+extern int32_t weights1_multiplier, weights1_offset;
+extern int8_t weights2_i8[];
+extern int32_t biases2_i32[];
+extern int32_t weights2_multiplier, weights2_offset;
+extern int8_t weights3_i8[];
+extern int32_t biases3_i32[];
+extern int32_t weights3_multiplier, weights3_offset;
+extern int8_t weights_out_i8[];
+extern int32_t biases_out_i32[];
+extern int32_t weights_out_multiplier, weights_out_offset;
+extern int16_t silu_table[];